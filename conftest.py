@@ -0,0 +1 @@
+# the tests import financial_utilities and portfolio_builder from the repository root
@@ -1,219 +1,191 @@
 import datetime
-import traceback
-# import numpy as np
-from enum import Enum
-import csv
+from typing import Sequence
+import numpy as np
 import financial_utilities.constants as K
 from financial_utilities.payment_source import PaymentSource
-
-# region BondFields enum
-
-"""
-    BondField is an enum that defines the fields in the bond csv file
-    that is downloaded from the Fidelity website. It represents the available
-    bonds that can be purchased matching the criteria in the bond screening
-    query
-"""
-
-
-class BondField(Enum):
-    Cusip = 0
-    State = 1
-    Description = 2
-    Coupon = 3
-    Maturity_Date = 4
-    Next_Call_Date = 5
-    Moody_Rating = 6
-    SP_Rating = 7
-    Bid = 8
-    Ask = 9
-    Yield_Bid = 10
-    Ask_Yield_Worst = 11
-    Ask_Yield_Maturity = 12
-    Quantity_Bid = 13
-    Quantity_Ask = 14
-    Attributes = 15
-    
-# endregion
+from financial_utilities.bond_universe import BondUniverse, BondField
+from financial_utilities.bond_loader import BondCsvLoader, RowFilter
+from financial_utilities.universe_cache import UniverseCache
+from financial_utilities.bond_screen import BondScreen
+from financial_utilities.bond_index import BondIndex
+from financial_utilities.text_index import UniverseTextIndex
+from financial_utilities.prefix_trie import PrefixTrie
+from financial_utilities.ranking import RankedBonds
+from financial_utilities.scoring import Scorer, ScoringProfile
+from financial_utilities.skyline import skyline_rows
 
 # region ------------------------  class  Bond ----------------------------------#
 
 
 class Bond(PaymentSource):
-    
+    """
+        A Bond is a lightweight view of one row of a BondUniverse. It holds no
+        data of its own, every property reads the universe's column arrays, so
+        BondGroup can hold very large universes without a full object per bond.
+    """
+
     count = 0
 
     @staticmethod
     def clean_int(int_string: str) -> int:
         return int(int_string.replace(",", ""))
 
-    def __init__(self, values: list, purchase_date=None) -> None:
-        super().__init__(purchase_date)
+    def __init__(self, universe: BondUniverse, row: int) -> None:
+        # PaymentSource.__init__ is not called, the view has no per-bond matrices
+        self._universe = universe
+        self._row = row
+
+    @classmethod
+    def from_values(cls, values: list, purchase_date=None) -> 'Bond':
+        """ create a stand-alone bond from a property list of the bond csv file """
         if not values: raise Exception("Bond is empty")
-        self.values_list = values
+        loader = BondCsvLoader.from_rows([values], purchase_date)
+        universe = loader.make_universe()
+        if loader.errors: raise Exception(f"Bad bond {loader.errors[0]}")
         Bond.count += 1
-        # initialize instance variables
+        return universe.bond(0)
 
-        # cusip
-        _s = self.values_list[BondField.Cusip.value]
-        if _s.startswith('='): _s = _s[2:-1]            # sometimes the cusip looks like this ="cusip"
-        self._cusip = _s
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Bond) and other._universe is self._universe and other._row == self._row
 
-        # description
-        self._description = self.values_list[BondField.Description.value]
+    def __hash__(self) -> int: return hash((id(self._universe), self._row))
 
-        # coupon
-        self._coupon = float(self.values_list[BondField.Coupon.value])
+    def _value(self, name: str):
+        return self._universe[name][self._row]
 
-        # maturity_date
-        self._maturity_date = self.values_list[BondField.Maturity_Date.value]
-        self.process_maturity_date(self)
+    # region ------------------------  properties ---------------------------------#
 
-        # next_call_date & callable
-        self._callable = False
-        _s = self.values_list[BondField.Next_Call_Date.value]
-        if ("N/A" in _s) or ("--" in _s):
-            self._callable = False
-        else:   # there is a next_call_date
-            # if the next call date is within a year of maturity, don't consider it callable
-            self._next_call_date = datetime.datetime.strptime(_s, '%m/%d/%Y')
-            maturity = datetime.datetime.strptime(self._maturity_date, '%m/%d/%Y')
-            delta = maturity - self._next_call_date
-            self._callable = delta > datetime.timedelta(days=365)
+    @property
+    def universe(self) -> BondUniverse: return self._universe
 
-        self._purchase_date = purchase_date or datetime.datetime.now().strftime("%m/%d/%Y")
-        self.process_purchase_date(self._purchase_date)
+    @property
+    def row(self) -> int: return self._row
 
-        # sp_rating
-        self._sp_rating = self.values_list[BondField.SP_Rating.value]
+    @property
+    def cusip(self) -> str: return str(self._value("cusip"))
 
-        # bid
-        _s = self.values_list[BondField.Bid.value]
-        if _s.__contains__("N/A"): _s = _s = "0.0"
-        self._bid = float(_s)
+    @property
+    def description(self) -> str: return str(self._value("description"))
 
-        # ask
-        _s = self.values_list[BondField.Ask.value]
-        if _s.__contains__("N/A"): _s = _s = "0.0"
-        self._ask = float(_s)
+    @property
+    def coupon(self) -> float: return float(self._value("coupon"))
 
-        # yield_bid
-        _s = self.values_list[BondField.Yield_Bid.value]
-        if _s.__contains__("N/A"): _s = _s = "0.0"
-        self._yield_bid = float(_s)
+    @property
+    def maturity(self) -> str: return self.maturity_date
 
-        # ask_yield_worst
-        self._ask_yield_worst = float(self.values_list[BondField.Ask_Yield_Worst.value])
+    @property
+    def maturity_date(self) -> str:
+        return f"{self.maturity_month:02d}/{self.maturity_day_of_month:02d}/{self.maturity_year}"
 
-        # ask_yield_maturity
-        self._ask_yield_maturity = float(self.values_list[BondField.Ask_Yield_Maturity.value])
+    @property
+    def maturity_year(self) -> int: return int(self._value("maturity_year"))
 
-        # attributes
-        self._attributes = self.values_list[BondField.Attributes.value]
+    @property
+    def maturity_month(self) -> int: return int(self._value("maturity_month"))
 
-        # sp_rating
-        self._sp_rating = self.values_list[BondField.SP_Rating.value]
-        if self._sp_rating in K.Ratings: self._sp_rating_value = K.Ratings[self._sp_rating]
-        else: self._sp_rating_value = 0
+    @property
+    def maturity_day_of_month(self) -> int: return int(self._value("maturity_day_of_month"))
 
-        self._bid_value = self.clean_float(self.values_list[BondField.Bid.value])
-        self.yearly_bid = self.clean_float(self.values_list[BondField.Yield_Bid.value])
+    @property
+    def first_coupon_month(self) -> int:
+        mm = self.maturity_month
+        return mm - 6 if mm >= 7 else mm
 
-        # bid_quantity
-        _s = self.values_list[BondField.Quantity_Bid.value]
-        if _s in ["N/A(N/A)", " 0(N/A)"]: _s = "0(0)"
-        sp = _s.split('(')
-        self._bid_quantity = self.clean_int(sp[0])
+    @property
+    def purchase_month(self) -> int: return self._universe.purchase_month
 
-        # min_quantity_bid
-        self._min_quantity_bid = self.clean_int(sp[1][:-1])
+    @property
+    def purchase_date(self) -> str: return self._universe.purchase_date
 
-        # ask
-        self._ask = self.clean_float(self.values_list[BondField.Ask.value])
+    @property
+    def purchase_day_of_month(self) -> int: return self._universe.purchase_day_of_month
 
-        # ask_quantity
-        _s = self.values_list[BondField.Quantity_Ask.value]
-        sp = _s.split('(')
-        self._ask_quantity = self.clean_int(sp[0])
+    @property
+    def sp_rating(self) -> str: return str(self._value("sp_rating"))
 
-        # min_quantity_ask
-        self._min_quantity_ask = self.clean_int(sp[1][:-1])
+    @property
+    def rating(self): return self.sp_rating
 
-        self._ask_yield_worst = self.clean_float(self.values_list[BondField.Ask_Yield_Worst.value])
+    @property
+    def ask(self) -> float: return float(self._value("ask"))
 
-        # ask_yield_maturity
-        self._ask_yield_maturity = self.clean_float(self.values_list[BondField.Ask_Yield_Maturity.value])
+    @property
+    def price(self): return self.ask
 
-        # attributes
-        self._attributes = self.values_list[BondField.Attributes.value]
+    @property
+    def cash_flows(self): return self._universe.cash_flows(self._row)             # views of the universe's events
 
-        # ranking attributes
-        self._income_rank = 0
-        self._profit_rank = 0
-        self._composite_rank = 0
+    @property
+    def payment_schedule(self): return self._universe.payment_schedule(self._row)   # made from the events when asked
 
-        self._payment_schedule = self.make_payment_schedule()
-        self.calculate_profit()
+    @property
+    def profit(self) -> float: return float(self._value("profit"))                  # per 1000 bonds
 
-    # region ------------------------  properties ---------------------------------#
+    @property
+    def total_return_pretax(self) -> float: return float(self._value("total_return_pretax"))
+
+    @property
+    def total_return_posttax(self) -> float: return float(self._value("total_return_posttax"))
 
     @property
-    def is_callable(self) -> bool: return self._callable
+    def is_callable(self) -> bool: return bool(self._value("callable"))
     
     @property
-    def next_call_date(self) -> datetime: return self._next_call_date
+    def next_call_date(self) -> datetime.datetime | None:
+        _s = str(self._value("next_call_date"))
+        return datetime.datetime.strptime(_s, '%m/%d/%Y') if _s else None
     
     @property
-    def sp_rating_value(self) -> int: return self._sp_rating_value
+    def sp_rating_value(self) -> int: return int(self._value("sp_rating_value"))
     
     @property
-    def bid(self) -> float: return self._bid
+    def bid(self) -> float: return float(self._value("bid"))
     
     @property
-    def yield_bid(self) -> float: return self._yield_bid
+    def yield_bid(self) -> float: return float(self._value("yield_bid"))
     
     @property
-    def ask_yield_worst(self) -> float: return self._ask_yield_worst
+    def ask_yield_worst(self) -> float: return float(self._value("ask_yield_worst"))
     
     @property
-    def ask_yield_maturity(self) -> float: return self._ask_yield_maturity
+    def ask_yield_maturity(self) -> float: return float(self._value("ask_yield_maturity"))
 
     @property
-    def ask_quantity(self) -> int: return self._ask_quantity
+    def ask_quantity(self) -> int: return int(self._value("ask_quantity"))
 
     @property
-    def min_quantity_ask(self) -> int: return self._min_quantity_ask
+    def min_quantity_ask(self) -> int: return int(self._value("min_quantity_ask"))
 
     @property
-    def available(self) -> int: return self._ask_quantity
+    def available(self) -> int: return self.ask_quantity
 
     @property
-    def quantity_bid(self) -> int: return self._bid_quantity
+    def quantity_bid(self) -> int: return int(self._value("bid_quantity"))
 
     @property
-    def min_quantity_bid(self) -> int: return self._min_quantity_bid
+    def min_quantity_bid(self) -> int: return int(self._value("min_quantity_bid"))
     
     @property
-    def attributes(self) -> str: return self._attributes
+    def attributes(self) -> str: return str(self._value("attributes"))
 
     @property
-    def callable(self) -> bool: return self._callable
+    def callable(self) -> bool: return self.is_callable
 
     # ranking properties
     @property
-    def income_rank(self) -> int: return self._income_rank
+    def income_rank(self) -> int: return int(self._value("income_rank"))
 
-    def set_income_rank(self, value: int): self._income_rank = value
+    def set_income_rank(self, value: int): self._universe["income_rank"][self._row] = value
 
     @property
-    def profit_rank(self) -> int: return self._profit_rank
+    def profit_rank(self) -> int: return int(self._value("profit_rank"))
 
-    def set_profit_rank(self, value: int): self._profit_rank = value
+    def set_profit_rank(self, value: int): self._universe["profit_rank"][self._row] = value
 
     @property
-    def composite_rank(self) -> int: return self._composite_rank
+    def composite_rank(self) -> int: return int(self._value("composite_rank"))
 
-    def set_composite_rank(self, value: int): self._composite_rank = value
+    def set_composite_rank(self, value: int): self._universe["composite_rank"][self._row] = value
 
     # endregion
 
@@ -226,11 +198,11 @@ class Bond(PaymentSource):
         return float(value)
 
     def get_purchase_month_and_day(self) -> tuple[int, int]:
-        return self._purchase_month, self._purchase_day_of_month
+        return self.purchase_month, self.purchase_day_of_month
 
     def total_interest(self, number_bonds: int) -> float:    # multiply by number of shares to get $ interest amount
-        total_percent = self._payment_schedule.sum()
-        return total_percent/100.0 * float(number_bonds)
+        total_percent = self._value("total_interest")
+        return float(total_percent/100.0 * float(number_bonds))
 
     def get_total_cost(self, number_of_shares: float) -> float:
         return self.ask / 100 * number_of_shares * 1000
@@ -244,57 +216,166 @@ class BondGroup:
     
     headings_list = []       # list of strings for column headings - unused
     
-    def __init__(self) -> None:
+    def __init__(self, universe: BondUniverse | None = None) -> None:
+        """
+            a group of bonds held as rows of a columnar BondUniverse
+                :param universe: the universe holding the bonds, all of its rows are in the group
+        """
         super().__init__()
-        self._bonds = []
-        self.best_income = []
-        self.best_profit = []
-        self.best_composite = []
+        self._universe: BondUniverse = universe if universe is not None else BondUniverse.empty()
+        self._rows: np.ndarray = np.arange(len(self._universe))
+        self._bonds: list[Bond] | None = None           # row views, made on first use of .bonds
+        self._index: BondIndex | None = None            # row indexes, made on first lookup
+        self._text_index: tuple[BondUniverse, UniverseTextIndex] | None = None   # made on first search
+        self._members: np.ndarray | None = None         # universe row => in the group, made on first search
+        self._cusip_trie = PrefixTrie()                 # cusips and issuer names of the universe, for completion,
+        self._issuer_trie = PrefixTrie()                # grown as bonds are loaded
+        self._add_to_tries(0)
+        self.best_income = RankedBonds(self._universe, [])
+        self.best_profit = RankedBonds(self._universe, [])
+        self.best_composite = RankedBonds(self._universe, [])
+        self._profile_rankings: dict[str, RankedBonds] = {}    # scoring profile name => its ranking, made on use
+        self._frontiers: dict[tuple[str, ...], RankedBonds] = {}  # skyline axes => the frontier, made on use
         self.excluded_bonds = []
+        self.load_errors = []
+        self._screen: BondScreen | None = None
         # self._profit = 0.0
 
     @property
-    def bonds(self) -> [Bond]: return self._bonds
+    def universe(self) -> BondUniverse: return self._universe
+
+    @property
+    def rows(self) -> np.ndarray: return self._rows
+
+    @property
+    def bonds(self) -> [Bond]:
+        if self._bonds is None: self._bonds = [self._universe.bond(row) for row in self._rows]
+        return self._bonds
 
     def item(self, index: int) -> Bond:
-        return self._bonds[index]
+        return self._universe.bond(self._rows[index])
     
-    def find_bond(self, cusip: str) -> Bond | None:  # sourcery skip: use-next
-        for bond in self._bonds:
-            if bond.cusip == cusip: return bond
-        return None
-        
-    def length(self) -> int: return len(self._bonds)
+    @property
+    def index(self) -> BondIndex:
+        """ cusip, maturity year, rating bucket and issuer => rows of the group's universe """
+        if self._index is None:
+            self._index = BondIndex()
+            self._add_to_index(self._rows)
+        return self._index
+
+    def _add_to_index(self, rows: np.ndarray) -> None:
+        u = self._universe
+        self._index.add_all(rows.tolist(), u["cusip"][rows], u["maturity_year"][rows].tolist(),
+                            u["sp_rating"][rows], u["description"][rows])
+
+    def _rows_changed(self) -> None:
+        self._bonds = None
+        self._index = None
+        self._members = None
+
+    @property
+    def text_index(self) -> UniverseTextIndex:
+        """ description words => rows of the whole universe, screened out bonds too, made again for a new universe """
+        if self._text_index is None or self._text_index[0] is not self._universe:
+            self._text_index = (self._universe, UniverseTextIndex(self._universe["description"]))
+        return self._text_index[1]
+
+    def search_descriptions(self, query: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+            the bonds of the universe whose descriptions match every word of the query, see TextIndex
+                :return: their rows, best match first, and whether each is in the group
+        """
+        rows = self.text_index.search(query)
+        if self._members is None:
+            self._members = np.zeros(len(self._universe), dtype=bool)
+            self._members[self._rows] = True
+        return rows, self._members[rows]
+
+    @property
+    def cusip_trie(self) -> PrefixTrie: return self._cusip_trie
+
+    @property
+    def issuer_trie(self) -> PrefixTrie: return self._issuer_trie
+
+    def _add_to_tries(self, start: int) -> None:
+        """ add the cusips and issuers of the universe's rows from start on to the tries, start 0 => a new universe """
+        if start == 0: self._cusip_trie, self._issuer_trie = PrefixTrie(), PrefixTrie()
+        for cusip in self._universe["cusip"][start:].tolist(): self._cusip_trie.add(cusip)
+        for issuer in dict.fromkeys(map(BondIndex.issuer, self._universe["description"][start:].tolist())):
+            if issuer: self._issuer_trie.add(issuer)
+
+    def find_bond(self, cusip: str) -> Bond | None:
+        row = self.index.find(cusip)
+        return self._universe.bond(row) if row is not None else None
+
+    def bonds_maturing_in(self, year: int) -> list[Bond]:
+        return [self._universe.bond(row) for row in self.index.by_maturity_year(year)]
+
+    def bonds_rated(self, rating_bucket: str) -> list[Bond]:
+        return [self._universe.bond(row) for row in self.index.by_rating(rating_bucket)]
+
+    def bonds_issued_by(self, issuer: str) -> list[Bond]:
+        return [self._universe.bond(row) for row in self.index.by_issuer(issuer)]
+
+    def length(self) -> int: return len(self._rows)
     
     def add_bond(self, bond: Bond) -> None:
-        self._bonds.append(bond)
-    
+        if bond.universe is self._universe:
+            self._rows = np.append(self._rows, bond.row)
+            self._bonds = None
+            if self._index is not None: self._add_to_index(self._rows[-1:])
+            if self._members is not None: self._members[bond.row] = True
+        else: self.add_universe(bond.universe.take([bond.row]))
+
+    def add_universe(self, universe: BondUniverse) -> None:
+        """ add every bond of the universe to the group """
+        start = len(self._universe)
+        self._universe = self._universe.append(universe) if start > 0 else universe
+        self._rows = np.concatenate((self._rows, np.arange(start, start + len(universe))))
+        self._rows_changed()
+        self._add_to_tries(start)
+
     def set_headings(self, headings: list) -> None: self.headings_list = headings
     
     def get_heading(self, bond_field: BondField) -> str: return self.headings_list[bond_field.value]
     
     def has_headings(self) -> bool: return len(self.headings_list) > 0
-    
+
+    def _sort_rows_descending(self, column: str) -> None:
+        # stable, so bonds with equal values keep their order as sorted(reverse=True) does
+        order = np.argsort(-self._universe[column][self._rows], kind="stable")
+        self._rows = self._rows[order]
+        self._rows_changed()
+
     def sort_via_ask_ytm(self):
-        self._bonds = sorted(self._bonds, key=lambda bond: bond.ask_yield_maturity, reverse=True)
+        self._sort_rows_descending("ask_yield_maturity")
     
     def sort_via_coupon(self):
-        self._bonds = sorted(self._bonds, key=lambda bond: bond.coupon, reverse=True)
+        self._sort_rows_descending("coupon")
     
-    def load_csv_file(self, file_name: str, max_year, exclusions: list) -> None:
-
-        def is_excluded(description: str, cusip: str) -> bool:
-            if not K.USE_EXCLUSIONS: return False
-            for exclusion in exclusions:
-                if len(exclusion) > 0 and exclusion in description:
-                    self.excluded_bonds.append(f"{cusip}:{description}:{exclusion}")
-                    if K.SHOW_EXCLUSIONS:
-                        print(f"{cusip} {description[:30]} excluded by [{exclusion}]   ")
-                    return True
-            return False
-
-        def protection_status_matches(bond_is_callable: bool) -> bool:
-            return False if K.CALL_PROTECTED and bond_is_callable else True
+    def load_filters(self, max_year, exclusions: list, filters: Sequence[RowFilter] = ()) -> list[RowFilter]:
+        """
+            the row filters for a load: exclusions, max_year and call protection as set in
+            constants.py, followed by any extra filters the caller pushes down into the read
+        """
+        load_filters = []
+        if K.USE_EXCLUSIONS: load_filters.append(RowFilter.excluding(exclusions, self.excluded_bonds))
+        load_filters.append(RowFilter.maturity_year_at_most(max_year))
+        if K.CALL_PROTECTED: load_filters.append(RowFilter.call_protected())
+        load_filters.extend(filters)
+        return load_filters
+
+    def load_csv_file(self, file_name: str, max_year, exclusions: list, purchase_date: str | None = None,
+                      filters: Sequence[RowFilter] = ()) -> None:
+        """
+            load the bonds of a Fidelity csv file that pass the load filters. The filters
+            run on the raw rows, only the bonds that pass are parsed and get a profit
+                :param file_name: the csv file
+                :param max_year: bonds maturing after this year are not loaded
+                :param exclusions: bonds with one of these in their description are not loaded if K.USE_EXCLUSIONS
+                :param purchase_date: date for the payment schedules, if None, use today's date
+                :param filters: extra filters, for screens of the caller's own
+        """
 
         def report_results():
             # print(f"bonds to consider has {extracted_count} remaining from total of {source_bond_group.length()}")
@@ -302,52 +383,126 @@ class BondGroup:
             # print(f"   bonds with no coupon = {no_coupon}")
             print(f"Loaded {self.length()} bonds")
 
-        def read_bond_csv(file_path: str) -> list[list[str]]:
-            """
-                Reads a csv file and returns a list of bond
-                property lists
-                    :param file_path: location of .csv file
-                    :return:    list of property lists
-            """
-            with open(file_path, 'r') as csv_file:
-                csv_reader = csv.reader(csv_file, delimiter=',')
-                theList = list(csv_reader)
-                theList.pop(0)                                      # remove the header
-                culled_list = []
-                for row in theList:
-                    try:
-                        cusip = row[0]
-                        # sometimes cusip is of form  ="ccccccccc"
-                        if cusip.startswith("="): row[0] = cusip[2:-1]
-                        culled_list.append(row)
-                    except Exception:           # exception when we hit junk at end of .csf file
-                        if not culled_list: traceback.format_exc()
-                        break
-                print(len(culled_list))
-                return culled_list
-
-        main_bonds = read_bond_csv(file_name)
-        print(f"Loaded {len(main_bonds)} bonds from bond csv file")
-        for row in main_bonds:
-            try:
-                newBond = Bond(row)
-                if not is_excluded(newBond.description, newBond.cusip) and newBond.maturity_year <= max_year:
-                    if protection_status_matches(newBond.callable):
-                        self.add_bond(newBond)
-
-            except Exception as e:
-                traceback.format_exc()
-                print(f"Exception reading bond {e} {row} ")
-                # report_results()
-                return
+        loader = BondCsvLoader(file_name, purchase_date)
+        universe = loader.load(self.load_filters(max_year, exclusions, filters))
+        print(f"Loaded {loader.row_count} bonds from bond csv file")
+        self.load_errors.extend(loader.errors)
+        for error in loader.errors: print(f"Error reading bond {error}")
 
+        self.add_universe(universe)
         report_results()
 
+    def load_screened_csv_file(self, file_name: str, max_year, exclusions: list, purchase_date: str | None = None,
+                               filters: Sequence[RowFilter] = ()) -> None:
+        """
+            load every bond of the csv file, apart from those failing the extra filters, and
+            screen them with a BondScreen made from max_year, exclusions and constants.py.
+            The group holds the bonds passing the screen, the screen can be changed later
+            without reading the file again - see apply_screen
+        """
+        loader = BondCsvLoader(file_name, purchase_date)
+        universe = loader.load(filters)
+        print(f"Loaded {loader.row_count} bonds from bond csv file")
+        self.load_errors.extend(loader.errors)
+        for error in loader.errors: print(f"Error reading bond {error}")
+
+        self._universe = universe
+        self._add_to_tries(0)
+        self._screen = BondScreen(universe, max_year, exclusions)
+        self.apply_screen(rank=False)
+        print(f"Loaded {self.length()} bonds")
+
+    @property
+    def screen(self) -> BondScreen | None: return self._screen
+
+    def apply_screen(self, rank: bool = True) -> None:
+        """ make the group the bonds of the universe that pass the screen, and rank them """
+        self._rows = self._screen.rows
+        self._rows_changed()
+        self.excluded_bonds = self._screen.excluded_bonds
+        if rank: self.make_ranking_lists()
+
+    def load_cached_csv_file(self, file_name: str, max_year, exclusions: list, filters: Sequence[RowFilter] = ()) -> bool:
+        """
+            load, screen and rank the bonds of the csv file, or take them from the on-disk cache
+            when neither the file nor the settings have changed since they were cached
+                :return: True on a warm start from the cache, False when the file was parsed
+        """
+        purchase_date = datetime.datetime.now().strftime("%m/%d/%Y")
+        settings = UniverseCache.current_settings(max_year, exclusions, purchase_date)
+        settings["filters"] = [row_filter.name for row_filter in filters]
+        cache = UniverseCache(file_name, settings)
+        cached = cache.load()
+        if cached is not None:
+            arrays, data = cached
+            self.restore(arrays, data)
+            print(f"Loaded {self.length()} bonds from cache")
+            return True
+
+        self.load_screened_csv_file(file_name, max_year, exclusions, purchase_date, filters)
+        self.make_ranking_lists()
+        try:
+            cache.save(*self.snapshot())
+        except OSError as e:
+            print(f"Could not write bond cache: {e}")
+        return False
+
+    def snapshot(self) -> tuple[dict[str, np.ndarray], dict]:
+        """ the group as arrays and metadata, the form UniverseCache stores """
+        arrays = {f"column_{name}": column for name, column in self._universe.columns.items()}
+        arrays["rows"] = self._rows
+        data = {"purchase_date": self._universe.purchase_date, "excluded_bonds": self.excluded_bonds}
+        if self._screen is not None:
+            screen_arrays, data["screen"] = self._screen.snapshot()
+            arrays.update(screen_arrays)
+        return arrays, data
+
+    def restore(self, arrays: dict[str, np.ndarray], data: dict) -> None:
+        """ replace the group's contents with a snapshot """
+        columns = {name[len("column_"):]: array for name, array in arrays.items() if name.startswith("column_")}
+        self._universe = BondUniverse(columns, data["purchase_date"])
+        self._rows = np.asarray(arrays["rows"])
+        self._rows_changed()
+        self._add_to_tries(0)
+        self.excluded_bonds = list(data["excluded_bonds"])
+        if "screen" in data: self._screen = BondScreen.restore(self._universe, arrays, data["screen"])
+        self.make_ranked_views()
+
     def make_ranking_lists(self) -> None:
         self.rank_bonds()
-        self.best_income: list[Bond] = sorted(self.bonds, key=lambda bond: bond.income_rank)
-        self.best_profit: list[Bond] = sorted(self.bonds, key=lambda bond: bond.profit_rank)
-        self.best_composite: list[Bond] = sorted(self.bonds, key=lambda bond: bond.composite_rank)
+        self.make_ranked_views()
+
+    def make_ranked_views(self) -> None:
+        """ best_income, best_profit and best_composite from the rank columns, ordered as they are used """
+        for name, column in (("best_income", "income_rank"), ("best_profit", "profit_rank"),
+                             ("best_composite", "composite_rank")):
+            setattr(self, name, RankedBonds(self._universe, self._rows, self._universe[column][self._rows]))
+        self._profile_rankings = {}
+        self._frontiers = {}
+
+    def frontier(self, axes: Sequence[str] | None = None) -> RankedBonds:
+        """
+            the bonds no other bond of the group beats on all the axes, best composite rank first
+                :param axes: 2 or 3 scoring features, None => K.SKYLINE_AXES
+        """
+        axes = tuple(axes or K.SKYLINE_AXES)
+        if axes not in self._frontiers:
+            rows = skyline_rows(self._universe, self._rows, axes)
+            self._frontiers[axes] = RankedBonds(self._universe, rows, self._universe["composite_rank"][rows])
+        return self._frontiers[axes]
+
+    def rank_profiles(self, profile_names: list[str]) -> None:
+        """ rank the group by each of the named scoring profiles, scored together in one pass """
+        missing = [name for name in dict.fromkeys(profile_names) if name not in self._profile_rankings]
+        if not missing: return
+        profile_ranks = Scorer(self._universe, self._rows).profile_ranks([ScoringProfile.named(name) for name in missing])
+        for name, ranks in profile_ranks.items():
+            self._profile_rankings[name] = RankedBonds(self._universe, self._rows, ranks)
+
+    def ranked_by(self, profile_name: str) -> RankedBonds:
+        """ the group best first by the named scoring profile of K.ScoringProfiles """
+        self.rank_profiles([profile_name])
+        return self._profile_rankings[profile_name]
 
     @staticmethod
     def print_header(pdf, title):
@@ -363,7 +518,7 @@ class BondGroup:
         pdf.cell(0, 5, f"  cusip        description                                 maturity       callable    ask yield  rating   {_ic}")
         pdf.ln()
         count = 0
-        for qbond in self._bonds:
+        for qbond in self.bonds:
             count += 1
             if count > max_lines: break
             _m = qbond.maturity_date.strftime("%m/%d/%Y")
@@ -375,19 +530,12 @@ class BondGroup:
         self.print_average_ask_yield(pdf, max_lines)
 
     def rank_bonds(self) -> None:
-        ScoreList.rank_a_list(self, value=lambda be: be.yearly_income,
-                              assign=lambda be, rank: be.set_income_rank(rank))
-
-        ScoreList.rank_a_list(self, value=lambda be: be.profit,
-                              assign=lambda be, rank: be.set_profit_rank(rank))
-
-        for bex in self.bonds:
-            bex.set_composite_rank(bex.income_rank + bex.profit_rank)
+        Scorer(self._universe, self._rows).rank_rows()
 
     def print_average_ask_yield(self, pdf, max_lines: int) -> None:
         count = 0
         ask_sum = 0.0
-        for bond in self._bonds:
+        for bond in self.bonds:
             count += 1
             if count > max_lines: break
             ask_sum += bond.ask_yield_maturity
@@ -420,38 +568,3 @@ class BondIterator:
         self._index += 1
         return result
 # endregion
-
-# region ------------------------  class  ScoreList ---------------------------------#
-
-
-class ScoreList:
-
-    def __init__(self) -> None:
-        super().__init__()
-        self._list_of_scores = {}
-
-    @property
-    def list_of_scores(self) -> dict: return self._list_of_scores
-
-    def try_to_add(self, score: float):
-        if score not in self._list_of_scores.keys():  self._list_of_scores[score] = 0
-
-    def assign_ranks_to_scores(self):
-        sorted_keys = sorted(self._list_of_scores.keys(), reverse=True)
-        for theRank, key in enumerate(sorted_keys, start=1):
-            self._list_of_scores[key] = theRank
-
-    def score_to_rank(self, score: float):
-        return self._list_of_scores[score]
-
-    @classmethod
-    def rank_a_list(cls, inlist: BondGroup, value=None, assign=None):
-        score_list = ScoreList()
-        for bond in inlist:
-            score_list.try_to_add(value(bond))
-        score_list.assign_ranks_to_scores()
-        for bond in inlist:
-            rank = score_list.score_to_rank(value(bond))
-            assign(bond, rank)
-
-# endregion
@@ -0,0 +1,95 @@
+from typing import Hashable, Iterable
+
+# region ------------------------  class  BondIndex ---------------------------------#
+
+
+class BondIndex:
+    """
+        Hash indexes over a collection of bonds: cusip => entry, and the secondary
+        indexes maturity year, rating bucket and issuer => entries. An entry is
+        whatever the owner uses to find a bond - a row of a BondUniverse for a
+        BondGroup, the PortfolioItem itself for a Portfolio. The owner adds and
+        removes entries as its contents change, so lookups never scan the collection.
+
+        Each index keeps its entries in the order they were added, so when a cusip
+        appears more than once the entry found is the first one, as a scan finds it.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._by_cusip: dict[str, dict[Hashable, None]] = {}
+        self._by_maturity_year: dict[int, dict[Hashable, None]] = {}
+        self._by_rating: dict[str, dict[Hashable, None]] = {}
+        self._by_issuer: dict[str, dict[Hashable, None]] = {}
+        self._keys: dict[Hashable, tuple[str, int, str, str]] = {}    # entry => its index keys, for remove
+
+    @staticmethod
+    def rating_bucket(sp_rating: str) -> str:
+        """ the letter grade of an S&P rating, 'AA+' and 'AA-' are both 'AA' """
+        return sp_rating.rstrip("+-") or "NR"
+
+    @staticmethod
+    def issuer(description: str) -> str:
+        """ the issuer name, the first 20 characters of a Fidelity bond description """
+        return description[:20].strip()
+
+    # region ------------------------  maintenance ---------------------------------#
+
+    def add(self, entry: Hashable, cusip: str, maturity_year: int, sp_rating: str, description: str) -> None:
+        if entry in self._keys: return
+        keys = (cusip, int(maturity_year), self.rating_bucket(sp_rating), self.issuer(description))
+        self._keys[entry] = keys
+        for index, key in zip(self._indexes, keys):
+            index.setdefault(key, {})[entry] = None
+
+    def add_all(self, entries: Iterable[Hashable], cusips: Iterable[str], maturity_years: Iterable[int],
+                sp_ratings: Iterable[str], descriptions: Iterable[str]) -> None:
+        for entry, cusip, year, rating, description in zip(entries, cusips, maturity_years, sp_ratings, descriptions):
+            self.add(entry, str(cusip), year, str(rating), str(description))
+
+    def remove(self, entry: Hashable) -> None:
+        keys = self._keys.pop(entry, None)
+        if keys is None: return
+        for index, key in zip(self._indexes, keys):
+            entries = index[key]
+            del entries[entry]
+            if not entries: del index[key]
+
+    def clear(self) -> None:
+        self.__init__()
+
+    @property
+    def _indexes(self) -> tuple[dict, dict, dict, dict]:
+        return self._by_cusip, self._by_maturity_year, self._by_rating, self._by_issuer
+
+    # endregion
+
+    # region ------------------------  lookup ---------------------------------#
+
+    def __len__(self) -> int: return len(self._keys)
+
+    def __contains__(self, cusip: str) -> bool: return cusip in self._by_cusip
+
+    def find(self, cusip: str) -> Hashable | None:
+        """ the first entry added with this cusip, or None """
+        entries = self._by_cusip.get(cusip)
+        return next(iter(entries)) if entries else None
+
+    def by_maturity_year(self, year: int) -> list[Hashable]: return list(self._by_maturity_year.get(year, ()))
+
+    def by_rating(self, rating_bucket: str) -> list[Hashable]: return list(self._by_rating.get(rating_bucket, ()))
+
+    def by_issuer(self, issuer: str) -> list[Hashable]: return list(self._by_issuer.get(issuer, ()))
+
+    @property
+    def maturity_years(self) -> list[int]: return sorted(self._by_maturity_year)
+
+    @property
+    def ratings(self) -> list[str]: return list(self._by_rating)
+
+    @property
+    def issuers(self) -> list[str]: return list(self._by_issuer)
+
+    # endregion
+
+# endregion
@@ -0,0 +1,336 @@
+import contextlib
+import csv
+import datetime
+import gc
+import itertools
+from typing import Iterable, Iterator, Sequence
+import numpy as np
+import financial_utilities.constants as K
+from financial_utilities.bond_universe import BondUniverse, BondField
+from financial_utilities.exclusion_matcher import ExclusionMatcher
+
+# region ------------------------  field parsers ---------------------------------#
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """ every object made while loading is kept, so collecting during the load only costs time """
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_was_enabled: gc.enable()
+
+
+def clean_float(value: str) -> float:
+    if "N/A" in value or "--" in value: return 0.0
+    return float(value)
+
+
+def parse_quantity(value: str) -> tuple[int, int]:
+    """ 1,500(10) => quantity 1500, minimum 10.  N/A counts as 0 """
+    quantity, _, minimum = value.replace(",", "").partition("(")
+    minimum = minimum.rstrip(")")
+    return 0 if "N/A" in quantity else int(quantity), 0 if "N/A" in minimum else int(minimum)
+
+
+def parse_date(value: str) -> tuple[int, int, int, int]:
+    """ mm/dd/yyyy => month, day, year, day ordinal """
+    date = datetime.datetime.strptime(value.strip(), '%m/%d/%Y')
+    return date.month, date.day, date.year, date.toordinal()
+
+
+def parse_call_date(value: str) -> tuple[int, int, int, int]:
+    """ as parse_date, with N/A and -- (no next call date) => all 0 """
+    if "N/A" in value or "--" in value: return 0, 0, 0, 0
+    return parse_date(value)
+
+# endregion
+
+# region ------------------------  class  LoadError ---------------------------------#
+
+
+class LoadError:
+    """ a row of the bond csv file that could not be loaded """
+
+    def __init__(self, line_number: int, field: str, value: str, row: list[str]) -> None:
+        super().__init__()
+        self.line_number = line_number
+        self.field = field
+        self.value = value
+        self.row = row
+
+    def __str__(self):
+        return f"line {self.line_number}: bad {self.field} [{self.value}] in {self.row}"
+
+# endregion
+
+# region ------------------------  class  RowFilter ---------------------------------#
+
+
+class RowFilter:
+    """
+        A cheap test on the raw strings of a bond csv row. Filters are pushed down
+        into BondCsvLoader and applied while the file is streamed, so a row that
+        fails one is never parsed and never gets a payment schedule or a profit.
+        A row whose field is too malformed to test passes, the parser reports it.
+        The name identifies the filter, it is part of the bond cache key.
+    """
+
+    def __init__(self, name: str, test) -> None:
+        """
+            :param name: description of the filter and its settings
+            :param test: row => True to keep the row
+        """
+        super().__init__()
+        self.name = name
+        self.test = test
+
+    def __call__(self, row: list[str]) -> bool:
+        try:
+            return self.test(row)
+        except (ValueError, IndexError):
+            return True
+
+    def __repr__(self): return f"RowFilter({self.name})"
+
+    @staticmethod
+    def cusip(row: list[str]) -> str:
+        _s = row[BondField.Cusip.value]
+        return _s[2:-1] if _s.startswith("=") else _s
+
+    @classmethod
+    def maturity_year_at_most(cls, max_year: int) -> 'RowFilter':
+        return cls(f"maturity_year<={max_year}",
+                   lambda row: int(row[BondField.Maturity_Date.value].strip()[-4:]) <= max_year)
+
+    @classmethod
+    def call_protected(cls) -> 'RowFilter':
+        """ keep bonds that are not callable - a next call date within a year of maturity doesn't count """
+
+        def day(date: str) -> int:
+            month, day_of_month, year = date.strip().split("/")
+            return datetime.date(int(year), int(month), int(day_of_month)).toordinal()
+
+        def is_protected(row: list[str]) -> bool:
+            next_call = row[BondField.Next_Call_Date.value]
+            if "N/A" in next_call or "--" in next_call: return True
+            return day(row[BondField.Maturity_Date.value]) - day(next_call) <= 365
+
+        return cls("call_protected", is_protected)
+
+    @classmethod
+    def rating_at_least(cls, sp_rating: str) -> 'RowFilter':
+        """ keep bonds rated sp_rating or better, unknown ratings count as 0 """
+        floor = K.Ratings[sp_rating]
+        return cls(f"sp_rating>={sp_rating}",
+                   lambda row: K.Ratings.get(row[BondField.SP_Rating.value], 0) >= floor)
+
+    @classmethod
+    def excluding(cls, exclusions: list[str], excluded: list[str] | None = None,
+                  whole_word: bool | None = None, ignore_case: bool | None = None) -> 'RowFilter':
+        """
+            drop bonds whose description contains one of the exclusions
+                :param exclusions: text that excludes a bond, empty entries are ignored
+                :param excluded: when given, "cusip:description:exclusion" is appended for each dropped bond
+                :param whole_word: exclusions match whole words only, None => K.EXCLUDE_WHOLE_WORDS
+                :param ignore_case: exclusions match in any case, None => K.EXCLUDE_IGNORE_CASE
+        """
+        whole_word = K.EXCLUDE_WHOLE_WORDS if whole_word is None else whole_word
+        ignore_case = K.EXCLUDE_IGNORE_CASE if ignore_case is None else ignore_case
+        matcher = ExclusionMatcher(exclusions, whole_word, ignore_case)
+
+        def is_not_excluded(row: list[str]) -> bool:
+            description = row[BondField.Description.value]
+            exclusion = matcher.first_match(description)
+            if exclusion is None: return True
+            cusip = cls.cusip(row)
+            if excluded is not None: excluded.append(f"{cusip}:{description}:{exclusion}")
+            if K.SHOW_EXCLUSIONS:
+                print(f"{cusip} {description[:30]} excluded by [{exclusion}]   ")
+            return False
+
+        return cls(f"excluding={matcher.exclusions} whole_word={whole_word} ignore_case={ignore_case}", is_not_excluded)
+
+# endregion
+
+# region ------------------------  class  BondCsvLoader ---------------------------------#
+
+
+class BondCsvLoader:
+    """
+        Loads a Fidelity_FixedIncome_SearchResults.csv file straight into the typed
+        columns of a BondUniverse. The file is read once, the rows are transposed
+        into raw string columns and every field is then parsed for all bonds at
+        once with numpy. A row with a bad field is reported in errors and left out,
+        it does not stop the load.
+    """
+
+    def __init__(self, file_path: str, purchase_date: str | None = None) -> None:
+        super().__init__()
+        self._file_path = file_path
+        self._purchase_date = purchase_date
+        self._errors: list[LoadError] = []
+        self._rows: list[list[str]] = []
+        self._line_numbers: list[int] = []
+        self._bad = None
+        self._row_count = 0
+
+    @property
+    def errors(self) -> list[LoadError]: return self._errors
+
+    @property
+    def row_count(self) -> int: return self._row_count              # rows read, before filtering
+
+    @property
+    def kept_count(self) -> int: return len(self._rows)             # rows that passed the filters
+
+    # region ------------------------  reading ---------------------------------#
+
+    def stream_rows(self) -> Iterator[list[str]]:
+        """
+            yield the bond rows of the csv file one at a time. The header is skipped
+            and the stream stops at the first empty row, Fidelity appends a disclaimer after it
+        """
+        with open(self._file_path, 'r') as csv_file:
+            csv_reader = csv.reader(csv_file, delimiter=',')
+            next(csv_reader, None)                                  # remove the header
+            yield from itertools.takewhile(bool, csv_reader)       # junk follows the first empty row
+
+    def read_rows(self, filters: Sequence[RowFilter] = ()) -> list[list[str]]:
+        """
+            read the rows that pass every filter
+                :param filters: applied in order to the raw rows, the first failure drops the row
+                :return: the kept rows
+        """
+        with gc_paused():
+            # Fidelity writes one line per row, so a row's line number is its index + 2 (after the header)
+            self.add_rows(self.stream_rows(), first_line_number=2, filters=filters)
+        return self._rows
+
+    def add_rows(self, rows: Iterable[list[str]], first_line_number: int = 1, filters: Sequence[RowFilter] = ()) -> None:
+        """ keep the rows to be parsed that pass every filter, rows that are too short are errors """
+        for line_number, row in enumerate(rows, start=first_line_number):
+            self._row_count += 1
+            if len(row) < len(BondField):
+                self._errors.append(LoadError(line_number, "row", f"{len(row)} fields", row))
+            elif all(row_filter(row) for row_filter in filters):
+                self._rows.append(row)
+                self._line_numbers.append(line_number)
+
+    @classmethod
+    def from_rows(cls, rows: list[list[str]], purchase_date: str | None = None) -> 'BondCsvLoader':
+        """ a loader for property lists that are already in memory, errors report their index + 1 as line """
+        loader = cls("", purchase_date)
+        loader.add_rows(rows)
+        return loader
+
+    def load(self, filters: Sequence[RowFilter] = ()) -> BondUniverse:
+        """
+            read and parse the csv file
+                :param filters: row filters pushed down into the read, see read_rows
+                :return: a universe holding every kept bond that parsed cleanly, derived columns calculated
+        """
+        self.read_rows(filters)
+        return self.make_universe()
+
+    def make_universe(self) -> BondUniverse:
+        """ parse the rows that have been read into a universe, derived columns calculated """
+        universe = BondUniverse(self.parse_columns(self._rows), self._purchase_date)
+        universe.calculate_derived_columns()
+        return universe
+
+    # endregion
+
+    # region ------------------------  column parsing ---------------------------------#
+
+    def parse_columns(self, rows: list[list[str]]) -> dict[str, np.ndarray]:
+        """
+            parse raw rows into BondUniverse columns. Rows with a bad field are
+            recorded in errors and removed from every column
+        """
+        with gc_paused():
+            return self._parse_columns(rows)
+
+    def _parse_columns(self, rows: list[list[str]]) -> dict[str, np.ndarray]:
+        self._bad = np.zeros(len(rows), dtype=bool)
+        raw = list(zip(*rows)) if rows else [()] * len(BondField)
+
+        columns = {}
+        columns["cusip"] = np.array([_s[2:-1] if _s.startswith("=") else _s     # sometimes cusip is ="cusip"
+                                     for _s in raw[BondField.Cusip.value]], dtype="U9")
+        columns["description"] = np.array(raw[BondField.Description.value], dtype=str)
+        columns["coupon"] = self.parse_column(raw, BondField.Coupon, float, np.float64)
+
+        maturity = self.parse_column(raw, BondField.Maturity_Date, parse_date, np.int64, width=4)
+        columns["maturity_month"], columns["maturity_day_of_month"], columns["maturity_year"] = maturity[:, :3].T
+
+        # if the next call date is within a year of maturity, don't consider it callable
+        call = self.parse_column(raw, BondField.Next_Call_Date, parse_call_date, np.int64, width=4)
+        columns["next_call_date"] = np.where(call[:, 3] > 0, raw[BondField.Next_Call_Date.value], "")
+        columns["callable"] = (call[:, 3] > 0) & (maturity[:, 3] - call[:, 3] > 365)
+
+        columns["sp_rating"] = np.array(raw[BondField.SP_Rating.value], dtype=str)
+        columns["sp_rating_value"] = self.parse_column(raw, BondField.SP_Rating, lambda r: K.Ratings.get(r, 0), np.int16)
+
+        for name, bond_field in (("bid", BondField.Bid), ("ask", BondField.Ask), ("yield_bid", BondField.Yield_Bid),
+                                 ("ask_yield_worst", BondField.Ask_Yield_Worst),
+                                 ("ask_yield_maturity", BondField.Ask_Yield_Maturity)):
+            columns[name] = self.parse_column(raw, bond_field, clean_float, np.float64)
+
+        bid = self.parse_column(raw, BondField.Quantity_Bid, parse_quantity, np.int32, width=2)
+        ask = self.parse_column(raw, BondField.Quantity_Ask, parse_quantity, np.int32, width=2)
+        columns["bid_quantity"], columns["min_quantity_bid"] = bid.T
+        columns["ask_quantity"], columns["min_quantity_ask"] = ask.T
+        columns["attributes"] = np.array(raw[BondField.Attributes.value], dtype=str)
+
+        if self._bad.any():
+            good = ~self._bad
+            columns = {name: column[good] for name, column in columns.items()}
+        return columns
+
+    def parse_column(self, raw: list[tuple], bond_field: BondField, parse, dtype, width: int = 1) -> np.ndarray:
+        """
+            parse a raw string column in one batch. Each distinct string is parsed
+            only once - prices, dates, quantities and ratings repeat heavily - and
+            the results are then spread over the rows with a single lookup pass.
+            Rows whose value fails to parse are recorded as errors and marked bad.
+                :param raw: the raw string columns
+                :param bond_field: the field to parse
+                :param parse: str => value, or a tuple of width values
+                :param dtype: dtype of the result
+                :param width: number of values parse returns per string
+                :return: array of length rows, or rows X width when width > 1
+        """
+        values = raw[bond_field.value]
+        if parse in (float, clean_float):
+            try:                    # prices and yields are usually all clean, then one conversion pass is enough
+                return np.fromiter(map(float, values), dtype, len(values))
+            except ValueError:
+                pass
+
+        distinct = {}                                               # value => index of its parsed result
+        parsed = []
+        bad_values = set()
+        for value in set(values):
+            try:
+                parsed.append(parse(value))
+            except (ValueError, IndexError):
+                parsed.append((0,) * width if width > 1 else 0)
+                bad_values.add(value)
+            distinct[value] = len(parsed) - 1
+
+        if bad_values:
+            for index, value in enumerate(values):
+                if value in bad_values and not self._bad[index]:
+                    self._errors.append(LoadError(self._line_numbers[index], bond_field.name, value, self._rows[index]))
+                    self._bad[index] = True
+
+        table = np.array(parsed, dtype=dtype).reshape(len(parsed), width)
+        result = table[np.fromiter(map(distinct.__getitem__, values), np.intp, len(values))]
+        return result[:, 0] if width == 1 else result
+
+    # endregion
+
+# endregion
@@ -0,0 +1,146 @@
+import numpy as np
+import financial_utilities.constants as K
+from financial_utilities.bond_universe import BondUniverse
+from financial_utilities.exclusion_matcher import ExclusionMatcher
+
+# region ------------------------  class  BondScreen ---------------------------------#
+
+
+class BondScreen:
+    """
+        The bond load filters - max maturity year, call protection and exclusions -
+        as boolean masks over a full, unfiltered BondUniverse. Changing a setting
+        only recomputes a mask, so bonds can be re-screened without reading the
+        csv file again. For each bond the screen keeps the exclusion that excludes
+        it; adding or removing an exclusion only matches the bonds it can change.
+    """
+
+    def __init__(self, universe: BondUniverse, max_year: int, exclusions: list[str],
+                 use_exclusions: bool | None = None, call_protected: bool | None = None) -> None:
+        """
+            :param universe: all the bonds that were loaded
+            :param max_year: bonds maturing after this year are screened out
+            :param exclusions: bonds with one of these in their description are screened out when use_exclusions
+            :param use_exclusions: None => K.USE_EXCLUSIONS
+            :param call_protected: screen out callable bonds, None => K.CALL_PROTECTED
+        """
+        super().__init__()
+        self._universe = universe
+        self._max_year = max_year
+        self._exclusions = [exclusion for exclusion in exclusions if len(exclusion) > 0]
+        self._use_exclusions = K.USE_EXCLUSIONS if use_exclusions is None else use_exclusions
+        self._call_protected = K.CALL_PROTECTED if call_protected is None else call_protected
+        self._excluded_by: np.ndarray | None = None     # row => index of the exclusion that excludes it, or -1
+
+    # region ------------------------  settings ---------------------------------#
+
+    @property
+    def universe(self) -> BondUniverse: return self._universe
+
+    @property
+    def max_year(self) -> int: return self._max_year
+
+    @max_year.setter
+    def max_year(self, year: int): self._max_year = year
+
+    @property
+    def call_protected(self) -> bool: return self._call_protected
+
+    @call_protected.setter
+    def call_protected(self, value: bool): self._call_protected = value
+
+    @property
+    def use_exclusions(self) -> bool: return self._use_exclusions
+
+    @use_exclusions.setter
+    def use_exclusions(self, value: bool): self._use_exclusions = value
+
+    @property
+    def exclusions(self) -> list[str]: return list(self._exclusions)
+
+    def add_exclusion(self, exclusion: str) -> int:
+        """ :return: the number of bonds the new exclusion excludes """
+        if len(exclusion) == 0 or exclusion in self._exclusions: return 0
+        self._exclusions.append(exclusion)
+        if self._excluded_by is None: return int((self.excluded_by == len(self._exclusions) - 1).sum())
+        # the new exclusion is last in the list, so it can only exclude bonds nothing else excludes
+        rows = np.flatnonzero(self._excluded_by < 0)
+        found = self._match(rows, [exclusion])
+        self._excluded_by[rows[found >= 0]] = len(self._exclusions) - 1
+        self._show_exclusions(rows[found >= 0])
+        return int((found >= 0).sum())
+
+    def remove_exclusion(self, exclusion: str) -> bool:
+        """ :return: False if it was not an exclusion """
+        if exclusion not in self._exclusions: return False
+        index = self._exclusions.index(exclusion)
+        del self._exclusions[index]
+        if self._excluded_by is None: return True
+        # bonds it excluded may be excluded by one lower in the list, later exclusions move up one
+        rows = np.flatnonzero(self._excluded_by == index)
+        self._excluded_by[self._excluded_by > index] -= 1
+        self._excluded_by[rows] = self._match(rows, self._exclusions)
+        return True
+
+    # endregion
+
+    # region ------------------------  masks ---------------------------------#
+
+    @property
+    def excluded_by(self) -> np.ndarray:
+        if self._excluded_by is None:
+            self._excluded_by = self._match(np.arange(len(self._universe)), self._exclusions)
+            self._show_exclusions(np.flatnonzero(self._excluded_by >= 0))
+        return self._excluded_by
+
+    def _match(self, rows: np.ndarray, exclusions: list[str]) -> np.ndarray:
+        """ index into exclusions of the exclusion that excludes each row, or -1 """
+        matcher = ExclusionMatcher(exclusions, K.EXCLUDE_WHOLE_WORDS, K.EXCLUDE_IGNORE_CASE)
+        if len(matcher) == 0: return np.full(len(rows), -1, dtype=np.int32)
+        descriptions = self._universe["description"][rows]
+        return np.fromiter((matcher.first_index(str(description)) for description in descriptions),
+                           np.int32, len(rows))
+
+    def _show_exclusions(self, rows: np.ndarray) -> None:
+        if not (K.SHOW_EXCLUSIONS and self._use_exclusions): return
+        for row in rows:
+            print(f"{self._universe['cusip'][row]} {self._universe['description'][row][:30]} "
+                  f"excluded by [{self._exclusions[self._excluded_by[row]]}]   ")
+
+    @property
+    def mask(self) -> np.ndarray:
+        """ True for every bond of the universe that passes the screen """
+        mask = self._universe["maturity_year"] <= self._max_year
+        if self._call_protected: mask &= ~self._universe["callable"]
+        if self._use_exclusions: mask &= self.excluded_by < 0
+        return mask
+
+    @property
+    def rows(self) -> np.ndarray: return np.flatnonzero(self.mask)
+
+    @property
+    def excluded_bonds(self) -> list[str]:
+        """ "cusip:description:exclusion" for every excluded bond, as BondGroup.excluded_bonds """
+        if not self._use_exclusions: return []
+        cusips, descriptions = self._universe["cusip"], self._universe["description"]
+        return [f"{cusips[row]}:{descriptions[row]}:{self._exclusions[self.excluded_by[row]]}"
+                for row in np.flatnonzero(self.excluded_by >= 0)]
+
+    # endregion
+
+    # region ------------------------  cache support ---------------------------------#
+
+    def snapshot(self) -> tuple[dict[str, np.ndarray], dict]:
+        return {"screen_excluded_by": self.excluded_by if self._use_exclusions else np.zeros(0, np.int32)}, \
+               {"max_year": self._max_year, "exclusions": self._exclusions,
+                "use_exclusions": self._use_exclusions, "call_protected": self._call_protected}
+
+    @classmethod
+    def restore(cls, universe: BondUniverse, arrays: dict[str, np.ndarray], data: dict) -> 'BondScreen':
+        screen = cls(universe, data["max_year"], data["exclusions"], data["use_exclusions"], data["call_protected"])
+        if data["use_exclusions"]: screen._excluded_by = np.array(arrays["screen_excluded_by"], dtype=np.int32)
+        return screen
+
+    # endregion
+
+# endregion
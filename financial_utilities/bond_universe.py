@@ -0,0 +1,205 @@
+import datetime
+import numpy as np
+import financial_utilities.constants as K
+from enum import Enum
+from financial_utilities.payment_schedules import universe_payment_schedules, universe_cash_flow_events, schedule_totals
+from financial_utilities.cash_flows import CashFlows
+
+# region BondFields enum
+
+"""
+    BondField is an enum that defines the fields in the bond csv file
+    that is downloaded from the Fidelity website. It represents the available
+    bonds that can be purchased matching the criteria in the bond screening
+    query
+"""
+
+
+class BondField(Enum):
+    Cusip = 0
+    State = 1
+    Description = 2
+    Coupon = 3
+    Maturity_Date = 4
+    Next_Call_Date = 5
+    Moody_Rating = 6
+    SP_Rating = 7
+    Bid = 8
+    Ask = 9
+    Yield_Bid = 10
+    Ask_Yield_Worst = 11
+    Ask_Yield_Maturity = 12
+    Quantity_Bid = 13
+    Quantity_Ask = 14
+    Attributes = 15
+    
+# endregion
+
+# region ------------------------  class  BondUniverse ---------------------------------#
+
+
+class BondUniverse:
+    """
+        BondUniverse is the columnar store behind BondGroup. Every field of the
+        Fidelity bond csv file is kept in its own typed numpy array, one entry per
+        bond, and a Bond is only a lightweight view of a row in these arrays.
+        Derived per 1000 bond values (total interest, returns, profit) and the
+        ranks are kept as columns too, so nothing is stored per Bond object.
+    """
+
+    # name, dtype  - "U" lets numpy size the string column to its longest value
+    COLUMNS = (
+        ("cusip", "U9"),
+        ("description", "U"),
+        ("coupon", np.float64),
+        ("maturity_year", np.int16),
+        ("maturity_month", np.int8),
+        ("maturity_day_of_month", np.int8),
+        ("next_call_date", "U10"),             # "" when the bond has no next call date
+        ("callable", np.bool_),
+        ("sp_rating", "U"),
+        ("sp_rating_value", np.int16),
+        ("bid", np.float64),
+        ("ask", np.float64),
+        ("yield_bid", np.float64),
+        ("ask_yield_worst", np.float64),
+        ("ask_yield_maturity", np.float64),
+        ("bid_quantity", np.int32),
+        ("min_quantity_bid", np.int32),
+        ("ask_quantity", np.int32),
+        ("min_quantity_ask", np.int32),
+        ("attributes", "U"),
+    )
+
+    DERIVED_COLUMNS = (
+        ("total_interest", np.float64),        # sum of the payment schedule - percent of par
+        ("total_return_pretax", np.float64),   # per 1000 bonds
+        ("total_return_posttax", np.float64),  # per 1000 bonds
+        ("profit", np.float64),                # per 1000 bonds
+        ("income_rank", np.int32),
+        ("profit_rank", np.int32),
+        ("composite_rank", np.int32),
+    )
+
+    def __init__(self, columns: dict, purchase_date: str | None = None) -> None:
+        """
+            create a universe from a dictionary of column arrays
+                :param columns: column name => array, one entry per bond. Missing derived columns are zeroed
+                :param purchase_date: the date the bonds would be purchased, if None, use today's date
+        """
+        super().__init__()
+        self._columns: dict[str, np.ndarray] = {}
+        for name, dtype in self.COLUMNS:
+            self._columns[name] = np.asarray(columns[name], dtype=dtype)
+        self._length = len(self._columns["cusip"])
+        for name, dtype in self.DERIVED_COLUMNS:
+            if name in columns: self._columns[name] = np.asarray(columns[name], dtype=dtype)
+            else: self._columns[name] = np.zeros(self._length, dtype=dtype)
+
+        self._cash_flow_events: tuple | None = None     # (row offsets, years, months, amounts), made on first use
+
+        self._purchase_date = purchase_date or datetime.datetime.now().strftime("%m/%d/%Y")
+        _s = self._purchase_date.split("/")
+        self._purchase_year = int(_s[2])
+        self._purchase_day_of_month = int(_s[1])
+        self._purchase_month = int(_s[0])
+
+    # region ------------------------  properties ---------------------------------#
+
+    @property
+    def columns(self) -> dict[str, np.ndarray]: return self._columns
+
+    @property
+    def purchase_date(self) -> str: return self._purchase_date
+
+    @property
+    def purchase_year(self) -> int: return self._purchase_year
+
+    @property
+    def purchase_month(self) -> int: return self._purchase_month
+
+    @property
+    def purchase_day_of_month(self) -> int: return self._purchase_day_of_month
+
+    def __getitem__(self, name: str) -> np.ndarray: return self._columns[name]
+
+    def __len__(self) -> int: return self._length
+
+    # endregion
+
+    # region ------------------------  construction ---------------------------------#
+
+    @classmethod
+    def empty(cls, purchase_date: str | None = None) -> 'BondUniverse':
+        return cls({name: [] for name, _ in cls.COLUMNS}, purchase_date)
+
+    def take(self, rows) -> 'BondUniverse':
+        """ return a new universe holding only the given rows (index array or boolean mask) """
+        return BondUniverse({name: column[rows] for name, column in self._columns.items()}, self._purchase_date)
+
+    def append(self, other: 'BondUniverse') -> 'BondUniverse':
+        """ return a new universe holding this universe's rows followed by the other's """
+        return BondUniverse({name: np.concatenate((column, other[name])) for name, column in self._columns.items()},
+                            self._purchase_date)
+
+    # endregion
+
+    # region ------------------------  derived columns ---------------------------------#
+
+    def bond(self, row: int):
+        from financial_utilities.bond import Bond
+        return Bond(self, int(row))
+
+    def cash_flows(self, row: int) -> CashFlows:
+        """ the bond's payments/1000 bonds as events, views of the universe's event arrays """
+        if self._cash_flow_events is None:
+            bonds, years, months, amounts = universe_cash_flow_events(self)
+            offsets = np.searchsorted(bonds, np.arange(self._length + 1))
+            self._cash_flow_events = (offsets, years.astype(np.int16), months.astype(np.int8), amounts)
+        offsets, years, months, amounts = self._cash_flow_events
+        start, end = offsets[row], offsets[row + 1]
+        return CashFlows(years[start:end], months[start:end], amounts[start:end])
+
+    def payment_schedule(self, row: int) -> np.ndarray:
+        """ the bond's payment schedule matrix, made from its events when asked for """
+        return self.cash_flows(row).dense()
+
+    def payment_schedules(self, rows: np.ndarray | None = None) -> np.ndarray:
+        """ the payment schedule matrices of the rows, all rows if None - N X years X months """
+        return universe_payment_schedules(self, rows)
+
+    def calculate_derived_columns(self, chunk_size: int = 4096) -> None:
+        """
+            calculate total interest, returns and profit for every bond in the universe.
+            The schedules are made a chunk of rows at a time and only their totals are
+            kept - summed as matrices, so the totals are identical to a bond's schedule.sum()
+        """
+        total_interest = np.zeros(self._length, dtype=np.float64)
+        for start in range(0, self._length, chunk_size):
+            rows = np.arange(start, min(start + chunk_size, self._length))
+            total_interest[rows] = schedule_totals(universe_payment_schedules(self, rows))
+        self._columns["total_interest"] = total_interest
+        self.calculate_profits()
+
+    def calculate_profits(self) -> None:
+        """
+            vectorized form of PaymentSource.calculate_profit, the values are per 1000 bonds
+            and are calculated in the same order of operations so the results are identical
+        """
+        ask = self._columns["ask"]
+        interest = self._columns["total_interest"] / 100.0 * 1000.0
+        if K.IS_TAXABLE:
+            premium = ask * 10.0 - 1000.0
+            tax_savings = np.where(premium <= 0.0, 0.0, premium * .40)
+            pretax = 1000 + interest + tax_savings
+            posttax = 1000 + (interest * (1.0 - K.TAX_RATE)) + tax_savings
+        else:
+            pretax = 1000 + interest
+            posttax = pretax
+        self._columns["total_return_pretax"] = pretax
+        self._columns["total_return_posttax"] = posttax
+        self._columns["profit"] = posttax - (ask * 10)
+
+    # endregion
+
+# endregion
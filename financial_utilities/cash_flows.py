@@ -0,0 +1,65 @@
+import numpy as np
+import financial_utilities.constants as K
+
+# region ------------------------  class  CashFlows ---------------------------------#
+
+
+class CashFlows:
+    """
+        The payments of a bond or portfolio item as events - parallel year, month and
+        amount arrays sorted by year and month - instead of a year X month matrix.
+        A bond pays at most twice a year, so nearly all of a matrix is zeros. The
+        matrix is made only when a report asks for it, see dense.
+
+        Years and months use the same base as the matrices: year 0 is K.BEGINNING_YEAR
+        and months are 1 to 12.
+    """
+
+    __slots__ = ("_years", "_months", "_amounts")
+
+    SHAPE = (K.YEARS + 1, 13)          # base 1 indexing for years and months
+
+    def __init__(self, years: np.ndarray, months: np.ndarray, amounts: np.ndarray) -> None:
+        self._years = np.asarray(years, dtype=np.int16)
+        self._months = np.asarray(months, dtype=np.int8)
+        self._amounts = np.asarray(amounts, dtype=float)
+
+    @classmethod
+    def from_dense(cls, matrix: np.ndarray) -> 'CashFlows':
+        years, months = np.nonzero(matrix)
+        return cls(years, months, matrix[years, months])
+
+    @property
+    def years(self) -> np.ndarray: return self._years
+
+    @property
+    def months(self) -> np.ndarray: return self._months
+
+    @property
+    def amounts(self) -> np.ndarray: return self._amounts
+
+    def __len__(self) -> int: return len(self._amounts)
+
+    @property
+    def nbytes(self) -> int: return self._years.nbytes + self._months.nbytes + self._amounts.nbytes
+
+    def for_quantity(self, quantity: int) -> 'CashFlows':
+        """ the payments of quantity bonds, from payments as percent of par """
+        return CashFlows(self._years, self._months, self._amounts / 100 * quantity * 1000)
+
+    def dense(self) -> np.ndarray:
+        """ the payments as a year X month matrix """
+        matrix = np.zeros(self.SHAPE, float)
+        matrix[self._years, self._months] = self._amounts
+        return matrix
+
+    def add_to(self, matrix: np.ndarray) -> np.ndarray:
+        """ add the payments into a year X month matrix, in place """
+        np.add.at(matrix, (self._years, self._months), self._amounts)
+        return matrix
+
+    def sum(self) -> float:
+        """ the total of the payments, summed as the matrix sums so totals don't move by a rounding """
+        return float(self.dense().sum())
+
+# endregion
@@ -7,14 +7,38 @@ CALL_PROTECTED = True                   # When loading bonds load only if call p
 MAX_YEAR = 2036                         # When loading bonds, filter out bonds with maturity year greater than this
 SHOW_PER_1000_DETAIL = False            # When printing portfolio, show per-1000 detail
 USE_EXCLUSIONS = False                  # When loading bonds, filter out bonds with excluded status
+MIN_SP_RATING = None                    # When loading bonds, filter out bonds rated below this S&P rating, e.g. 'A-'
+EXCLUDE_WHOLE_WORDS = False             # When excluding bonds, an exclusion must match whole words of the description
+EXCLUDE_IGNORE_CASE = False             # When excluding bonds, match exclusions regardless of case
 SHOW_EXCLUSIONS = True                  # When  loading bonds table, show excluded bonds
 NUMBER_RANKED_BONDS_TO_PRINT = 50       # Number of bonds to print in ranked bond list
+NUMBER_FOUND_BONDS_TO_PRINT = 50        # Number of bonds to print for a find query, all are counted
+NUMBER_COMPLETIONS_TO_SHOW = 40         # Most bonds offered when completing a bond at the prompt
 ORDER_QUANTITY = 50                     # Default number of bonds to order
 PORTFOLIO_MIN_QUANTITY = 10             # Minimum number of bonds to include in portfolio
 PORTFOLIO_TOTAL_COST = 350000.00        # Default total cost of portfolio
+PORTFOLIO_ISSUER_CAP = 0.10             # Most of the total cost an optimized portfolio spends on one issuer
+OPTIMIZER_TIME_BUDGET = 1.0             # Seconds the portfolio optimizer searches before taking its best so far
+BATCH_OBJECTIVES = ['composite', 'income', 'profit', 'conservative']  # Objectives of the batch portfolios
+BATCH_BUDGETS = [100000.00 + 25000.00 * step for step in range(17)]  # Total costs of the batch portfolios
+BATCH_MAX_YEARS = [2030, 2033, 2036]    # Maturity caps of the batch portfolios
+BATCH_TIME_BUDGET = 0.5                 # Seconds the optimizer searches for each batch portfolio
 ANALYSING_EXISTING_PORTFOLIO = True     # Disable the availability check
 IS_TAXABLE = True                       # When calculating bond profit, consider tax consequences
 SHOW_AVAILABILITY = True                # When printing bonds, show availability
 
 Ratings = {'AAA': 99, 'AA+': 98, 'AA': 97, 'AA-': 96, 'A+': 95, 'A': 94, 'A-': 93, 'BBB+': 92,
            'BBB': 91, 'BBB-': 90, 'NR': 50, '--': 50}
+
+# Scoring profiles: feature => weight. A bond's score is the weighted sum of its rank for each feature,
+# lower is better. Features: yearly_income, profit, ask_yield, rating, short_maturity, call_protected
+ScoringProfiles = {
+    'composite': {'yearly_income': 1, 'profit': 1},
+    'income': {'yearly_income': 1},
+    'profit': {'profit': 1},
+    'yield': {'ask_yield': 1},
+    'conservative': {'rating': 2, 'short_maturity': 2, 'call_protected': 1, 'profit': 1},
+    'aggressive': {'ask_yield': 2, 'profit': 2, 'yearly_income': 1},
+}
+COMPOSITE_PROFILE = 'composite'         # Profile of composite_rank and >c - whole number weights keep it exact
+SKYLINE_AXES = ('yearly_income', 'profit', 'rating')    # Features of the frontier of bonds no other bond beats
@@ -0,0 +1,148 @@
+from collections import deque
+
+# region ------------------------  class  ExclusionMatcher ---------------------------------#
+
+
+class ExclusionMatcher:
+    """
+        Matches a bond description against every exclusion at once. The exclusions
+        are compiled into an Aho-Corasick automaton, so a description is scanned one
+        character at a time whatever the number of exclusions, instead of one
+        substring test per exclusion.
+
+        When several exclusions are found in a description the one reported is the
+        one nearest the top of the exclusion list, as the old loop over the list did.
+    """
+
+    _NO_MATCH = -1
+
+    def __init__(self, exclusions: list[str], whole_word: bool = False, ignore_case: bool = False) -> None:
+        """
+            :param exclusions: text that excludes a bond, empty entries are ignored
+            :param whole_word: an exclusion only matches when it is not part of a longer word
+            :param ignore_case: match regardless of upper/lower case
+        """
+        super().__init__()
+        self._exclusions = [exclusion for exclusion in exclusions if len(exclusion) > 0]
+        self._whole_word = whole_word
+        self._ignore_case = ignore_case
+
+        self._goto: list[dict[str, int]] = [{}]     # state => character => next state
+        self._fail: list[int] = [0]                 # state => longest proper suffix that is also a state
+        self._first: list[int] = [self._NO_MATCH]   # state => lowest exclusion index ending here, incl. suffixes
+        self._outputs: list[list[tuple[int, int]]] = [[]]    # state => (exclusion index, length) ending here, incl. suffixes
+        for index, exclusion in enumerate(self._exclusions):
+            self._add(index, self._normalize(exclusion))
+        self._link()
+        # state => character => next state with the failure states already followed, filled in as characters are seen
+        self._delta: list[dict[str, int]] = [dict(transitions) for transitions in self._goto]
+
+    @property
+    def exclusions(self) -> list[str]: return self._exclusions
+
+    def __len__(self) -> int: return len(self._exclusions)
+
+    def _normalize(self, text: str) -> str:
+        return text.lower() if self._ignore_case else text
+
+    # region ------------------------  automaton construction ---------------------------------#
+
+    def _add(self, index: int, pattern: str) -> None:
+        state = 0
+        for character in pattern:
+            next_state = self._goto[state].get(character)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._first.append(self._NO_MATCH)
+                self._outputs.append([])
+                self._goto[state][character] = next_state
+            state = next_state
+        if self._first[state] == self._NO_MATCH: self._first[state] = index     # duplicates keep the first
+        self._outputs[state].append((index, len(pattern)))
+
+    def _link(self) -> None:
+        """
+            set the failure states, breadth first so a state's failure state is complete before
+            the state itself, and fold the failure state's matches into each state's
+        """
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            fail = self._fail[state]
+            if self._first[fail] != self._NO_MATCH and \
+                    (self._first[state] == self._NO_MATCH or self._first[fail] < self._first[state]):
+                self._first[state] = self._first[fail]
+            self._outputs[state] = self._outputs[state] + self._outputs[fail]
+            for character, next_state in self._goto[state].items():
+                fallback = fail
+                while character not in self._goto[fallback] and fallback != 0:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(character, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                queue.append(next_state)
+
+    # endregion
+
+    # region ------------------------  matching ---------------------------------#
+
+    def _next_state(self, state: int, character: str) -> int:
+        """ follow the failure states for a character not yet seen in this state, and remember the result """
+        fallback = state
+        while fallback != 0 and character not in self._goto[fallback]:
+            fallback = self._fail[fallback]
+        next_state = self._goto[fallback].get(character, 0)
+        self._delta[state][character] = next_state
+        return next_state
+
+    def _states(self, text: str) -> list[int]:
+        """ the state after each character of the text """
+        delta, next_state = self._delta, self._next_state
+        states = []
+        state = 0
+        for character in text:
+            transitions = delta[state]
+            state = transitions[character] if character in transitions else next_state(state, character)
+            states.append(state)
+        return states
+
+    def _is_whole_word(self, text: str, end: int, length: int) -> bool:
+        start = end - length + 1
+        if start > 0 and text[start - 1].isalnum() and text[start].isalnum(): return False
+        if end + 1 < len(text) and text[end + 1].isalnum() and text[end].isalnum(): return False
+        return True
+
+    def first_match(self, description: str) -> str | None:
+        """ the exclusion that excludes the description, or None """
+        index = self.first_index(description)
+        return self._exclusions[index] if index >= 0 else None
+
+    def first_index(self, description: str) -> int:
+        """ the list index of the exclusion that excludes the description, or -1 """
+        if not self._exclusions: return -1
+        text = self._normalize(description)
+        best = len(self._exclusions)
+        if self._whole_word:
+            for position, state in enumerate(self._states(text)):
+                for index, length in self._outputs[state]:
+                    if index < best and self._is_whole_word(text, position, length): best = index
+        else:
+            first = self._first
+            for state in self._states(text):
+                index = first[state]
+                if index != self._NO_MATCH and index < best: best = index
+        return best if best < len(self._exclusions) else -1
+
+    def matches(self, description: str) -> list[str]:
+        """ every exclusion found in the description, in exclusion list order """
+        text = self._normalize(description)
+        found = set()
+        for position, state in enumerate(self._states(text)):
+            for index, length in self._outputs[state]:
+                if not self._whole_word or self._is_whole_word(text, position, length): found.add(index)
+        return [self._exclusions[index] for index in sorted(found)]
+
+    # endregion
+
+# endregion
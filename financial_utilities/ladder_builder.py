@@ -0,0 +1,174 @@
+import numpy as np
+import financial_utilities.constants as K
+from financial_utilities.bond_universe import BondUniverse
+from financial_utilities.payment_schedules import SCHEDULE_SHAPE, universe_cash_flow_events
+
+# region ------------------------  class  Ladder ---------------------------------#
+
+
+class Ladder:
+    """ the bonds of a maturity ladder and how well they meet its yearly targets """
+
+    def __init__(self, universe: BondUniverse, kind: str, solution: list[tuple[int, int]], targets: dict[int, float],
+                 matched: dict[int, float], short_years: list[int], cost: float) -> None:
+        super().__init__()
+        self._universe = universe
+        self.kind = kind
+        self.solution = solution
+        self.targets = targets
+        self.matched = matched
+        self.short_years = short_years
+        self.cost = cost
+
+    @property
+    def tracking_error(self) -> float:
+        """ root mean square of matched - target over the target years """
+        if not self.targets: return 0.0
+        return float(np.sqrt(np.mean([(self.matched[year] - target) ** 2 for year, target in self.targets.items()])))
+
+    def gaps(self) -> dict[int, float]:
+        """ year => how far short of its target the ladder is, for the years that are short """
+        return {year: target - self.matched[year] for year, target in self.targets.items()
+                if self.matched[year] < target - 0.005}
+
+    def action_line(self) -> str:
+        """ the ladder as portfolio builder actions, +cusip:quantity; for each bond """
+        return "".join(f"+{self._universe['cusip'][row]}:{quantity};" for row, quantity in self.solution)
+
+    def print_report(self) -> None:
+        print(f"\n{self.kind.capitalize()} ladder: {len(self.solution)} bonds costing ${self.cost:,.2f}"
+              f"   tracking error ${self.tracking_error:,.2f}")
+        print(f"{'year':>6}{'target':>16}{'matched':>16}{'difference':>16}")
+        for year, target in sorted(self.targets.items()):
+            note = "   no bonds left to fill this year" if year in self.short_years else ""
+            print(f"{year:>6}{target:>16,.2f}{self.matched[year]:>16,.2f}{self.matched[year] - target:>16,.2f}{note}")
+
+# endregion
+
+# region ------------------------  class  LadderBuilder ---------------------------------#
+
+
+class LadderBuilder:
+    """
+        Builds a maturity ladder: bonds and quantities whose cash in each year meets
+        a target for the year. An income ladder counts everything a bond pays in a
+        year - coupons and, in its maturity year, principal. A principal ladder
+        counts only principal.
+
+        The universe's cash flows are summed into a bonds X years tensor once, and
+        the ladder is matched from the last target year back to the first. Each
+        year is filled from the bonds maturing in it, cheapest per dollar of that
+        year's cash first: a cumulative sum of their availability finds the bonds
+        bought in full, all in one step. What is left of the year is bought from
+        the one remaining bond that does it best, as the objective says:
+            cost - the bond meeting the rest of the target at the least cost
+            tracking - the bond whose nearest whole lots come closest to the rest of the target
+        The coupons of the bonds bought are then taken off the earlier years'
+        targets, so those years buy less.
+        A year whose target is more than the bonds maturing in it can pay is
+        reported as a gap.
+
+        Quantities are whole lots of min_quantity_ask, at least
+        K.PORTFOLIO_MIN_QUANTITY bonds and no more than available.
+    """
+
+    KINDS = ("income", "principal")
+    OBJECTIVES = ("cost", "tracking")
+
+    def __init__(self, universe: BondUniverse, rows: np.ndarray) -> None:
+        """
+            :param universe: the universe holding the bonds
+            :param rows: the rows of the bonds that may be bought
+        """
+        super().__init__()
+        self._universe = universe
+        self._rows = np.asarray(rows, dtype=np.intp)
+        self._cash: dict[str, np.ndarray] = {}
+
+    def yearly_cash(self, kind: str) -> np.ndarray:
+        """ :return: bonds X years array, the dollars one bond of each row pays in each year """
+        if kind not in self._cash:
+            universe, rows = self._universe, self._rows
+            years = SCHEDULE_SHAPE[0]
+            cash = np.zeros((len(rows), years))
+            maturity = universe["maturity_year"][rows].astype(np.int64) - K.BEGINNING_YEAR
+            in_range = (maturity >= 0) & (maturity < years)
+            cash[np.flatnonzero(in_range), maturity[in_range]] = 1000.0
+            if kind == "income":
+                bonds, event_years, _, amounts = universe_cash_flow_events(universe, rows)
+                cash += np.bincount(bonds * years + event_years, weights=amounts * 10,
+                                    minlength=len(rows) * years).reshape(len(rows), years)
+            self._cash[kind] = cash
+        return self._cash[kind]
+
+    def build(self, targets: dict[int, float], kind: str = "income", objective: str = "cost") -> Ladder:
+        """
+            :param targets: year => the dollars wanted in that year
+            :param kind: income | principal - what counts toward a year's target
+            :param objective: cost | tracking - see the class description
+        """
+        if kind not in self.KINDS: raise ValueError(f"Unknown ladder kind {kind}, use {', '.join(self.KINDS)}")
+        if objective not in self.OBJECTIVES:
+            raise ValueError(f"Unknown ladder objective {objective}, use {', '.join(self.OBJECTIVES)}")
+        last_year = K.BEGINNING_YEAR + SCHEDULE_SHAPE[0] - 1
+        outside = [year for year in targets if not K.BEGINNING_YEAR <= year <= last_year]
+        if outside: raise ValueError(f"Ladder years {outside} are outside {K.BEGINNING_YEAR}-{last_year}")
+
+        universe, rows = self._universe, self._rows
+        cash = self.yearly_cash(kind)
+        lot = np.maximum(universe["min_quantity_ask"][rows].astype(np.int64), 1)
+        min_lots = -(-K.PORTFOLIO_MIN_QUANTITY // lot)
+        max_lots = universe["ask_quantity"][rows].astype(np.int64) // lot
+        lot_cost = universe["ask"][rows] * 10.0 * lot
+        maturity = universe["maturity_year"][rows]
+        _, first = np.unique(universe["cusip"][rows], return_index=True)
+        usable = np.zeros(len(rows), dtype=bool)
+        usable[first] = True
+        usable &= (max_lots >= min_lots) & (lot_cost > 0)
+
+        residual = np.zeros(SCHEDULE_SHAPE[0])
+        for year, target in targets.items(): residual[year - K.BEGINNING_YEAR] = target
+        lots = np.zeros(len(rows), dtype=np.int64)
+        short_years = []
+        for year in sorted(targets, reverse=True):
+            index = year - K.BEGINNING_YEAR
+            need = residual[index]
+            if need <= 0: continue
+            candidates = np.flatnonzero(usable & (maturity == year))
+            lot_cash = cash[candidates, index] * lot[candidates]
+            candidates, lot_cash = candidates[lot_cash > 0], lot_cash[lot_cash > 0]
+            order = np.argsort(lot_cost[candidates] / lot_cash, kind="stable")
+            candidates, lot_cash = candidates[order], lot_cash[order]
+
+            capacity = np.cumsum(max_lots[candidates] * lot_cash)
+            full = int(np.searchsorted(capacity, need))
+            bought = np.zeros(len(candidates), dtype=np.int64)
+            bought[:full] = max_lots[candidates[:full]]
+            if full < len(candidates):
+                # the rest of the year from the one bond that does it best - not always the next, lots differ
+                left = need - (capacity[full - 1] if full else 0.0)
+                rest, rest_cash = candidates[full:], lot_cash[full:]
+                exact = left / rest_cash
+                partial = np.ceil(exact - 1e-9) if objective == "cost" else np.rint(exact)
+                partial = np.minimum(np.maximum(partial.astype(np.int64), min_lots[rest]), max_lots[rest])
+                if objective == "cost":
+                    best = int(np.argmin(np.where(partial * rest_cash >= left - 1e-9, partial * lot_cost[rest], np.inf)))
+                else:
+                    miss = np.abs(partial * rest_cash - left)
+                    best = int(np.argmin(miss))
+                    if miss[best] >= left: partial[best] = 0
+                bought[full + best] = partial[best]
+            else:
+                short_years.append(year)
+            lots[candidates] = bought
+            residual -= bought @ (cash[candidates] * lot[candidates, None])
+
+        chosen = np.flatnonzero(lots)
+        quantities = lots[chosen] * lot[chosen]
+        matched = quantities @ cash[chosen]
+        return Ladder(universe, kind, [(int(rows[i]), int(q)) for i, q in zip(chosen, quantities)],
+                      {year: float(target) for year, target in targets.items()},
+                      {year: float(matched[year - K.BEGINNING_YEAR]) for year in targets},
+                      sorted(short_years), float((lots[chosen] * lot_cost[chosen]).sum()))
+
+# endregion
@@ -0,0 +1,117 @@
+import numpy as np
+import financial_utilities.constants as K
+from financial_utilities.payment_source import PaymentSource
+
+# region ------------------------  batched payment schedules ---------------------------------#
+
+"""
+    The payment schedules of many bonds at once. PaymentSource.make_cash_flows
+    makes the payments of one bond, make_cash_flow_events makes the payments of N
+    bonds as one set of event arrays, and make_payment_schedules the same as a
+    single N X (K.YEARS + 1) X 13 array, using the same first year, last year and
+    coupon month rules:
+
+        coupons are paid in the first coupon month (maturity month, less 6 if it is
+        in the second half of the year) and 6 months later, coupon/2 each time
+        year 0 - no first coupon if it falls before the purchase date
+        the maturity year - no second coupon if the bond matures in the first half of the year
+
+    Years past K.YEARS are outside the array and are left out.
+"""
+
+SCHEDULE_SHAPE = (K.YEARS + 1, 13)         # base 1 indexing for years and months, as PaymentSource
+
+
+def make_cash_flow_events(coupon: np.ndarray, maturity_year: np.ndarray, maturity_month: np.ndarray,
+                          maturity_day_of_month: np.ndarray, purchase_month: int,
+                          purchase_day_of_month: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+        make the payments/1000 bonds of every bond as events
+            :param coupon: coupon rate of each bond, percent
+            :param maturity_year: maturity date of each bond, as year, month and day arrays
+            :param purchase_month: the purchase date the bonds share
+            :return: (bond, year, month, amount) arrays, sorted by bond, year and month
+    """
+    maturity_month = np.asarray(maturity_month, dtype=np.int64)
+    maturity_day_of_month = np.asarray(maturity_day_of_month, dtype=np.int64)
+    first_coupon_month = np.where(maturity_month >= 7, maturity_month - 6, maturity_month)
+    second_coupon_month = first_coupon_month + 6
+    ending_year = np.asarray(maturity_year, dtype=np.int64) - K.BEGINNING_YEAR
+    six_month_coupon = np.asarray(coupon, dtype=float) / 2
+
+    first_coupon_is_before_purchase = (first_coupon_month < purchase_month) | \
+        ((first_coupon_month == purchase_month) & (maturity_day_of_month < purchase_day_of_month))
+
+    years = np.arange(SCHEDULE_SHAPE[0])
+    paying = years[None, :] <= ending_year[:, None]
+    is_first_year = (years == 0)[None, :]
+    is_last_year = (years[None, :] == ending_year[:, None]) & (years > 0)[None, :]
+
+    pays_first = paying & ~(is_first_year & first_coupon_is_before_purchase[:, None])
+    pays_second = paying & ~(is_last_year & (maturity_month < 7)[:, None])
+
+    first_bonds, first_years = np.nonzero(pays_first)
+    second_bonds, second_years = np.nonzero(pays_second)
+    bonds = np.concatenate((first_bonds, second_bonds))
+    event_years = np.concatenate((first_years, second_years))
+    months = np.concatenate((first_coupon_month[first_bonds], second_coupon_month[second_bonds]))
+    order = np.lexsort((months, event_years, bonds))
+    bonds = bonds[order]
+    return bonds, event_years[order], months[order], six_month_coupon[bonds]
+
+
+def make_payment_schedules(coupon: np.ndarray, maturity_year: np.ndarray, maturity_month: np.ndarray,
+                           maturity_day_of_month: np.ndarray, purchase_month: int,
+                           purchase_day_of_month: int) -> np.ndarray:
+    """
+        make the payments/1000 bonds matrix of every bond, arguments as make_cash_flow_events
+            :return: N X years X months array, [n] is bond n's payment schedule
+    """
+    schedules = np.zeros((len(coupon),) + SCHEDULE_SHAPE, float)
+    bonds, years, months, amounts = make_cash_flow_events(coupon, maturity_year, maturity_month,
+                                                          maturity_day_of_month, purchase_month, purchase_day_of_month)
+    schedules[bonds, years, months] = amounts
+    return schedules
+
+
+def _universe_arguments(universe, rows: np.ndarray | None) -> tuple:
+    rows = np.arange(len(universe)) if rows is None else rows
+    return (universe["coupon"][rows], universe["maturity_year"][rows], universe["maturity_month"][rows],
+            universe["maturity_day_of_month"][rows], universe.purchase_month, universe.purchase_day_of_month)
+
+
+def universe_payment_schedules(universe, rows: np.ndarray | None = None) -> np.ndarray:
+    """ make_payment_schedules for the rows of a BondUniverse, all rows if None """
+    return make_payment_schedules(*_universe_arguments(universe, rows))
+
+
+def universe_cash_flow_events(universe, rows: np.ndarray | None = None) -> tuple:
+    """ make_cash_flow_events for the rows of a BondUniverse, all rows if None """
+    return make_cash_flow_events(*_universe_arguments(universe, rows))
+
+
+def schedule_totals(schedules: np.ndarray) -> np.ndarray:
+    """ the sum of each bond's schedule, summed as ndarray.sum() sums a single schedule """
+    return schedules.reshape(len(schedules), -1).sum(axis=1)
+
+
+def mismatched_rows(universe) -> list[int]:
+    """
+        check make_payment_schedules and the universe's cash flows against
+        PaymentSource.make_cash_flows for every bond of the universe
+            :return: the rows whose schedules, totals or events are not identical, empty when all match
+    """
+    schedules = universe_payment_schedules(universe)
+    totals = schedule_totals(schedules)
+    mismatches = []
+    for row in range(len(universe)):
+        reference = PaymentSource.make_cash_flows(universe.bond(row))
+        cash_flows = universe.cash_flows(row)
+        if not np.array_equal(reference.dense(), schedules[row]) or reference.sum() != totals[row] or \
+                not all(np.array_equal(a, b) for a, b in zip((reference.years, reference.months, reference.amounts),
+                                                              (cash_flows.years, cash_flows.months, cash_flows.amounts))):
+            mismatches.append(row)
+    return mismatches
+
+# endregion
+
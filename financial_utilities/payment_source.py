@@ -1,6 +1,7 @@
 import datetime
 import numpy as np
 import financial_utilities.constants as K
+from financial_utilities.cash_flows import CashFlows
 
 
 class PaymentSource:
@@ -34,9 +35,9 @@ class PaymentSource:
         self._yearly_income: float = 0.0
         self._ask: float = 0.0
         self._sp_rating: str = ""
-        self._payment_schedule: np.ndarray = np.zeros([K.YEARS + 1, 13], float)
+        self._cash_flows: CashFlows | None = None            # payments/1000 bonds, year X month events
         self._total_interest: float = 0.0
-        self._coupon_matrix: np.ndarray = np.zeros([K.YEARS + 1, 13], float)
+        self._coupon_flows: CashFlows | None = None          # actual payments of the quantity held
         self._total_return_pretax: float = 0.0
         self._total_return_posttax: float = 0.0
         self._profit: float = 0.0
@@ -91,10 +92,16 @@ class PaymentSource:
     def price(self): return self._ask
 
     @property
-    def payment_schedule(self): return self._payment_schedule             # matrix per year X month  => coupon/2
+    def cash_flows(self) -> CashFlows: return self._cash_flows
 
     @property
-    def coupon_matrix(self) -> np.ndarray: return self._coupon_matrix
+    def payment_schedule(self) -> np.ndarray: return self.cash_flows.dense()    # matrix per year X month  => coupon/2
+
+    @property
+    def coupon_flows(self) -> CashFlows: return self._coupon_flows
+
+    @property
+    def coupon_matrix(self) -> np.ndarray: return self.coupon_flows.dense()
 
     @property
     def yearly_income(self) -> float:
@@ -149,6 +156,13 @@ class PaymentSource:
             make matrix containing payments/1000 bonds
             arranged as year X month.
         """
+        return self.make_cash_flows().dense()
+
+    def make_cash_flows(self) -> CashFlows:
+        """
+            make the payments/1000 bonds as (year, month, amount) events
+            in year X month order.
+        """
 
         def first_coupon_date_is_before_purchase_date() -> bool:
             if first_coupon_month < self.purchase_month: return True
@@ -160,24 +174,27 @@ class PaymentSource:
         def maturity_date_is_in_first_half_of_year():
             return int(self.maturity_month) < 7
 
+        def pay(month: int) -> None:
+            if year <= K.YEARS: events.append((year, month, six_month_coupon))
+
         def set_both_coupons() -> None:
-            payment_schedule[year, first_coupon_month] = six_month_coupon
-            payment_schedule[year, second_coupon_month] = six_month_coupon
+            pay(first_coupon_month)
+            pay(second_coupon_month)
 
         def evaluate_first_year() -> None:
             if first_coupon_date_is_before_purchase_date():
-                payment_schedule[year, second_coupon_month] = six_month_coupon
+                pay(second_coupon_month)
             else: set_both_coupons()
 
         def evaluate_last_year() -> None:
             if maturity_date_is_in_first_half_of_year():
                 # no last coupon
-                payment_schedule[year, first_coupon_month] = six_month_coupon
+                pay(first_coupon_month)
             else: set_both_coupons()
 
-        # main line logic for building the matrix[year,month] = coupon
+        # main line logic for building the events (year, month, coupon)
         six_month_coupon = self.coupon / 2
-        payment_schedule = np.zeros([K.YEARS + 1, 13], float)      # Use base 1 indexing for years and months
+        events: list[tuple[int, int, float]] = []
         first_coupon_month, second_coupon_month = self.get_coupon_months()
         ending_year = self.maturity_year - K.BEGINNING_YEAR
 
@@ -186,7 +203,8 @@ class PaymentSource:
             elif year == ending_year: evaluate_last_year()
             else: set_both_coupons()
 
-        return payment_schedule
+        years, months, amounts = zip(*events) if events else ((), (), ())
+        return CashFlows(years, months, amounts)
 
     def calculate_profit(self) -> None:
 
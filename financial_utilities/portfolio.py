@@ -1,4 +1,6 @@
 # import os
+import itertools
+import contextlib
 import numpy as np
 from financial_utilities.bond import Bond
 # import datetime
@@ -9,17 +11,79 @@ import financial_utilities.constants as K
 # from financial_utilities.payment_source import PaymentSource
 from financial_utilities.portfolio_item import PortfolioItem
 from financial_utilities.portfolio_reporter import PortfolioReporter
+from financial_utilities.bond_index import BondIndex
+from financial_utilities.text_index import TextIndex
 
 
 class Portfolio:
 
+    _generations = itertools.count(1)
+
     def __init__(self):
         super().__init__()
+        self._generation = next(Portfolio._generations)     # new for every new or cleared portfolio
         self._portfolio_items = []
         self._portfolio_changed: bool = False
         self._removed_bonds = []
+        self._index = BondIndex()                   # cusip, maturity year, rating and issuer => portfolio items
+        self._text_index = TextIndex()              # description words => portfolio items
+        self._removed_cusips = set()
         self._file_path = None
         self._title = None
+        self._totals_deferred = False
+        self.reset_totals()
+
+    def reset_totals(self) -> None:
+        """ running totals of the items, kept up to date as items are added, removed and changed """
+        self._total_invested: float = 0.0
+        self._total_profit: float = 0.0
+        self._yearly_income: float = 0.0
+        self._total_quantity: int = 0
+        self._income_matrix = np.zeros([K.YEARS + 1, 13], float)
+        self._income_counts = np.zeros([K.YEARS + 1, 13], int)     # payments in each cell of the income matrix
+
+    def _account_for(self, item: PortfolioItem, sign: int) -> None:
+        """ add (sign +1) or take out (sign -1) an item's share of the running totals """
+        if self._totals_deferred: return
+        if sign < 0 and len(self._portfolio_items) == 0:
+            self.reset_totals()                 # nothing left, start again from exact zeros
+            return
+        self._total_invested += sign * item.total_cost
+        self._total_profit += sign * (item.profit * item.quantity)
+        self._yearly_income += sign * (item.yearly_income * item.quantity)
+        self._total_quantity += sign * item.quantity
+        flows = item.coupon_flows
+        cells = (flows.years, flows.months)
+        np.add.at(self._income_matrix, cells, flows.amounts if sign > 0 else -flows.amounts)
+        np.add.at(self._income_counts, cells, sign)
+        if sign < 0: self._income_matrix[self._income_counts == 0] = 0.0     # no rounding left in empty cells
+
+    def recalculate_totals(self) -> None:
+        """
+            make the running totals again from the items, in item order as they are kept,
+            with the payments of all the items added to the income matrix at once
+        """
+        self.reset_totals()
+        if not self._portfolio_items: return
+        for item in self._portfolio_items:
+            self._total_invested += item.total_cost
+            self._total_profit += item.profit * item.quantity
+            self._yearly_income += item.yearly_income * item.quantity
+            self._total_quantity += item.quantity
+        flows = [item.coupon_flows for item in self._portfolio_items]
+        cells = (np.concatenate([f.years for f in flows]), np.concatenate([f.months for f in flows]))
+        np.add.at(self._income_matrix, cells, np.concatenate([f.amounts for f in flows]))
+        np.add.at(self._income_counts, cells, 1)
+
+    @contextlib.contextmanager
+    def deferred_totals(self):
+        """ add, remove and change items without keeping the running totals, which are made once at the end """
+        self._totals_deferred = True
+        try:
+            yield self
+        finally:
+            self._totals_deferred = False
+            self.recalculate_totals()
 
     @property
     def file_path(self): return self._file_path
@@ -48,6 +112,12 @@ class Portfolio:
     @property
     def removed_bonds(self): return self._removed_bonds
 
+    @property
+    def index(self) -> BondIndex: return self._index
+
+    @property
+    def generation(self) -> int: return self._generation
+
     abbreviated_bond_line = [
         ["cusip", 12, lambda item: item.cusip],
         ["description", 30, lambda item: item.description],
@@ -72,12 +142,14 @@ class Portfolio:
 
     def add_bond(self, theBond: Bond, quantity: int) -> PortfolioItem:
         theItem = PortfolioItem.portfolio_item_from_bond(theBond, quantity)
-        self._portfolio_items.append(theItem)
-        self._portfolio_changed = True
-        return theItem
+        return self.add_item(theItem)
 
     def add_item(self, theItem: PortfolioItem) -> PortfolioItem:
         self._portfolio_items.append(theItem)
+        self._index.add(theItem, theItem.cusip, theItem.maturity_year, theItem.sp_rating, theItem.description)
+        self._text_index.add(theItem, theItem.description)
+        self._account_for(theItem, +1)
+        theItem.add_quantity_listener(self._account_for)
         self._portfolio_changed = True
         return theItem
 
@@ -89,33 +161,43 @@ class Portfolio:
 
     def remove_item(self, theItem: PortfolioItem) -> None:
         self._removed_bonds.append(theItem)
+        self._removed_cusips.add(theItem.cusip)
         self._portfolio_items.remove(theItem)
+        self._index.remove(theItem)
+        self._text_index.remove(theItem)
+        theItem.remove_quantity_listener(self._account_for)
+        self._account_for(theItem, -1)
         self._portfolio_changed = True
 
+    def has_removed_bond(self, cusip: str) -> bool:
+        return cusip in self._removed_cusips
+
     def clear_portfolio(self) -> None:
+        for theItem in self._portfolio_items: theItem.remove_quantity_listener(self._account_for)
         self.__init__()
         self._portfolio_changed = True
 
     @property
-    def total_invested(self) -> float:
-        spend = 0.0
-        for aPortfolioItem in self._portfolio_items:
-            spend += aPortfolioItem.total_cost
-        return spend
+    def total_invested(self) -> float: return self._total_invested
 
     @property
     def total_interest(self) -> float:
-        sum_of_coupons = np.zeros([K.YEARS + 1, 13], float)
-        for thePortfolio_item in self.portfolio_items:
-            sum_of_coupons = np.add(sum_of_coupons, thePortfolio_item.coupon_matrix)
-        return sum_of_coupons.sum()
+        return self._income_matrix.sum()
 
     def find_portfolio_item_by_cusip(self, cusip: str) -> PortfolioItem | None:
-        # sourcery skip: use-next
-        for aPortfolioItem in self._portfolio_items:
-            if aPortfolioItem.cusip == cusip:
-                return aPortfolioItem
-        return None
+        return self._index.find(cusip)
+
+    def contains_cusip(self, cusip: str) -> bool:
+        return cusip in self._index
+
+    def find_portfolio_items_by_maturity_year(self, year: int) -> list[PortfolioItem]:
+        return self._index.by_maturity_year(year)
+
+    def find_portfolio_items_by_rating(self, rating_bucket: str) -> list[PortfolioItem]:
+        return self._index.by_rating(rating_bucket)
+
+    def find_portfolio_items_by_issuer(self, issuer: str) -> list[PortfolioItem]:
+        return self._index.by_issuer(issuer)
 
     def find_portfolio_item_by_position(self, position: int) -> PortfolioItem | None:
         return self._portfolio_items[position-1] if position <= self.length else None
@@ -127,32 +209,23 @@ class Portfolio:
     #     return None
 
     def find_portfolio_item_containing_text_in_description(self, text: str) -> PortfolioItem | None:
-        # sourcery skip: use-next
-        for aPortfolioItem in self._portfolio_items:
-            if text in aPortfolioItem.description:
-                return aPortfolioItem
-        return None
+        """ the best item with a description word starting with the text, else the first holding the text anywhere """
+        items = self._text_index.search(text)
+        if items: return items[0]
+        return next((item for item in self._portfolio_items if text in item.description), None)
+
+    def search_descriptions(self, query: str) -> list[PortfolioItem]:
+        """ the items whose descriptions match every word of the query, best first - see TextIndex """
+        return self._text_index.search(query)
 
     @property
-    def total_profit(self) -> float:
-        profit = 0.0
-        for aPortfolioItem in self._portfolio_items:
-            profit += aPortfolioItem.profit * aPortfolioItem.quantity
-        return profit
+    def total_profit(self) -> float: return self._total_profit
 
     @property
-    def yearly_income(self) -> float:
-        yearly_income = 0.0
-        for aPortfolioItem in self._portfolio_items:
-            yearly_income += aPortfolioItem.yearly_income * aPortfolioItem.quantity
-        return yearly_income
+    def yearly_income(self) -> float: return self._yearly_income
 
     @property
-    def total_par_value(self) -> float:
-        number_of_bonds = 0.0
-        for thePortfolio_item in self.portfolio_items:
-            number_of_bonds += float(thePortfolio_item.quantity) * 1000
-        return number_of_bonds
+    def total_par_value(self) -> float: return float(self._total_quantity) * 1000
 
     @property
     def total_LOP(self) -> float:
@@ -164,13 +237,10 @@ class Portfolio:
 
     def get_combined_income_matrix(self) -> np.ndarray:
         """
-            add all the bond's coupon matrices together creating a single matrix
-            with all bond income for the portfolio
+            all the bond's coupon matrices added together, a single matrix
+            with all bond income for the portfolio - a copy of the running total
         """
-        sum_of_coupons = np.zeros([K.YEARS + 1, 13], float)
-        for thePortfolio_item in self.portfolio_items:
-            sum_of_coupons = np.add(sum_of_coupons, thePortfolio_item.coupon_matrix)
-        return sum_of_coupons
+        return self._income_matrix.copy()
 
     def make_analysis_report(self, doc: PDFDocument, theTitle: str, detail: bool = False) -> None:
         reporter = PortfolioReporter(self)
@@ -0,0 +1,157 @@
+import datetime
+import json
+import os
+import numpy as np
+import financial_utilities.constants as K
+from financial_utilities.cash_flows import CashFlows
+from financial_utilities.portfolio import Portfolio
+from financial_utilities.portfolio_item import PortfolioItem
+
+# region ------------------------  class  PortfolioFile ---------------------------------#
+
+
+class PortfolioFile:
+    """
+        Reads and writes a portfolio with a snapshot of each item's bond - what the
+        item was made from when it was added, its quantity and its payments - so
+        opening it needs no bonds.csv: nothing is looked up and no payments are
+        worked out again, and a bond no longer offered still opens.
+
+        A .pfjson file is the JSON form of main.py's sketch:
+            {
+                "format": "portfolio", "version": 1, "title": "Income Portfolio", "saved": "10/21/2023",
+                "items": [
+                    {"cusip": "22550L2M2", "description": "CREDIT SUISSE AG NEWYORK MTN", "maturity_date": "03/15/2027",
+                     "coupon": 5.0, "ask": 99.5, "sp_rating": "A", "available": 50, "quantity": 20,
+                     "purchase_date": "10/21/2023", "payments": [[2024, 3, 2.5], [2024, 9, 2.5], ...]},
+                    ...
+                ]
+            }
+        Payments are [year, month, percent of par], with calendar years so a file
+        outlives a change of K.BEGINNING_YEAR.
+
+        A .pfbin file holds the same as columns in a compressed .npz - one array per
+        field and the payments of all items in three arrays, item by item, with the
+        offset of each item's first payment - for large portfolios.
+
+        A .pflo file is the older form, the actions that build the portfolio, and is
+        opened by replaying them - see PortfolioBuilderEngine.open_portfolio.
+    """
+
+    FORMAT = "portfolio"
+    VERSION = 1
+    JSON_EXTENSION = ".pfjson"
+    BINARY_EXTENSION = ".pfbin"
+    ACTIONS_EXTENSION = ".pflo"
+    EXTENSIONS = (JSON_EXTENSION, BINARY_EXTENSION, ACTIONS_EXTENSION)
+    _FIELDS = ("cusip", "description", "maturity_date", "coupon", "ask", "sp_rating", "available", "quantity",
+               "purchase_date")
+
+    @classmethod
+    def has_snapshots(cls, path: str) -> bool:
+        """ whether the file is a .pfjson or .pfbin file, rather than .pflo actions """
+        return path.endswith((cls.JSON_EXTENSION, cls.BINARY_EXTENSION))
+
+    # region ------------------------  writing ---------------------------------#
+
+    @classmethod
+    def write(cls, portfolio: Portfolio, path: str) -> None:
+        """ write the portfolio in the form the path's extension names, .pfjson or .pfbin """
+        if path.endswith(cls.BINARY_EXTENSION): cls._write_binary(portfolio, path)
+        elif path.endswith(cls.JSON_EXTENSION): cls._write_json(portfolio, path)
+        else: raise ValueError(f"{path} is not a {cls.JSON_EXTENSION} or {cls.BINARY_EXTENSION} file")
+
+    @classmethod
+    def _header(cls, portfolio: Portfolio) -> dict:
+        return {"format": cls.FORMAT, "version": cls.VERSION, "title": portfolio.title,
+                "saved": datetime.datetime.now().strftime("%m/%d/%Y")}
+
+    @staticmethod
+    def _snapshot(item: PortfolioItem) -> list:
+        return [item.cusip, item.description, item.maturity_date, item.coupon, item.ask, item.sp_rating,
+                item.available, item.quantity, item.purchase_date]
+
+    @classmethod
+    def _write_json(cls, portfolio: Portfolio, path: str) -> None:
+        items = []
+        for item in portfolio.portfolio_items:
+            snapshot = dict(zip(cls._FIELDS, cls._snapshot(item)))
+            flows = item.cash_flows
+            snapshot["payments"] = [[year + K.BEGINNING_YEAR, month, amount] for year, month, amount in
+                                    zip(flows.years.tolist(), flows.months.tolist(), flows.amounts.tolist())]
+            items.append(snapshot)
+        header = json.dumps(cls._header(portfolio))[:-1]     # its closing brace comes after the items
+        with open(path, "w") as output_file:        # an item a line
+            output_file.write(f'{header}, "items": [\n' + ",\n".join(map(json.dumps, items)) + "\n]}\n")
+
+    @classmethod
+    def _write_binary(cls, portfolio: Portfolio, path: str) -> None:
+        items = portfolio.portfolio_items
+        columns = list(zip(*(cls._snapshot(item) for item in items))) or [()] * len(cls._FIELDS)
+        arrays = {field: np.array(column, dtype=dtype) for field, column, dtype in
+                  zip(cls._FIELDS, columns, (str, str, str, float, float, str, np.int64, np.int64, str))}
+        flows = [item.cash_flows for item in items]
+        arrays["payment_offsets"] = np.concatenate(([0], np.cumsum([len(flow) for flow in flows]))).astype(np.int64)
+        arrays["payment_years"] = np.concatenate([flow.years for flow in flows] + [np.zeros(0, np.int16)]) \
+            + K.BEGINNING_YEAR
+        arrays["payment_months"] = np.concatenate([flow.months for flow in flows] + [np.zeros(0, np.int8)])
+        arrays["payment_amounts"] = np.concatenate([flow.amounts for flow in flows] + [np.zeros(0)])
+        arrays["header"] = np.array(json.dumps(cls._header(portfolio)))
+        with open(path, "wb") as output_file:      # a file object, so numpy doesn't add .npz to the name
+            np.savez_compressed(output_file, **arrays)
+
+    # endregion
+
+    # region ------------------------  reading ---------------------------------#
+
+    @classmethod
+    def read(cls, path: str) -> Portfolio:
+        """
+            the portfolio of a .pfjson or .pfbin file, its items made from their snapshots
+                :raise ValueError: the file is not a portfolio file this version can read
+        """
+        if path.endswith(cls.BINARY_EXTENSION): header, snapshots, payments = cls._read_binary(path)
+        else: header, snapshots, payments = cls._read_json(path)
+        if header.get("format") != cls.FORMAT or header.get("version", cls.VERSION + 1) > cls.VERSION:
+            raise ValueError(f"{os.path.basename(path)} is not a version {cls.VERSION} portfolio file")
+
+        portfolio = Portfolio()
+        portfolio.title = header.get("title")
+        with portfolio.deferred_totals():
+            for snapshot, (years, months, amounts) in zip(snapshots, payments):
+                cusip, description, maturity_date, coupon, ask, sp_rating, available, quantity, purchase_date = snapshot
+                years = np.asarray(years, dtype=np.int64) - K.BEGINNING_YEAR
+                # payments outside the years of the matrices are worked out again, for the years there are now
+                in_range = len(years) == 0 or (years.min() >= 0 and years.max() <= K.YEARS)
+                cash_flows = CashFlows(years, months, amounts) if in_range else None
+                portfolio.add_item(PortfolioItem([cusip, description, maturity_date, coupon, ask, sp_rating, available],
+                                                 int(quantity), purchase_date, cash_flows))
+        portfolio.file_path = path
+        portfolio.portfolio_changed = False
+        return portfolio
+
+    @classmethod
+    def _read_json(cls, path: str) -> tuple[dict, list[list], list[tuple]]:
+        with open(path, "r") as input_file:
+            document = json.load(input_file)
+        if not isinstance(document, dict): return {}, [], []
+        items = document.get("items", [])
+        snapshots = [[item[field] for field in cls._FIELDS] for item in items]
+        payments = [tuple(zip(*item["payments"])) or ((), (), ()) for item in items]
+        return document, snapshots, payments
+
+    @classmethod
+    def _read_binary(cls, path: str) -> tuple[dict, list[list], list[tuple]]:
+        with np.load(path, allow_pickle=False) as arrays:
+            header = json.loads(str(arrays["header"]))
+            columns = [arrays[field].tolist() for field in cls._FIELDS]
+            offsets = arrays["payment_offsets"]
+            years, months, amounts = arrays["payment_years"], arrays["payment_months"], arrays["payment_amounts"]
+        snapshots = [list(snapshot) for snapshot in zip(*columns)]
+        payments = [(years[start:end], months[start:end], amounts[start:end])
+                    for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+        return header, snapshots, payments
+
+    # endregion
+
+# endregion
@@ -1,6 +1,8 @@
+import datetime
+from typing import Callable
 from financial_utilities.payment_source import PaymentSource
 from financial_utilities.bond import Bond
-import numpy as np
+from financial_utilities.cash_flows import CashFlows
 
 
 # region -------------------------  class  PortfolioItem ---------------------------------#
@@ -8,14 +10,15 @@ import numpy as np
 
 class PortfolioItem(PaymentSource):
     _quantity: int = 0
-    _coupon_matrix = None
+    _coupon_flows = None
 
-    def __init__(self, theList: list[str], quantity: int, purchase_date=None) -> None:
+    def __init__(self, theList: list[str], quantity: int, purchase_date=None, cash_flows: CashFlows | None = None) -> None:
         """
             create a portfolio item from a list of properties
                 :param theList: the list of properties that define a bond
                 :param quantity: the number of shares of the bond to be held in the portfolio
                 :param purchase_date: the date the bond was purchased, if None, use today's date
+                :param cash_flows: the bond's payments for the purchase date when already made, None => make them
         """
         super().__init__(purchase_date)
         self._cusip: str = theList[0]
@@ -34,21 +37,24 @@ class PortfolioItem(PaymentSource):
         self._ask: float = float(theList[4])
         self._sp_rating: str = theList[5]
         self._available: int = int(theList[6])
-        self._payment_schedule: np.ndarray = self.make_payment_schedule()
+        self._cash_flows = cash_flows if cash_flows is not None else self.make_cash_flows()
         self._quantity: int = quantity
-        self._total_interest: float = 0.0
-        self._coupon_matrix = self.make_coupon_matrix()
-        self._total_return_pretax: float
-        self._total_return_posttax: float
-        self._profit: float
 
-        self.calculate_profit()
+        # derived values, made on first use. Profit and returns are per 1000 bonds and
+        # never change, the others are dropped when the quantity changes
+        self._total_percent: float | None = None
+        self._profit_is_calculated: bool = False
+        self._coupon_flows: CashFlows | None = None
+        self._total_cost: float | None = None
+        self._quantity_listeners: list[Callable[['PortfolioItem', int], None]] = []
 
     @classmethod
     def portfolio_item_from_bond(cls, bond: Bond, quantity: int) -> 'PortfolioItem':
         value_list = [bond.cusip, bond.description, bond.maturity_date, bond.coupon,
                       bond.ask, bond.sp_rating, bond.ask_quantity]
-        return cls(value_list, quantity)
+        # a bond of a universe loaded today already has today's payments
+        today = datetime.datetime.now().strftime("%m/%d/%Y")
+        return cls(value_list, quantity, today, bond.cash_flows if bond.purchase_date == today else None)
 
     @classmethod
     def portfolio_item_from_csv(cls, csv_line: list[str], quantity, purchase_date) -> 'PortfolioItem':
@@ -70,13 +76,47 @@ class PortfolioItem(PaymentSource):
 
     @quantity.setter
     def quantity(self, num):
+        for listener in self._quantity_listeners: listener(self, -1)     # take out the old quantity's values
         self._quantity = num
-        self._coupon_matrix = self.make_coupon_matrix()
-        self.calculate_profit()
+        self._coupon_flows = None
+        self._total_cost = None
+        for listener in self._quantity_listeners: listener(self, +1)     # put in the new quantity's values
+
+    def add_quantity_listener(self, listener: Callable[['PortfolioItem', int], None]) -> None:
+        """ listener(item, -1) is called before the quantity changes and listener(item, +1) after """
+        self._quantity_listeners.append(listener)
+
+    def remove_quantity_listener(self, listener: Callable[['PortfolioItem', int], None]) -> None:
+        if listener in self._quantity_listeners: self._quantity_listeners.remove(listener)
+
+    @property
+    def coupon_flows(self) -> CashFlows:
+        if self._coupon_flows is None: self._coupon_flows = self.make_coupon_flows()
+        return self._coupon_flows
 
     @property
     def total_cost(self) -> float:
-        return self.ask / 100 * self.quantity * 1000
+        if self._total_cost is None: self._total_cost = self.ask / 100 * self.quantity * 1000
+        return self._total_cost
+
+    @property
+    def profit(self) -> float:                                      # per 1000 bonds
+        if not self._profit_is_calculated: self.calculate_profit()
+        return self._profit
+
+    @property
+    def total_return_pretax(self) -> float:
+        if not self._profit_is_calculated: self.calculate_profit()
+        return self._total_return_pretax
+
+    @property
+    def total_return_posttax(self) -> float:
+        if not self._profit_is_calculated: self.calculate_profit()
+        return self._total_return_posttax
+
+    def calculate_profit(self) -> None:
+        self._profit_is_calculated = True           # first, calculate_profit reads the returns it sets
+        super().calculate_profit()
 
     @property
     def available(self) -> int:
@@ -87,22 +127,15 @@ class PortfolioItem(PaymentSource):
         return self.total_cost - (self.quantity * 1000)
 
     def total_interest(self, number_bonds: int) -> float:  # multiply by number of shares to get $ interest amount
-        total_percent = self.payment_schedule.sum()
-        return total_percent / 100.0 * float(number_bonds)
+        if self._total_percent is None: self._total_percent = self.cash_flows.sum()
+        return self._total_percent / 100.0 * float(number_bonds)
 
-    def make_coupon_matrix(self) -> np.ndarray:
+    def make_coupon_flows(self) -> CashFlows:
         """
-            make a matrix of actual payments in Year X Month format
-            by applying the quantity of each portfolio item to the
-            elements of the payment schedule
-                :return: the payments matrix
+            make the actual payments by applying the quantity of
+            each portfolio item to the payment schedule events
+                :return: the payments, coupon_matrix is them in Year X Month format
         """
-        # bond_coupons = self.payment_schedule
-        # new_array = bond_coupons.copy()
-        new_array = self.payment_schedule.copy()
-        for (year, month), value in np.ndenumerate(new_array):
-            if value != 0.0:
-                new_array[year, month] = value / 100 * self.quantity * 1000
-        return new_array
+        return self.cash_flows.for_quantity(self.quantity)
 
 # endregion ______________________ PortfolioItem -------------------------------------------#
@@ -0,0 +1,184 @@
+import time
+import numpy as np
+import financial_utilities.constants as K
+from financial_utilities.bond_universe import BondUniverse
+from financial_utilities.bond_index import BondIndex
+from financial_utilities.scoring import Scorer, ScoringProfile
+
+# region ------------------------  class  PortfolioOptimizer ---------------------------------#
+
+
+class PortfolioOptimizer:
+    """
+        Chooses how many of each bond to buy to get the most of an objective for a
+        budget. It solves a bounded knapsack by branch and bound. Quantities are
+        whole lots of the bond's minimum ask quantity, each position is at least
+        K.PORTFOLIO_MIN_QUANTITY bonds, and no position is more than is available.
+        The spend on one issuer is capped.
+
+        Bonds are tried best value per dollar first. The bound on a branch is the
+        fractional knapsack of the bonds still to try, each issuer's share held to
+        what its cap leaves and without the bonds whose smallest position no longer
+        fits, which is never too low and close enough to prove most solutions best.
+        Only the core of the best bonds by value per dollar is searched: the smallest
+        prefix whose availability, up to the issuer cap, covers the budget
+        CORE_BUDGET_MULTIPLE times over, and at most MAX_CORE_SIZE bonds. A cusip
+        listed twice is bought from its first row only. The first solution found is
+        the greedy one. The search stops at the time budget and returns the best
+        solution found by then.
+    """
+
+    OBJECTIVES = ("income", "profit")       # or the name of a scoring profile, see K.ScoringProfiles
+    CORE_BUDGET_MULTIPLE = 4
+    MAX_CORE_SIZE = 400
+
+    def __init__(self, universe: BondUniverse, rows: np.ndarray, objective: str = "profit",
+                 budget: float | None = None, issuer_cap: float | None = None,
+                 time_budget: float | None = None) -> None:
+        """
+            :param universe: the universe holding the bonds
+            :param rows: the rows of the bonds that may be bought
+            :param objective: income | profit | a scoring profile name - what to get the most of
+            :param budget: the most to spend, None => K.PORTFOLIO_TOTAL_COST
+            :param issuer_cap: the most to spend on one issuer, as a fraction of the budget. None => K.PORTFOLIO_ISSUER_CAP
+            :param time_budget: seconds to search for, None => K.OPTIMIZER_TIME_BUDGET
+        """
+        super().__init__()
+        if objective not in self.OBJECTIVES and objective not in K.ScoringProfiles:
+            raise ValueError(f"Unknown objective {objective}, use {', '.join(self.OBJECTIVES + tuple(K.ScoringProfiles))}")
+        self._universe = universe
+        self._rows = np.asarray(rows, dtype=np.intp)
+        self._objective = objective
+        self._budget = K.PORTFOLIO_TOTAL_COST if budget is None else budget
+        self._issuer_cap = (K.PORTFOLIO_ISSUER_CAP if issuer_cap is None else issuer_cap) * self._budget
+        self._time_budget = K.OPTIMIZER_TIME_BUDGET if time_budget is None else time_budget
+        self._timed_out = False
+
+    @property
+    def timed_out(self) -> bool: return self._timed_out
+
+    def values(self) -> np.ndarray:
+        """ the objective value of one bond of each row """
+        universe, rows = self._universe, self._rows
+        if self._objective == "income": return universe["coupon"][rows] / 100 * 1000
+        if self._objective == "profit": return universe["profit"][rows].astype(float)
+        scores = Scorer(universe, rows).scores([ScoringProfile.named(self._objective)])[self._objective]
+        return (scores.max() + 1.0 - scores) if len(scores) else scores      # lower score is better
+
+    # region ------------------------  solving ---------------------------------#
+
+    def solve(self) -> list[tuple[int, int]]:
+        """ :return: (row, quantity) of each bond to buy, best value per dollar first """
+        universe, rows = self._universe, self._rows
+        lot = np.maximum(universe["min_quantity_ask"][rows].astype(np.int64), 1)
+        min_lots = -(-K.PORTFOLIO_MIN_QUANTITY // lot)
+        max_lots = universe["ask_quantity"][rows].astype(np.int64) // lot
+        lot_cost = universe["ask"][rows] * 10.0 * lot
+        lot_value = self.values() * lot
+        usable = (max_lots >= min_lots) & (lot_value > 0) & (lot_cost > 0) & (lot_cost * min_lots <= self._budget)
+        candidates = np.flatnonzero(usable)
+        candidates = candidates[np.argsort(-(lot_value[candidates] / lot_cost[candidates]), kind="stable")]
+
+        # one row per cusip, the first
+        _, first = np.unique(universe["cusip"][rows[candidates]], return_index=True)
+        candidates = candidates[np.sort(first)]
+
+        # the core: enough of the best bonds to cover the budget several times over, within the issuer cap
+        issuers, issuer_capacity, capacity, core_size = [], {}, 0.0, 0
+        for index in candidates:
+            if core_size == self.MAX_CORE_SIZE or capacity >= self._budget * self.CORE_BUDGET_MULTIPLE: break
+            issuer = BondIndex.issuer(str(universe["description"][rows[index]]))
+            spent = issuer_capacity.get(issuer, 0.0)
+            issuer_capacity[issuer] = min(spent + max_lots[index] * lot_cost[index], self._issuer_cap)
+            capacity += issuer_capacity[issuer] - spent
+            issuers.append(issuer)
+            core_size += 1
+        core = candidates[:core_size]
+
+        self._search(lot_cost[core].tolist(), lot_value[core].tolist(), min_lots[core].tolist(),
+                     max_lots[core].tolist(), issuers)
+        return [(int(rows[core[index]]), int(lots * lot[core[index]])) for index, lots in self._best if lots > 0]
+
+    def _search(self, cost: list[float], value: list[float], min_lots: list[int], max_lots: list[int],
+                issuers: list[str]) -> None:
+        n = len(cost)
+        full_cost = [c * most for c, most in zip(cost, max_lots)]
+        min_cost = [c * least for c, least in zip(cost, min_lots)]
+        density = [v / c for v, c in zip(value, cost)]
+
+        def bound(index: int, budget: float) -> float:
+            """
+                the most the bonds from index on could add with budget to spend - the fractional
+                knapsack, best value per dollar first, spending no more on an issuer than its cap leaves
+                and leaving out the bonds whose smallest position no longer fits the budget or the cap
+            """
+            room: dict[str, float] = {}
+            extra, left_to_spend = 0.0, budget
+            for i in range(index, n):
+                if left_to_spend <= 0.0: break
+                issuer = issuers[i]
+                cap_left = self._issuer_cap - issuer_spend.get(issuer, 0.0)
+                if min_cost[i] > budget or min_cost[i] > cap_left: continue
+                spend = min(full_cost[i], room.setdefault(issuer, cap_left), left_to_spend)
+                if spend <= 0.0: continue
+                room[issuer] -= spend
+                left_to_spend -= spend
+                extra += spend * density[i]
+            return extra
+
+        deadline = time.perf_counter() + self._time_budget
+        issuer_spend: dict[str, float] = {}
+        chosen = [0] * n
+        self._best: list[tuple[int, int]] = []
+        best_value = [0.0]
+
+        def search(index: int, budget: float, total: float) -> None:
+            if total > best_value[0]:
+                best_value[0] = total
+                self._best = [(i, lots) for i, lots in enumerate(chosen) if lots > 0]
+            if index >= n: return
+            if time.perf_counter() > deadline:
+                self._timed_out = True
+                return
+            if total + bound(index, budget) <= best_value[0] + 1e-9: return
+            room = min(budget, self._issuer_cap - issuer_spend.get(issuers[index], 0.0))
+            most = min(max_lots[index], int(room // cost[index]))
+            for lots in [*range(most, min_lots[index] - 1, -1), 0]:
+                if lots > 0 and \
+                        total + lots * value[index] + bound(index + 1, budget - lots * cost[index]) <= best_value[0] + 1e-9:
+                    continue        # fewer lots only lower the bound, but 0 lots may still do better
+                spend = lots * cost[index]
+                chosen[index] = lots
+                issuer_spend[issuers[index]] = issuer_spend.get(issuers[index], 0.0) + spend
+                search(index + 1, budget - spend, total + lots * value[index])
+                issuer_spend[issuers[index]] -= spend
+                chosen[index] = 0
+                if self._timed_out: return
+
+        search(0, self._budget, 0.0)
+
+    # endregion
+
+    # region ------------------------  output ---------------------------------#
+
+    def action_line(self, solution: list[tuple[int, int]]) -> str:
+        """ the solution as portfolio builder actions, +cusip:quantity; for each bond """
+        return "".join(f"+{self._universe['cusip'][row]}:{quantity};" for row, quantity in solution)
+
+    def summary(self, solution: list[tuple[int, int]]) -> dict[str, float]:
+        """ cost, yearly income, profit and objective value of a solution """
+        rows = np.array([row for row, _ in solution], dtype=np.intp)
+        quantities = np.array([quantity for _, quantity in solution], dtype=float)
+        universe = self._universe
+        objective_values = dict(zip(self._rows.tolist(), self.values().tolist()))
+        return {
+            "cost": float((universe["ask"][rows] * 10.0 * quantities).sum()),
+            "yearly_income": float((universe["coupon"][rows] / 100 * 1000 * quantities).sum()),
+            "profit": float((universe["profit"][rows] * quantities).sum()),
+            "objective": float(sum(objective_values[row] * quantity for row, quantity in solution)),
+            "bonds": len(solution),
+        }
+
+    # endregion
+
+# endregion
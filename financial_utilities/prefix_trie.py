@@ -0,0 +1,82 @@
+import bisect
+from typing import Iterable, Iterator
+
+# region ------------------------  class  PrefixTrie ---------------------------------#
+
+
+class PrefixTrie:
+    """
+        The keys starting with a prefix, in sorted order - a burst trie. A node is a
+        dict of first character => child, and a child is either a node or a bucket:
+        the sorted list of the rest of the keys under that character. A bucket bursts
+        into a node when it grows past BURST_SIZE, so the common prefixes of many keys
+        (a cusip's six character issuer code, say) are nodes, and the rest of each key
+        is one string in a bucket rather than a node per character. A key ending at
+        a node is marked by the _END entry of the node.
+
+        Keys are added one at a time, so a trie grows as bonds are loaded and is
+        never rebuilt.
+    """
+
+    BURST_SIZE = 64
+    _END = ""           # sorts before every character, so a key comes before the longer keys it begins
+
+    def __init__(self, keys: Iterable[str] = ()) -> None:
+        super().__init__()
+        self._root: dict = {}
+        self._count = 0
+        for key in keys: self.add(key)
+
+    def __len__(self) -> int: return self._count
+
+    def __contains__(self, key: str) -> bool: return next(self.keys_with_prefix(key), None) == key
+
+    def add(self, key: str) -> None:
+        if self._insert(self._root, key): self._count += 1
+
+    def _insert(self, node: dict, rest: str) -> bool:
+        """ :return: whether the key was new """
+        while rest:
+            child = node.get(rest[0])
+            if child is None:
+                node[rest[0]] = [rest[1:]]
+                return True
+            if isinstance(child, dict):
+                node, rest = child, rest[1:]
+                continue
+            suffix = rest[1:]
+            at = bisect.bisect_left(child, suffix)
+            if at < len(child) and child[at] == suffix: return False
+            child.insert(at, suffix)
+            if len(child) > self.BURST_SIZE:
+                burst = {}
+                for key in child: self._insert(burst, key)
+                node[rest[0]] = burst
+            return True
+        if self._END in node: return False
+        node[self._END] = None
+        return True
+
+    def keys_with_prefix(self, prefix: str) -> Iterator[str]:
+        """ the keys starting with the prefix, in sorted order, made as they are taken """
+        node = self._root
+        for depth, character in enumerate(prefix):
+            child = node.get(character)
+            if child is None: return
+            if isinstance(child, list):
+                start, rest = prefix[:depth + 1], prefix[depth + 1:]
+                for index in range(bisect.bisect_left(child, rest), len(child)):
+                    if not child[index].startswith(rest): return
+                    yield start + child[index]
+                return
+            node = child
+        yield from self._keys(node, prefix)
+
+    def _keys(self, node: dict, start: str) -> Iterator[str]:
+        for character in sorted(node):
+            child = node[character]
+            if character == self._END: yield start
+            elif isinstance(child, list): yield from (start + character + rest for rest in child)
+            else: yield from self._keys(child, start + character)
+
+# endregion
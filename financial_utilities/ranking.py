@@ -0,0 +1,107 @@
+import numpy as np
+import financial_utilities.constants as K
+from financial_utilities.bond_universe import BondUniverse
+
+# region ------------------------  ranking functions ---------------------------------#
+
+
+def dense_ranks(values: np.ndarray) -> np.ndarray:
+    """
+        rank values highest first: the highest value is rank 1, equal values share
+        a rank and the ranks have no gaps
+            :return: the rank of each value
+    """
+    unique_values, inverse = np.unique(values, return_inverse=True)
+    return (len(unique_values) - inverse.reshape(-1)).astype(np.int32)
+
+# endregion
+
+# region ------------------------  class  RankedBonds ---------------------------------#
+
+
+class RankedBonds:
+    """
+        The bonds of a ranking, best first, as a sequence of Bond views over universe
+        rows - no list of Bond objects is built.
+
+        Given the ranks, the order is found lazily: only the best bonds are selected
+        (np.argpartition) and sorted, and more are selected when a consumer goes past
+        them, at least doubling the selection each time. Printing the top
+        K.NUMBER_RANKED_BONDS_TO_PRINT bonds or recommending one of the first few
+        costs in proportion to K, not a sort of the whole group. Bonds of equal rank
+        keep their order in the group, as a stable sort of the whole group would.
+    """
+
+    INITIAL_SELECTION = 2 * K.NUMBER_RANKED_BONDS_TO_PRINT
+
+    def __init__(self, universe: BondUniverse, rows: np.ndarray, ranks: np.ndarray | None = None) -> None:
+        """
+            :param universe: the universe holding the bonds
+            :param rows: the universe rows of the bonds - in rank order when ranks is None
+            :param ranks: the rank of each of the rows, lower is better. None => rows are already in order
+        """
+        super().__init__()
+        self._universe = universe
+        rows = np.asarray(rows, dtype=np.intp)
+        self._length = len(rows)
+        if ranks is None:
+            self._selected = rows
+            self._candidates = self._keys = self._remaining = None
+        else:
+            self._selected = np.zeros(0, dtype=np.intp)
+            self._candidates = rows
+            # rank, then position in the group - unique keys that sort as a stable sort of the ranks
+            self._keys = np.asarray(ranks, dtype=np.int64) * max(self._length, 1) + np.arange(self._length)
+            self._remaining = np.arange(self._length)
+
+    @property
+    def universe(self) -> BondUniverse: return self._universe
+
+    @property
+    def selected_count(self) -> int: return len(self._selected)
+
+    @property
+    def rows(self) -> np.ndarray:
+        """ every row in rank order - this sorts the whole ranking """
+        self._select(self._length)
+        return self._selected
+
+    def prefix(self, count: int) -> np.ndarray:
+        """ the rows of the best count bonds, in rank order """
+        self._select(count)
+        return self._selected[:count]
+
+    def _select(self, count: int) -> None:
+        """ make sure the best count bonds are selected and in order """
+        count = min(count, self._length)
+        if count <= len(self._selected): return
+        wanted = max(count - len(self._selected), len(self._selected), self.INITIAL_SELECTION)
+        remaining_keys = self._keys[self._remaining]
+        if wanted < len(self._remaining):
+            best = np.argpartition(remaining_keys, wanted - 1)[:wanted]
+            best = best[np.argsort(remaining_keys[best])]
+        else:
+            best = np.argsort(remaining_keys)
+        self._selected = np.concatenate((self._selected, self._candidates[self._remaining[best]]))
+        self._remaining = np.delete(self._remaining, best)
+
+    def __len__(self) -> int: return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            self._select(max(start, stop) if step > 0 else start + 1)
+            return [self._universe.bond(row) for row in self._selected[index]]
+        if index < 0: index += self._length
+        if not 0 <= index < self._length: raise IndexError("ranked bond index out of range")
+        self._select(index + 1)
+        return self._universe.bond(self._selected[index])
+
+    def __iter__(self):
+        position = 0
+        while position < self._length:
+            self._select(position + 1)
+            for row in self._selected[position:]: yield self._universe.bond(row)
+            position = len(self._selected)
+
+# endregion
@@ -0,0 +1,108 @@
+import numpy as np
+import financial_utilities.constants as K
+from financial_utilities.bond_universe import BondUniverse
+from financial_utilities.ranking import dense_ranks
+
+# region ------------------------  features ---------------------------------#
+
+"""
+    A feature is a column-wise value of a bond where higher is better. Each is
+    ranked over the bonds being scored (1 = best, equal values share a rank) and a
+    scoring profile adds up the feature ranks it uses, weighted - the lower the
+    score the better the bond. The composite rank is the profile with income
+    and profit weighted 1 each, income_rank + profit_rank.
+"""
+
+
+def _years_to_maturity(universe: BondUniverse, rows: np.ndarray) -> np.ndarray:
+    return (universe["maturity_year"][rows] - universe.purchase_year) + \
+           (universe["maturity_month"][rows] - universe.purchase_month) / 12.0
+
+
+FEATURES = {
+    "yearly_income": lambda universe, rows: universe["coupon"][rows] / 100 * 1000,     # per 1000 bonds
+    "profit": lambda universe, rows: universe["profit"][rows],                          # per 1000 bonds
+    "ask_yield": lambda universe, rows: universe["ask_yield_maturity"][rows],
+    "rating": lambda universe, rows: universe["sp_rating_value"][rows],
+    "short_maturity": lambda universe, rows: -_years_to_maturity(universe, rows),
+    "call_protected": lambda universe, rows: ~universe["callable"][rows],
+}
+
+# endregion
+
+# region ------------------------  class  ScoringProfile ---------------------------------#
+
+
+class ScoringProfile:
+    """ a named set of feature weights, see K.ScoringProfiles """
+
+    def __init__(self, name: str, weights: dict[str, float]) -> None:
+        super().__init__()
+        unknown = [feature for feature in weights if feature not in FEATURES]
+        if unknown: raise ValueError(f"Scoring profile {name}: unknown features {unknown}, use {list(FEATURES)}")
+        self._name = name
+        self._weights = dict(weights)
+
+    @classmethod
+    def named(cls, name: str) -> 'ScoringProfile':
+        if name not in K.ScoringProfiles:
+            raise KeyError(f"No scoring profile {name}, the profiles are {list(K.ScoringProfiles)}")
+        return cls(name, K.ScoringProfiles[name])
+
+    @property
+    def name(self) -> str: return self._name
+
+    @property
+    def weights(self) -> dict[str, float]: return self._weights
+
+    def __repr__(self) -> str:
+        return f"{self._name}: " + " + ".join(f"{weight} {feature}" for feature, weight in self._weights.items())
+
+# endregion
+
+# region ------------------------  class  Scorer ---------------------------------#
+
+
+class Scorer:
+    """
+        Scores rows of a universe with scoring profiles. Each feature is ranked once,
+        however many profiles use it, and the profiles are scored together as one
+        (profiles X features) @ (features X bonds) product.
+    """
+
+    def __init__(self, universe: BondUniverse, rows: np.ndarray) -> None:
+        super().__init__()
+        self._universe = universe
+        self._rows = rows
+        self._feature_ranks: dict[str, np.ndarray] = {}
+
+    def feature_ranks(self, feature: str) -> np.ndarray:
+        if feature not in self._feature_ranks:
+            self._feature_ranks[feature] = dense_ranks(FEATURES[feature](self._universe, self._rows))
+        return self._feature_ranks[feature]
+
+    def scores(self, profiles: list[ScoringProfile]) -> dict[str, np.ndarray]:
+        """ :return: profile name => the score of each row, lower is better """
+        features = list(dict.fromkeys(feature for profile in profiles for feature in profile.weights))
+        if not features or len(self._rows) == 0:
+            return {profile.name: np.zeros(len(self._rows)) for profile in profiles}
+        ranks = np.stack([self.feature_ranks(feature) for feature in features]).astype(float)
+        weights = np.array([[profile.weights.get(feature, 0.0) for feature in features] for profile in profiles], float)
+        scores = weights @ ranks
+        return {profile.name: scores[index] for index, profile in enumerate(profiles)}
+
+    def profile_ranks(self, profiles: list[ScoringProfile]) -> dict[str, np.ndarray]:
+        """ :return: profile name => the rank of each row by its score, 1 = best, equal scores share a rank """
+        return {name: dense_ranks(-scores) for name, scores in self.scores(profiles).items()}
+
+    def rank_rows(self) -> None:
+        """
+            write the income, profit and composite rank columns of the rows, the
+            composite rank is the score of the K.COMPOSITE_PROFILE profile
+        """
+        composite = self.scores([ScoringProfile.named(K.COMPOSITE_PROFILE)])[K.COMPOSITE_PROFILE]
+        self._universe["income_rank"][self._rows] = self.feature_ranks("yearly_income")
+        self._universe["profit_rank"][self._rows] = self.feature_ranks("profit")
+        self._universe["composite_rank"][self._rows] = np.rint(composite)
+
+# endregion
@@ -0,0 +1,88 @@
+import numpy as np
+from financial_utilities.bond_universe import BondUniverse
+from financial_utilities.scoring import FEATURES
+
+# region ------------------------  skyline ---------------------------------#
+
+"""
+    The skyline (Pareto frontier) of a set of bonds: the bonds no other bond beats.
+    One bond dominates another when it is at least as good on every axis and better
+    on at least one, higher being better on every axis as for the scoring features.
+
+    The points are sorted best first on the first axis, so every bond that could
+    dominate a point comes before it. A sweep then keeps, in a Fenwick tree indexed
+    by the second axis, the best third axis value seen so far - a point is dominated
+    when an earlier point is at least as good on the second and third axes. That is
+    O(n log n) rather than comparing every pair of bonds.
+"""
+
+
+class _MaxFenwickTree:
+    """ prefix maximum over positions 0..n-1, values only increase """
+
+    def __init__(self, size: int) -> None:
+        self._tree = [-np.inf] * (size + 1)
+
+    def update(self, position: int, value: float) -> None:
+        position += 1
+        tree = self._tree
+        while position < len(tree):
+            if value > tree[position]: tree[position] = value
+            position += position & -position
+
+    def prefix_max(self, position: int) -> float:
+        """ the maximum over positions 0..position """
+        position += 1
+        tree = self._tree
+        best = -np.inf
+        while position > 0:
+            if tree[position] > best: best = tree[position]
+            position -= position & -position
+        return best
+
+
+def skyline_mask(points: np.ndarray) -> np.ndarray:
+    """
+        the non-dominated points
+            :param points: n X 2 or n X 3 array, higher is better on every axis
+            :return: True for each point no other point dominates
+    """
+    points = np.asarray(points, dtype=float)
+    n, axes = points.shape
+    if axes == 2: points = np.column_stack((points, np.zeros(n)))
+    elif axes != 3: raise ValueError(f"a skyline needs 2 or 3 axes, not {axes}")
+    if n == 0: return np.zeros(0, dtype=bool)
+
+    # best first on the first axis, then the second, then the third - a dominating point is always earlier
+    order = np.lexsort((-points[:, 2], -points[:, 1], -points[:, 0]))
+    # position 0 is the best second axis value, so points at least as good on it are a prefix
+    unique_second, second_position = np.unique(-points[:, 1], return_inverse=True)
+    second_position = second_position.reshape(-1)
+    tree = _MaxFenwickTree(len(unique_second))
+    dominated = np.zeros(n, dtype=bool)
+
+    start = 0
+    while start < n:
+        # identical points don't dominate each other - test them all before any is added
+        end = start + 1
+        while end < n and np.array_equal(points[order[end]], points[order[start]]): end += 1
+        point = order[start]
+        is_dominated = tree.prefix_max(second_position[point]) >= points[point, 2]
+        for index in order[start:end]:
+            dominated[index] = is_dominated
+            if not is_dominated: tree.update(second_position[index], points[index, 2])
+        start = end
+    return ~dominated
+
+
+def skyline_rows(universe: BondUniverse, rows: np.ndarray, axes: tuple[str, ...]) -> np.ndarray:
+    """
+        the rows of the universe on the skyline of the axes
+            :param axes: 2 or 3 scoring feature names, see scoring.FEATURES
+    """
+    unknown = [axis for axis in axes if axis not in FEATURES]
+    if unknown: raise ValueError(f"Skyline: unknown axes {unknown}, use {list(FEATURES)}")
+    points = np.column_stack([FEATURES[axis](universe, rows).astype(float) for axis in axes])
+    return rows[skyline_mask(points)]
+
+# endregion
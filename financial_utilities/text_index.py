@@ -0,0 +1,215 @@
+import bisect
+import itertools
+import re
+from typing import Hashable, Iterable, Sequence
+import numpy as np
+
+# region ------------------------  class  TextIndex ---------------------------------#
+
+
+class TextIndex:
+    """
+        An inverted index over the words of bond descriptions: word => entries whose
+        description holds it. As with BondIndex, an entry is whatever the owner uses
+        to find a bond - a row of a BondUniverse for a BondGroup, the PortfolioItem
+        for a Portfolio - and the owner adds and removes entries as its contents change.
+
+        A word is a run of letters or a number, so 'WHOLE4.25000%' is WHOLE and 4.25000.
+        Each word of a query matches the words that start with it, and an entry
+        matches when every word of the query does. Matches are ranked by how many
+        query words are whole words of the description, then in the order they were
+        added. The words are kept sorted for the prefix lookups, resorted only after
+        a new word is added.
+    """
+
+    _WORD = re.compile(r"[A-Z]+|[0-9]+(?:\.[0-9]+)?")
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._postings: dict[str, dict[Hashable, None]] = {}   # word => entries, in the order they were added
+        self._words: dict[Hashable, tuple[str, ...]] = {}      # entry => its words, for remove
+        self._order: dict[Hashable, int] = {}
+        self._added = 0
+        self._vocabulary: list[str] | None = None             # the words, sorted, made on use
+
+    @classmethod
+    def words(cls, text: str) -> list[str]:
+        return cls._WORD.findall(text.upper())
+
+    # region ------------------------  maintenance ---------------------------------#
+
+    def add(self, entry: Hashable, description: str) -> None:
+        if entry in self._words: return
+        words = tuple(dict.fromkeys(self.words(description)))
+        self._words[entry] = words
+        self._order[entry] = self._added
+        self._added += 1
+        for word in words:
+            entries = self._postings.get(word)
+            if entries is None:
+                entries = self._postings[word] = {}
+                self._vocabulary = None
+            entries[entry] = None
+
+    def add_all(self, entries: Iterable[Hashable], descriptions: Iterable[str]) -> None:
+        for entry, description in zip(entries, descriptions): self.add(entry, str(description))
+
+    def remove(self, entry: Hashable) -> None:
+        words = self._words.pop(entry, None)
+        if words is None: return
+        del self._order[entry]
+        for word in words:
+            entries = self._postings[word]
+            del entries[entry]
+            if not entries:
+                del self._postings[word]
+                self._vocabulary = None
+
+    def clear(self) -> None:
+        self.__init__()
+
+    # endregion
+
+    # region ------------------------  lookup ---------------------------------#
+
+    def __len__(self) -> int: return len(self._words)
+
+    def _matching(self, term: str) -> list[tuple[dict[Hashable, None], int]]:
+        """ (entries, 2 for the word itself | 1 for a longer word) of each word starting with the term """
+        if self._vocabulary is None: self._vocabulary = sorted(self._postings)
+        vocabulary = self._vocabulary
+        matching = []
+        for index in range(bisect.bisect_left(vocabulary, term), len(vocabulary)):
+            word = vocabulary[index]
+            if not word.startswith(term): break
+            matching.append((self._postings[word], 2 if word == term else 1))
+        return matching
+
+    @staticmethod
+    def _merged(matching: list[tuple[dict[Hashable, None], int]]) -> dict[Hashable, int]:
+        """ entry => its best weight over the words of a term """
+        weights = {}
+        for entries, weight in matching:
+            for entry in entries:
+                if weights.get(entry, 0) < weight: weights[entry] = weight
+        return weights
+
+    def search(self, query: str) -> list[Hashable]:
+        """
+            :param query: words, each matching the words of a description that start with it
+            :return: the entries matching every word of the query, best first
+        """
+        terms = [self._matching(term) for term in dict.fromkeys(self.words(query))]
+        if not terms or not all(terms): return []
+        terms.sort(key=lambda matching: sum(len(entries) for entries, _ in matching))
+
+        # the entries of the rarest term, then keep those every other term matches too
+        first = terms[0]
+        scores = dict.fromkeys(first[0][0], first[0][1]) if len(first) == 1 else self._merged(first)
+        for matching in terms[1:]:
+            if len(matching) == 1:
+                entries, weight = matching[0]
+                scores = {entry: score + weight for entry, score in scores.items() if entry in entries}
+            elif sum(len(entries) for entries, _ in matching) < len(scores) * len(matching):
+                weights = self._merged(matching)
+                scores = {entry: score + weights[entry] for entry, score in scores.items() if entry in weights}
+            else:
+                kept = {}
+                for entry, score in scores.items():
+                    weight = max((weight for entries, weight in matching if entry in entries), default=0)
+                    if weight: kept[entry] = score + weight
+                scores = kept
+
+        if len(first) == 1 and len(set(scores.values())) <= 1: return list(scores)     # already in added order
+        order = self._order
+        return sorted(scores, key=lambda entry: (-scores[entry], order[entry]))
+
+    # endregion
+
+# endregion
+
+# region ------------------------  class  UniverseTextIndex ---------------------------------#
+
+
+class UniverseTextIndex:
+    """
+        The TextIndex of a whole universe's descriptions, made once as arrays rather
+        than added to bond by bond - entries are rows and the words and ranking are
+        those of TextIndex. The distinct words are sorted, and the rows holding each
+        word follow one another in one array, so the words starting with a query word
+        are a range of the vocabulary and their rows one slice. A query takes the rows
+        of its rarest word and keeps those the other words' slices hold, by binary
+        search of a slice when there are few rows to look for, or a mask of it.
+    """
+
+    _END = "\x00"                  # ends each description in the text tokenized at once
+    _TOKEN = re.compile(r"[A-Z]+|[0-9]+(?:\.[0-9]+)?|\x00")  # TextIndex's words, and _END
+    _PAST_PREFIX = "\x7f"          # after every character of a word, so term + _PAST_PREFIX ends the words starting with term
+
+    def __init__(self, descriptions: Sequence[str]) -> None:
+        super().__init__()
+        count = len(descriptions)
+        # the words of all the descriptions in one pass, each description ended by an _END token
+        text = self._END.join(map(str, descriptions)) + self._END if count else ""
+        tokens = self._TOKEN.findall(text.upper())
+        numbers: dict[str, int] = {self._END: 0}    # token => its number in the order first seen
+        token_numbers = np.fromiter(map(lambda token: numbers.setdefault(token, len(numbers)), tokens),
+                                    dtype=np.int64, count=len(tokens))
+        ends = token_numbers == 0
+        rows = np.cumsum(ends) - ends           # the description of each token
+        vocabulary = sorted(numbers)[1:]        # _END sorts before every word
+        sorted_number = np.empty(len(numbers), dtype=np.int64)
+        sorted_number[[numbers[word] for word in vocabulary]] = np.arange(len(vocabulary))
+        # (word, row) pairs sorted by word then row, a word held twice by a row only once
+        pairs = np.sort(sorted_number[token_numbers[~ends]] * max(count, 1) + rows[~ends])
+        pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))] if len(pairs) else pairs
+        self._vocabulary = np.array(vocabulary, dtype=str)
+        self._rows = (pairs % max(count, 1)).astype(np.intp)
+        self._offsets = np.searchsorted(pairs // max(count, 1), np.arange(len(vocabulary) + 1))
+        self._count = count
+
+    def __len__(self) -> int: return self._count
+
+    def search(self, query: str) -> np.ndarray:
+        """
+            :param query: words, each matching the words of a description that start with it
+            :return: the rows matching every word of the query, best first
+        """
+        terms = list(dict.fromkeys(TextIndex.words(query)))
+        slices = []         # (rows of the words starting with the term, rows of the term itself, number of words) of each term
+        for term in terms:
+            first, end = np.searchsorted(self._vocabulary, [term, term + self._PAST_PREFIX])
+            if first == end: return np.empty(0, dtype=np.intp)
+            exact = self._vocabulary[first] == term
+            slices.append((self._rows[self._offsets[first]:self._offsets[end]],
+                           self._rows[self._offsets[first]:self._offsets[first + 1] if exact else self._offsets[first]],
+                           end - first))
+        if not slices: return np.empty(0, dtype=np.intp)
+
+        # the rows of the rarest term, then keep those every other term matches too
+        slices.sort(key=lambda matched: len(matched[0]))
+        prefixed, _, words = slices[0]
+        candidates = prefixed if words == 1 else np.flatnonzero(self._mask(prefixed))
+        scores = np.zeros(len(candidates), dtype=np.int16)
+        for number, (prefixed, exact, words) in enumerate(slices):
+            if number > 0:
+                found = self._holds(prefixed, words == 1, candidates)
+                candidates, scores = candidates[found], scores[found]
+            scores += 1 + self._holds(exact, True, candidates)
+        # a matching row scores between 1 and 2 for each term, rows of one score are already in order
+        return np.concatenate([candidates[scores == score] for score in range(2 * len(slices), len(slices) - 1, -1)])
+
+    def _mask(self, rows: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self._count, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def _holds(self, rows: np.ndarray, rows_sorted: bool, candidates: np.ndarray) -> np.ndarray:
+        """ whether each candidate is one of the rows - by binary search when there are few candidates """
+        if len(rows) == 0: return np.zeros(len(candidates), dtype=bool)
+        if rows_sorted and len(candidates) * 8 < len(rows):
+            return rows[np.minimum(np.searchsorted(rows, candidates), len(rows) - 1)] == candidates
+        return self._mask(rows)[candidates]
+
+# endregion
+
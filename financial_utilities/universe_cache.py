@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import financial_utilities.constants as K
+
+# region ------------------------  class  UniverseCache ---------------------------------#
+
+
+class UniverseCache:
+    """
+        On-disk cache of a parsed and ranked bond universe, kept in a directory
+        next to the bond csv file.  An entry is a directory of .npy files, one per
+        array, so a warm start memory maps the arrays instead of parsing the csv.
+        Entries are keyed by the csv file's content hash plus every setting that
+        changes what is loaded or how it is ranked; entries with any other key are
+        stale and are deleted when a new entry is saved.
+    """
+
+    FORMAT_VERSION = 3          # bump when the set of cached arrays changes
+
+    def __init__(self, csv_file_path: str, settings: dict) -> None:
+        """
+            :param csv_file_path: the bond csv file being cached
+            :param settings: name => value of everything else the cached data depends on
+        """
+        super().__init__()
+        self._csv_file_path = csv_file_path
+        directory, name = os.path.split(os.path.abspath(csv_file_path))
+        self._cache_directory = os.path.join(directory, f".{name}.cache")
+        self._settings = dict(settings, format_version=self.FORMAT_VERSION)
+        self._key = None
+
+    @staticmethod
+    def current_settings(max_year: int, exclusions: list[str], purchase_date: str) -> dict:
+        """ the constants.py settings (and inputs) that change the loaded and ranked universe """
+        return {
+            "MAX_YEAR": max_year,
+            "CALL_PROTECTED": K.CALL_PROTECTED,
+            "USE_EXCLUSIONS": K.USE_EXCLUSIONS,
+            "BEGINNING_YEAR": K.BEGINNING_YEAR,
+            "YEARS": K.YEARS,
+            "TAX_RATE": K.TAX_RATE,
+            "IS_TAXABLE": K.IS_TAXABLE,
+            "COMPOSITE_PROFILE": K.ScoringProfiles.get(K.COMPOSITE_PROFILE),
+            "exclusions": [exclusions, K.EXCLUDE_WHOLE_WORDS, K.EXCLUDE_IGNORE_CASE] if K.USE_EXCLUSIONS else [],
+            "purchase_date": purchase_date,         # first year coupons depend on the purchase date
+        }
+
+    @property
+    def key(self) -> str:
+        if self._key is None:
+            digest = hashlib.sha256()
+            with open(self._csv_file_path, "rb") as csv_file:
+                for block in iter(lambda: csv_file.read(1 << 20), b""):
+                    digest.update(block)
+            digest.update(json.dumps(self._settings, sort_keys=True).encode())
+            self._key = digest.hexdigest()[:32]
+        return self._key
+
+    @property
+    def entry_directory(self) -> str: return os.path.join(self._cache_directory, self.key)
+
+    def load(self) -> tuple[dict[str, np.ndarray], dict] | None:
+        """
+            :return: (name => array, metadata) of the current entry, or None on a miss.
+                     Arrays are memory mapped copy-on-write, so they can be changed in memory
+        """
+        meta_path = os.path.join(self.entry_directory, "meta.json")
+        if not os.path.exists(meta_path): return None
+        try:
+            with open(meta_path, "r") as meta_file:
+                meta = json.load(meta_file)
+            arrays = {name: np.load(os.path.join(self.entry_directory, f"{name}.npy"), mmap_mode="c")
+                      for name in meta["arrays"]}
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable bond cache {self.entry_directory}: {e}")
+            return None
+        return arrays, meta["data"]
+
+    def save(self, arrays: dict[str, np.ndarray], data: dict) -> None:
+        """
+            write a new entry for the current key and evict every other entry
+                :param arrays: name => array to cache
+                :param data: small json serializable metadata returned by load
+        """
+        os.makedirs(self._cache_directory, exist_ok=True)
+        temporary = os.path.join(self._cache_directory, f"{self.key}.tmp")
+        shutil.rmtree(temporary, ignore_errors=True)
+        os.makedirs(temporary)
+        for name, array in arrays.items():
+            np.save(os.path.join(temporary, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+        with open(os.path.join(temporary, "meta.json"), "w") as meta_file:
+            json.dump({"arrays": list(arrays), "settings": self._settings, "data": data}, meta_file)
+
+        shutil.rmtree(self.entry_directory, ignore_errors=True)
+        os.replace(temporary, self.entry_directory)
+        self.evict_stale_entries()
+
+    def evict_stale_entries(self) -> None:
+        for entry in os.listdir(self._cache_directory):
+            if entry != self.key:
+                shutil.rmtree(os.path.join(self._cache_directory, entry), ignore_errors=True)
+
+# endregion
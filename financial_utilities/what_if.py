@@ -0,0 +1,108 @@
+import numpy as np
+from financial_utilities.bond import BondGroup
+from financial_utilities.cash_flows import CashFlows
+from financial_utilities.payment_schedules import universe_cash_flow_events
+from financial_utilities.portfolio import Portfolio
+
+# region ------------------------  class  WhatIfDeltas ---------------------------------#
+
+
+class WhatIfDeltas:
+    """
+        What each of a batch of candidate trades would change in a portfolio, one
+        entry per trade. The income matrices are trades X years X months.
+    """
+
+    def __init__(self, cusips: list[str], quantity: np.ndarray, cost: np.ndarray, yearly_income: np.ndarray,
+                 profit: np.ndarray, income_matrix: np.ndarray) -> None:
+        super().__init__()
+        self.cusips = cusips
+        self.quantity = quantity
+        self.cost = cost
+        self.yearly_income = yearly_income
+        self.profit = profit
+        self.income_matrix = income_matrix
+
+    @property
+    def total_interest(self) -> np.ndarray: return self.income_matrix.reshape(len(self.cusips), -1).sum(axis=1)
+
+    def __len__(self) -> int: return len(self.cusips)
+
+    def print_deltas(self) -> None:
+        print(f"\n{'what if':<18}{'quantity':>10}{'yearly income':>16}{'total interest':>16}{'cost':>16}{'profit':>16}")
+        total_interest = self.total_interest
+        for index, cusip in enumerate(self.cusips):
+            print(f"{cusip:<18}{self.quantity[index]:>+10}{self.yearly_income[index]:>+16,.2f}"
+                  f"{total_interest[index]:>+16,.2f}{self.cost[index]:>+16,.2f}{self.profit[index]:>+16,.2f}")
+
+# endregion
+
+# region ------------------------  class  WhatIf ---------------------------------#
+
+
+class WhatIf:
+    """
+        Scores candidate trades against a portfolio without changing it - no item is
+        made, no quantity set and nothing is added to the removed bonds, so later
+        recommendations are as they would have been. A trade is a bond and the
+        quantity the portfolio would hold after it: more than it holds is an add or
+        an increase, less is a decrease and 0 removes the bond.
+
+        The deltas of the whole batch are made at once: quantity, cost, income and
+        profit changes as column arithmetic, and the income matrices by adding the
+        trades' payment events into one trades X years X months array. Bonds held
+        use the payments of their portfolio item, bonds not held the universe's.
+    """
+
+    def __init__(self, portfolio: Portfolio, bond_group: BondGroup) -> None:
+        super().__init__()
+        self._portfolio = portfolio
+        self._bond_group = bond_group
+
+    def evaluate(self, cusips: list[str], quantities: list[int] | np.ndarray) -> WhatIfDeltas:
+        """
+            :param cusips: the bond of each trade
+            :param quantities: the quantity of the bond the portfolio would hold after each trade
+            :return: the change each trade would make, on its own, to the portfolio's totals
+        """
+        if len(cusips) != len(quantities): raise ValueError("what if needs a quantity for each cusip")
+        count = len(cusips)
+        held = [self._portfolio.find_portfolio_item_by_cusip(cusip) for cusip in cusips]
+        bonds = [None if item is not None else self._bond_group.find_bond(cusip) for cusip, item in zip(cusips, held)]
+        unknown = [cusip for cusip, item, bond in zip(cusips, held, bonds) if item is None and bond is None]
+        if unknown: raise KeyError(f"what if: no bond {', '.join(unknown)}")
+
+        current = np.array([item.quantity if item is not None else 0 for item in held], dtype=np.int64)
+        change = np.asarray(quantities, dtype=np.int64) - current
+        # per 1000 bonds values, from the universe's columns for bonds not held and the items for bonds held
+        universe = self._bond_group.universe
+        new = np.array([index for index, bond in enumerate(bonds) if bond is not None], dtype=np.intp)
+        rows = np.array([bonds[index].row for index in new], dtype=np.intp)
+        ask, yearly_income, profit = np.zeros(count), np.zeros(count), np.zeros(count)
+        ask[new], yearly_income[new], profit[new] = universe["ask"][rows], universe["coupon"][rows] / 100 * 1000, \
+            universe["profit"][rows]
+        for index, item in enumerate(held):
+            if item is not None: ask[index], yearly_income[index], profit[index] = item.ask, item.yearly_income, item.profit
+
+        # payment events as percent of par, trade by trade, then scaled by each trade's change
+        trades, years, months, amounts = self._events(held, new, rows)
+        income_matrix = np.zeros((count,) + CashFlows.SHAPE, float)
+        np.add.at(income_matrix, (trades, years, months), amounts / 100 * change[trades] * 1000)
+        return WhatIfDeltas(list(cusips), change, ask / 100 * change * 1000, yearly_income * change,
+                            profit * change, income_matrix)
+
+    def _events(self, held: list, new: np.ndarray, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """ (trade, year, month, amount) of the payments of every trade's bond, new are the trades of the rows """
+        positions, years, months, amounts = universe_cash_flow_events(self._bond_group.universe, rows)
+        parts = [(new[positions], years, months, amounts)]
+        for index, item in enumerate(held):
+            if item is None: continue
+            flows = item.cash_flows
+            parts.append((np.full(len(flows), index, dtype=np.intp), flows.years, flows.months, flows.amounts))
+        return tuple(np.concatenate([part[field] for part in parts]) for field in range(4))
+
+    def income_matrix_after(self, deltas: WhatIfDeltas, trade: int) -> np.ndarray:
+        """ the portfolio's combined income matrix as it would be after one of the trades """
+        return self._portfolio.get_combined_income_matrix() + deltas.income_matrix[trade]
+
+# endregion
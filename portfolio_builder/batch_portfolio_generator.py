@@ -0,0 +1,150 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import financial_utilities.constants as K
+from financial_utilities.bond import BondGroup
+from financial_utilities.bond_universe import BondUniverse
+from financial_utilities.portfolio_optimizer import PortfolioOptimizer
+
+# region ------------------------  class  BatchCandidate ---------------------------------#
+
+
+class BatchCandidate:
+    """ one portfolio of a batch: an objective at a budget with bonds maturing by max_year """
+
+    def __init__(self, objective: str, budget: float, max_year: int) -> None:
+        super().__init__()
+        self.objective = objective
+        self.budget = budget
+        self.max_year = max_year
+
+    @property
+    def name(self) -> str: return f"{self.objective}_{int(self.budget)}_{self.max_year}"
+
+    @property
+    def title(self) -> str: return f"{self.objective.capitalize()} ${self.budget:,.0f} to {self.max_year}"
+
+# endregion
+
+# region ------------------------  class  BatchResult ---------------------------------#
+
+
+class BatchResult:
+    """ the optimized portfolio of a BatchCandidate """
+
+    def __init__(self, candidate: BatchCandidate, action_line: str, summary: dict[str, float], timed_out: bool) -> None:
+        super().__init__()
+        self.candidate = candidate
+        self.action_line = action_line
+        self.summary = summary
+        self.timed_out = timed_out
+
+# endregion
+
+# region ------------------------  worker ---------------------------------#
+
+"""
+    Each worker process memory maps the arrays of the universe read-only, so the
+    parsed universe is shared through the page cache rather than copied or pickled
+    per worker, and it is loaded once per worker rather than once per candidate.
+"""
+
+_shared_universe: BondUniverse | None = None
+_shared_rows: np.ndarray | None = None
+
+
+def _load_shared_universe(directory: str, purchase_date: str, names: list[str]) -> None:
+    global _shared_universe, _shared_rows
+    columns = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in names}
+    _shared_universe = BondUniverse(columns, purchase_date)
+    _shared_rows = np.load(os.path.join(directory, "rows.npy"), mmap_mode="r")
+
+
+def _build_candidate(candidate: BatchCandidate, time_budget: float) -> BatchResult:
+    rows = _shared_rows[_shared_universe["maturity_year"][_shared_rows] <= candidate.max_year]
+    optimizer = PortfolioOptimizer(_shared_universe, rows, candidate.objective, candidate.budget,
+                                   time_budget=time_budget)
+    solution = optimizer.solve()
+    return BatchResult(candidate, optimizer.action_line(solution), optimizer.summary(solution), optimizer.timed_out)
+
+# endregion
+
+# region ------------------------  class  BatchPortfolioGenerator ---------------------------------#
+
+
+class BatchPortfolioGenerator:
+    """
+        Optimizes a sweep of portfolios - every objective at every budget with every
+        maturity cap - on a process pool. Each portfolio is written as a .pflo file
+        and the batch as a summary table, best objective first for each objective.
+
+        The caps only narrow the bonds of the group: a cap later than the group's
+        screen max year is the same as the screen.
+    """
+
+    def __init__(self, bond_group: BondGroup, output_directory: str) -> None:
+        super().__init__()
+        self._bond_group = bond_group
+        self._output_directory = output_directory
+
+    @staticmethod
+    def candidates(objectives: list[str], budgets: list[float], max_years: list[int]) -> list[BatchCandidate]:
+        return [BatchCandidate(objective, budget, max_year)
+                for objective in objectives for budget in budgets for max_year in max_years]
+
+    def generate(self, candidates: list[BatchCandidate], workers: int | None = None,
+                 time_budget: float | None = None) -> list[BatchResult]:
+        """
+            optimize the candidates, write their .pflo files and the summary
+                :param workers: processes in the pool, None => one per cpu
+                :param time_budget: seconds for each optimization, None => K.BATCH_TIME_BUDGET
+                :return: the results, in the order of the summary
+        """
+        time_budget = K.BATCH_TIME_BUDGET if time_budget is None else time_budget
+        start = time.perf_counter()
+        shared_directory = tempfile.mkdtemp(prefix="batch_universe_")
+        try:
+            universe = self._bond_group.universe
+            for name, column in universe.columns.items():
+                np.save(os.path.join(shared_directory, f"{name}.npy"), column, allow_pickle=False)
+            np.save(os.path.join(shared_directory, "rows.npy"), self._bond_group.rows, allow_pickle=False)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_load_shared_universe,
+                                     initargs=(shared_directory, universe.purchase_date, list(universe.columns))) as pool:
+                results = list(pool.map(_build_candidate, candidates, [time_budget] * len(candidates)))
+        finally:
+            shutil.rmtree(shared_directory, ignore_errors=True)
+
+        order = {objective: index for index, objective in enumerate(dict.fromkeys(c.objective for c in candidates))}
+        results.sort(key=lambda result: (order[result.candidate.objective], -result.summary["objective"]))
+        os.makedirs(self._output_directory, exist_ok=True)
+        for result in results: self.write_portfolio(result)
+        summary_path = self.write_summary(results)
+        print(f"{len(results)} portfolios optimized in {time.perf_counter() - start:.1f} s, summary in {summary_path}")
+        return results
+
+    def write_portfolio(self, result: BatchResult) -> str:
+        """ the .pflo file of a result, in the form save_portfolio writes a .pflo file """
+        path = os.path.join(self._output_directory, f"{result.candidate.name}.pflo")
+        with open(path, "w") as output_file:
+            output_file.write(f"title:{result.candidate.title};{result.action_line}\n")
+        return path
+
+    def write_summary(self, results: list[BatchResult]) -> str:
+        path = os.path.join(self._output_directory, "batch_summary.txt")
+        lines = [f"{'objective':<14}{'budget':>14}{'max year':>10}{'bonds':>7}{'cost':>16}"
+                 f"{'yearly income':>16}{'profit':>16}{'objective value':>18}  file"]
+        for result in results:
+            candidate, summary = result.candidate, result.summary
+            lines.append(f"{candidate.objective:<14}{candidate.budget:>14,.2f}{candidate.max_year:>10}{summary['bonds']:>7}"
+                         f"{summary['cost']:>16,.2f}{summary['yearly_income']:>16,.2f}{summary['profit']:>16,.2f}"
+                         f"{summary['objective']:>18,.2f}  {candidate.name}.pflo{'  *' if result.timed_out else ''}")
+        lines.append("* time budget reached, the best portfolio found by then")
+        with open(path, "w") as summary_file:
+            summary_file.write("\n".join(lines) + "\n")
+        print("\n".join(lines))
+        return path
+
+# endregion
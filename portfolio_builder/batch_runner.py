@@ -0,0 +1,41 @@
+# This is the batch program for the portfolio builder - it runs command files with no dialogs.
+import sys
+from portfolio_builder.portfolio_builder_engine import PortfolioBuilderEngine as PBE
+from portfolio_builder.portfolio_builder_engine import InputSyntaxError
+
+
+def run_command_file(engine: PBE, command_file_path: str) -> tuple[int, int]:
+    """
+        run each line of a command file as one line of actions, as if it were entered
+        at the prompt. Blank lines and lines starting with # are skipped, and a line
+        with a syntax error is reported and skipped
+            :return: (lines run, lines with errors)
+    """
+    lines_run = errors = 0
+    with open(command_file_path, "r") as command_file:
+        for line_number, line in enumerate(command_file, 1):
+            actions = line.strip()
+            if len(actions) == 0 or actions.startswith("#"): continue
+            try:
+                engine.process_actions(actions)
+                lines_run += 1
+            except InputSyntaxError as se:
+                print(f"{command_file_path} line {line_number}: {se}")
+                errors += 1
+    return lines_run, errors
+
+
+if __name__ == '__main__':
+    # load and rank the bonds once, then run every command file against them
+    engine = PBE(interactive=False)
+    command_files = sys.argv[1:]
+    if not command_files:       # commands.txt, made from today's bonds
+        engine.make_portfolio_creation_file()
+        command_files = [engine.commands_file_path]
+    total_errors = 0
+    for command_file_path in command_files:
+        lines_run, errors = run_command_file(engine, command_file_path)
+        total_errors += errors
+        print(f"{command_file_path}: {lines_run} lines run, {errors} with errors")
+    print(f"Files written to {engine.report_file_directory}")
+    sys.exit(1 if total_errors else 0)
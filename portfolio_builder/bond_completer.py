@@ -0,0 +1,98 @@
+import itertools
+import financial_utilities.constants as K
+from portfolio_builder.portfolio_builder_engine import PortfolioBuilderEngine
+
+try:
+    import readline         # not on Windows, where the prompt has no completion
+except ImportError:
+    readline = None
+
+# region ------------------------  class  BondCompleter ---------------------------------#
+
+
+class BondCompleter:
+    """
+        Tab completion of the bond operand of the action being typed at the prompt:
+            +<bond>, ?+<bond>, ?=<bond> and Q:<bond> - the bonds passing the screen
+            -<bond>, ?-<bond>                       - the bonds in the portfolio
+        What has been typed of the operand is taken as the start of a cusip, and,
+        when it is letters, the start of an issuer name too, completing to the cusips
+        of the issuer's bonds. Both are prefix walks of the bond group's tries, so a
+        completion takes the time of the matches shown, not of the universe - apart
+        from the cusips of the portfolio, which are few enough to look through.
+
+        When issuer matches leave more than one cusip, the text typed is kept as one
+        of the matches, so the line is not cut back to the cusips' common start, and
+        the matches are listed with their descriptions.
+    """
+
+    DELIMITERS = " ;:+-=,?"         # what ends an operand, so readline's text is the operand
+
+    def __init__(self, engine: PortfolioBuilderEngine, prompt: str) -> None:
+        super().__init__()
+        self._engine = engine
+        self._prompt = prompt
+        self._matches: list[str] = []
+
+    @staticmethod
+    def operator(line: str, begin: int) -> str | None:
+        """ + | - | Q - what the operand starting at begin is for, None if it is not a bond operand """
+        action = line[:begin].rsplit(";", 1)[-1]
+        if action == "Q:": return "Q"
+        if action in ("+", "-") or (action.startswith("?") and action[-1:] in ("+", "-", "=")):
+            return "-" if action.endswith("-") else "+"
+        return None
+
+    def matches(self, line: str, begin: int, text: str) -> list[str]:
+        """ the completions of text, the operand of the line starting at begin """
+        operator = self.operator(line, begin)
+        if operator is None: return []
+        group, portfolio = self._engine.source_bond_group, self._engine.portfolio
+        prefix = text.upper()
+        held = operator == "-"
+        if held:
+            cusips = dict.fromkeys(sorted(item.cusip for item in portfolio.portfolio_items
+                                          if item.cusip.startswith(prefix))[:K.NUMBER_COMPLETIONS_TO_SHOW])
+        else:
+            screened = filter(group.index.__contains__, group.cusip_trie.keys_with_prefix(prefix))
+            cusips = dict.fromkeys(itertools.islice(screened, K.NUMBER_COMPLETIONS_TO_SHOW))
+        by_issuer = False
+        if prefix.isalpha():
+            for issuer in group.issuer_trie.keys_with_prefix(prefix):
+                if len(cusips) >= K.NUMBER_COMPLETIONS_TO_SHOW: break
+                issued = [item.cusip for item in portfolio.find_portfolio_items_by_issuer(issuer)] if held \
+                    else [str(group.universe["cusip"][row]) for row in group.index.by_issuer(issuer)]
+                for cusip in issued[:K.NUMBER_COMPLETIONS_TO_SHOW - len(cusips)]:
+                    by_issuer = by_issuer or cusip not in cusips
+                    cusips[cusip] = None
+        matches = list(cusips)
+        if by_issuer and len(matches) > 1: matches.append(text)
+        return matches
+
+    # region ------------------------  readline ---------------------------------#
+
+    def install(self) -> bool:
+        """ make this the completer of input(), False when there is no readline """
+        if readline is None: return False
+        readline.set_completer(self.complete)
+        readline.set_completer_delims(self.DELIMITERS)
+        readline.set_completion_display_matches_hook(self.display_matches)
+        if "libedit" in (readline.__doc__ or ""): readline.parse_and_bind("bind ^I rl_complete")
+        else: readline.parse_and_bind("tab: complete")
+        return True
+
+    def complete(self, text: str, state: int) -> str | None:
+        if state == 0: self._matches = self.matches(readline.get_line_buffer(), readline.get_begidx(), text)
+        return self._matches[state] if state < len(self._matches) else None
+
+    def display_matches(self, substitution: str, matches: list[str], longest_match_length: int) -> None:
+        print()
+        for cusip in matches:
+            bond = self._engine.portfolio.find_portfolio_item_by_cusip(cusip) or \
+                self._engine.source_bond_group.find_bond(cusip)
+            if bond is not None: print(f"{cusip:<11}{bond.description:<62.60}{bond.coupon:>8.3f}  {bond.maturity_date}")
+        print(self._prompt + readline.get_line_buffer(), end="", flush=True)
+
+    # endregion
+
+# endregion
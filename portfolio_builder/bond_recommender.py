@@ -0,0 +1,98 @@
+import numpy as np
+from financial_utilities.bond import Bond
+from financial_utilities.portfolio import Portfolio
+from financial_utilities.ranking import RankedBonds
+
+# region ------------------------  class  RecommendationCursor ---------------------------------#
+
+
+class RecommendationCursor:
+    """
+        Walks one ranked list for >i, >p and >c recommendations without starting
+        from the top each time. Bonds that can never be recommended again - in the
+        portfolio or deleted from it - are marked used, and the cursor stays past the
+        leading used bonds. Bonds with too few available are skipped a block at a
+        time: each block of positions keeps the largest availability of its bonds
+        that are not used, so a block without enough is passed in one step.
+    """
+
+    BLOCK_SIZE = 64
+
+    def __init__(self, ranked: RankedBonds, portfolio: Portfolio) -> None:
+        super().__init__()
+        self._ranked = ranked
+        self._generation = portfolio.generation
+        self._cursor = 0                                    # positions before the cursor are all used
+        self._rows = np.zeros(0, dtype=np.intp)             # the selected prefix of the ranking
+        self._available = np.zeros(0, dtype=np.int64)       # availability by position, -1 once used
+        self._block_max = np.zeros(0, dtype=np.int64)       # the largest availability in each block
+
+    def is_for(self, ranked: RankedBonds, portfolio: Portfolio) -> bool:
+        return ranked is self._ranked and portfolio.generation == self._generation
+
+    def _extend(self) -> bool:
+        """ take in more of the ranking, False when all of it is already in """
+        if len(self._rows) == len(self._ranked): return False
+        count = min(len(self._ranked), max(2 * len(self._rows), self.BLOCK_SIZE))
+        start = len(self._rows)
+        self._rows = self._ranked.prefix(count)
+        available = self._ranked.universe["ask_quantity"][self._rows[start:]]
+        self._available = np.concatenate((self._available, available))
+        blocks = -(-count // self.BLOCK_SIZE)
+        padded = np.full(blocks * self.BLOCK_SIZE, -1, dtype=np.int64)
+        padded[:count] = self._available
+        self._block_max = padded.reshape(blocks, self.BLOCK_SIZE).max(axis=1)
+        return True
+
+    def _mark_used(self, position: int) -> None:
+        self._available[position] = -1
+        block = position // self.BLOCK_SIZE
+        self._block_max[block] = self._available[block * self.BLOCK_SIZE:(block + 1) * self.BLOCK_SIZE].max()
+        while self._cursor < len(self._available) and self._available[self._cursor] < 0: self._cursor += 1
+
+    def next_bond(self, num: int, portfolio: Portfolio) -> Bond | None:
+        """ the best bond not in the portfolio, not deleted from it and with at least num available """
+        position = self._cursor
+        while True:
+            if position >= len(self._available):
+                if not self._extend(): return None
+                continue
+            block = position // self.BLOCK_SIZE
+            if self._block_max[block] < num:
+                position = (block + 1) * self.BLOCK_SIZE
+                continue
+            if self._available[position] >= num:
+                bond = self._ranked[position]
+                if not (portfolio.contains_cusip(bond.cusip) or portfolio.has_removed_bond(bond.cusip)): return bond
+                self._mark_used(position)
+            position += 1
+
+# endregion
+
+# region ------------------------  class  BondRecommender ---------------------------------#
+
+
+class BondRecommender:
+    """
+        The recommendations for >i, >p and >c - one RecommendationCursor per ranked
+        list, started again when the list is re-ranked or the portfolio is new or cleared.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._cursors: dict[str, RecommendationCursor] = {}
+
+    def recommend(self, name: str, ranked: RankedBonds, num: int, portfolio: Portfolio) -> Bond | None:
+        """
+            :param name: the name of the ranked list, e.g. "c" or "c:conservative"
+            :param ranked: the ranked list
+            :param num: the number of bonds wanted
+            :param portfolio: the portfolio the bond is for
+            :return: the best eligible bond of the list, None if there is none
+        """
+        cursor = self._cursors.get(name)
+        if cursor is None or not cursor.is_for(ranked, portfolio):
+            cursor = self._cursors[name] = RecommendationCursor(ranked, portfolio)
+        return cursor.next_bond(num, portfolio)
+
+# endregion
@@ -1,14 +1,17 @@
 # This is the main program for the portfolio builder.
 from portfolio_builder.portfolio_builder_engine import PortfolioBuilderEngine as PBE
 from portfolio_builder.portfolio_builder_engine import InputSyntaxError
+from portfolio_builder.bond_completer import BondCompleter
 import json
 
+PROMPT = "enter action: "
+
 
 
 def capture_actions() -> str:
     while True:
-        print("\nenter action: ", end="")
-        action = input()
+        print()
+        action = input(PROMPT)      # input's own prompt, so completion can redraw it
         if len(action) > 0: return action
 
 def item_tostr(item) -> str:
@@ -41,6 +44,7 @@ if __name__ == '__main__':
 
     # create the portfolio builder engine
     engine = PBE()
+    BondCompleter(engine, PROMPT).install()     # tab completes bonds, where there is readline
     # process input program lines until quit is entered
     should_run = True
     while should_run:
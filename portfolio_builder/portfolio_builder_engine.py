@@ -1,10 +1,19 @@
 from typing import *
-import os, datetime, tkinter, tkinter.simpledialog, tkinter.filedialog
+import os, datetime, time, tkinter, tkinter.simpledialog, tkinter.filedialog
 from enum import Enum
+import numpy as np
 import financial_utilities.constants as K
 # from financial_utilities import portfolio
 from financial_utilities.bond import Bond, BondGroup
+from financial_utilities.bond_loader import RowFilter
 from financial_utilities.portfolio import Portfolio
+from financial_utilities.portfolio_file import PortfolioFile
+from financial_utilities.ranking import RankedBonds
+from financial_utilities.portfolio_optimizer import PortfolioOptimizer
+from financial_utilities.ladder_builder import LadderBuilder
+from financial_utilities.what_if import WhatIf
+from portfolio_builder.bond_recommender import BondRecommender
+from portfolio_builder.batch_portfolio_generator import BatchPortfolioGenerator
 from financial_utilities.pdf_document import PDFDocument
 
 
@@ -51,6 +60,16 @@ class ActionType(Enum):
     ClearPortfolio = 13
     NewPortfolio = 14
     SetTitle = 15
+    AddExclusion = 16
+    RemoveExclusion = 17
+    UseExclusions = 18
+    SetMaxYear = 19
+    SetCallProtected = 20
+    BatchPortfolios = 21
+    BuildLadder = 22
+    WhatIf = 23
+    FindBonds = 24
+    BestPortfolios = 25
 
     Help = 98
     Quit = 99
@@ -64,6 +83,41 @@ class Action:
         self.quantity = quantity
 
 
+class BondChanges:
+    """ the adds, increases, decreases and deletes of a run of actions, in order for each bond """
+
+    TYPES = (ActionType.AddBond, ActionType.IncreaseBond, ActionType.DecreaseBond, ActionType.DeleteBond)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.by_bond: dict[str, list[tuple[int, Action]]] = {}     # cusip => (position in the run, action)
+        self._count = 0
+
+    def add(self, action: Action) -> None:
+        self.by_bond.setdefault(action.cusip, []).append((self._count, action))
+        self._count += 1
+
+
+class ActionPlan:
+    """
+        A parsed script compiled for execution: each run of actions that only change
+        bond quantities becomes one BondChanges, applied to the portfolio as a batch,
+        and the other actions run in order between the runs. Actions that failed to
+        parse (None) are left out, their error has been shown.
+    """
+
+    def __init__(self, actions: list[Action | None]) -> None:
+        super().__init__()
+        self.steps: list[Action | BondChanges] = []
+        for action in actions:
+            if action is None: continue
+            if action.action_type in BondChanges.TYPES:
+                if not self.steps or not isinstance(self.steps[-1], BondChanges): self.steps.append(BondChanges())
+                self.steps[-1].add(action)
+            else:
+                self.steps.append(action)
+
+
 class PortfolioBuilderEngine:
 
     cwd = os.getcwd()                                                   # get current working directory
@@ -81,6 +135,7 @@ class PortfolioBuilderEngine:
     instructions_file_path = os.path.join(cwd, 'instructions.txt')      # for display to user
     commands_file_path = os.path.join(cwd, 'commands.txt')
     exclusions_file_path = os.path.join(cwd, 'exclusions.txt')
+    PORTFOLIO_FILE_TYPES = [("Portfolio files", " ".join(f"*{extension}" for extension in PortfolioFile.EXTENSIONS))]
 
     @staticmethod
     def load_exclusions() -> list[str]:
@@ -89,34 +144,49 @@ class PortfolioBuilderEngine:
             exclusions.extend(line.strip() for line in f)
         return exclusions
 
-    def __init__(self):
+    @staticmethod
+    def load_filters() -> list[RowFilter]:
+        """ the builder's own screens, pushed down into the read of bonds.csv """
+        return [RowFilter.rating_at_least(K.MIN_SP_RATING)] if K.MIN_SP_RATING else []
+
+    def __init__(self, interactive: bool = True):
+        """ :param interactive: False => no dialogs and no launched reports, files go to the report_file_directory """
         self.should_run = True
+        self.interactive = interactive
         self.exclusions = self.load_exclusions()
         self.source_bond_group = BondGroup()
-        self.source_bond_group.load_csv_file(self.bonds_file_path, K.MAX_YEAR, self.exclusions)
+        self.warm_start = self.source_bond_group.load_cached_csv_file(self.bonds_file_path, K.MAX_YEAR, self.exclusions,
+                                                                      self.load_filters())
+        print(f"{'Warm' if self.warm_start else 'Cold'} start: bonds {'taken from cache' if self.warm_start else 'parsed from bonds.csv'}")
         print(f"{len(self.source_bond_group.excluded_bonds)} bonds excluded")
         self.do_bond_rankings()
         self.portfolio: Portfolio = Portfolio()
+        self.recommender = BondRecommender()
 
     def bondIsInPortfolio(self, cusip) -> bool:
-        return any(item.cusip == cusip for item in self.portfolio.portfolio_items)
+        return self.portfolio.contains_cusip(cusip)
 
     def bond_has_already_been_deleted(self, cusip) -> bool:
-        return any(item.bond.cusip == cusip for item in self.portfolio.removed_bonds)
+        return self.portfolio.has_removed_bond(cusip)
 
     def recommend_bond(self, theType: str, num: int) -> str | None:
-        source_list: list[Bond] = []
-        match theType:
-            case "i": source_list = self.source_bond_group.best_income
-            case "p": source_list = self.source_bond_group.best_profit
-            case "c": source_list = self.source_bond_group.best_composite
-
-        for bond in source_list:
-            if self.bondIsInPortfolio(bond.cusip): continue
-            if self.bond_has_already_been_deleted(bond.cusip): continue
-            if bond.available < num: continue
-            return bond.cusip
-        return None
+        """ :param theType: i | p | c, optionally followed by :<scoring profile> to rank by that profile instead """
+        source_list: RankedBonds | None = None
+        selector, _, profile = theType.partition(":")
+        if profile:
+            if profile not in K.ScoringProfiles:
+                print(f" Error: no scoring profile {profile}, the profiles are {', '.join(K.ScoringProfiles)}")
+                return None
+            source_list = self.source_bond_group.ranked_by(profile)
+        else:
+            match selector:
+                case "i": source_list = self.source_bond_group.best_income
+                case "p": source_list = self.source_bond_group.best_profit
+                case "c": source_list = self.source_bond_group.best_composite
+        if source_list is None: return None
+
+        bond = self.recommender.recommend(theType, source_list, num, self.portfolio)
+        return bond.cusip if bond is not None else None
 
     # region  ----------------------------- Parsers -----------------------------------#
 
@@ -138,8 +208,8 @@ class PortfolioBuilderEngine:
         if bond_reference.isnumeric():      # is number of position in portfolio
             return self.portfolio.find_portfolio_item_by_position(int(bond_reference)).cusip
         elif bond_reference.isalpha():      # is text contained in bond description
-            cusip = self.portfolio.find_portfolio_item_containing_text_in_description(bond_reference).cusip
-            if cusip is not None: return cusip
+            item = self.portfolio.find_portfolio_item_containing_text_in_description(bond_reference)
+            if item is not None: return item.cusip
         elif bond_reference.isalnum():      # could be a cusip
             item = self.portfolio.find_portfolio_item_by_cusip(bond_reference)
             if item is not None: return item.cusip  # found a bond in the portfolio
@@ -148,6 +218,8 @@ class PortfolioBuilderEngine:
     def parse_add(self, addAction: str) -> Action | None:
         action = addAction[1:]                      # remove the leading '+'
         operands = action.split(":")
+        if len(operands) == 3 and operands[0].startswith(">"):     # >c:<profile>:<number>
+            operands = [f"{operands[0]}:{operands[1]}", operands[2]]
         # check for valid number of bonds
         if len(operands) == 2 and operands[1].isnumeric(): num = int(operands[1])
         else:
@@ -190,11 +262,69 @@ class PortfolioBuilderEngine:
         arg2 = None if len(operands) == 1 else operands[1]
         return Action(action_type, arg2, None)
 
+    @staticmethod
+    def parse_on_off(action: str, action_type: ActionType) -> Action:
+        operands = action.split(":")
+        if len(operands) != 2 or operands[1] not in ("on", "off"):
+            raise InputSyntaxError(f"{operands[0]} needs :on or :off")
+        return Action(action_type, None, 1 if operands[1] == "on" else 0)
+
+    @staticmethod
+    def parse_max_year(action: str) -> Action:
+        operands = action.split(":")
+        if len(operands) != 2 or not operands[1].isnumeric():
+            raise InputSyntaxError(f"maxyear needs a year, got {action}")
+        return Action(ActionType.SetMaxYear, None, int(operands[1]))
+
+    @staticmethod
+    def parse_ladder(action: str) -> tuple[str, str, dict[int, float]]:
+        """
+            ladder:<income|principal>[:cost|tracking]:<year>[-<year>]=<dollars>,...
+                :return: (kind, objective, year => target dollars)
+        """
+        operands = action.split(":")
+        if len(operands) not in (3, 4) or operands[1] not in LadderBuilder.KINDS or \
+                (len(operands) == 4 and operands[2] not in LadderBuilder.OBJECTIVES):
+            raise InputSyntaxError(f"ladder needs :income or :principal, optionally :cost or :tracking, "
+                                   f"then <year>=<dollars>,... got {action}")
+        targets = {}
+        for target in operands[-1].split(","):
+            years, _, dollars = target.partition("=")
+            first, _, last = years.partition("-")
+            if not first.isnumeric() or not (last or first).isnumeric():
+                raise InputSyntaxError(f"ladder target {target} needs <year>=<dollars> or <year>-<year>=<dollars>")
+            try:
+                amount = float(dollars.replace(",", "").removeprefix("$"))
+            except ValueError:
+                raise InputSyntaxError(f"ladder target {target} needs a dollar amount")
+            for year in range(int(first), int(last or first) + 1): targets[year] = amount
+        return operands[1], operands[2] if len(operands) == 4 else "cost", targets
+
+    @staticmethod
+    def parse_what_if(action: str) -> list[tuple[str, str, int | None]]:
+        """
+            ?<trade>,<trade>,...  trade := +<bond_ref>:<num> | -<bond_ref>[:<num>] | =<bond_ref>:<num>
+                :return: (+ | - | =, bond reference, number) of each trade
+        """
+        trades = []
+        for trade in action[1:].split(","):
+            operation, operands = trade[:1], trade[1:].split(":")
+            if len(operands) == 3 and operands[0].startswith(">"):     # >c:<profile>:<number>
+                operands = [f"{operands[0]}:{operands[1]}", operands[2]]
+            if operation not in ("+", "-", "=") or len(operands) > 2 or \
+                    (len(operands) == 2 and not operands[1].isnumeric()) or (operation != "-" and len(operands) != 2):
+                raise InputSyntaxError(f"what if trade {trade} needs +<bond>:<num>, -<bond>[:<num>] or =<bond>:<num>")
+            trades.append((operation, operands[0], int(operands[1]) if len(operands) == 2 else None))
+        return trades
+
     def parse_actions(self, actions: str) -> list[Action]:
         actions = actions.removesuffix(";")
         action_list = []
         for action in actions.split(";"):
-            if action.startswith("+"):
+            if action.startswith("?"):
+                self.parse_what_if(action)
+                action_list.append(Action(ActionType.WhatIf, action, None))
+            elif action.startswith("+"):
                 action_list.append(self.parse_add(action))
             elif action.startswith("-"):
                 action_list.append(self.parse_delete(action))
@@ -212,18 +342,39 @@ class PortfolioBuilderEngine:
                 action_list.append(self.parse_single_optional_operand(action, ActionType.SaveBriefAnalysis))
             elif action.startswith("sdd"):
                 action_list.append(self.parse_single_optional_operand(action, ActionType.SaveDetailedAnalysis))
+            elif action.startswith("find"):
+                query = action.partition(":")[2]
+                if not query.strip(): raise InputSyntaxError(f"{action} needs find:<words>")
+                action_list.append(Action(ActionType.FindBonds, query, None))
             elif action.startswith("Q"):
                 action_list.append(Action(ActionType.QueryBond, action.split(":")[1], None))
             elif action.startswith("open"):
-                action_list.append(Action(ActionType.OpenPortfolio, None, None))
+                action_list.append(Action(ActionType.OpenPortfolio, action.partition(":")[2] or None, None))   # paths may hold ':' 
             elif action.startswith("saveas"):
                 action_list.append(Action(ActionType.SavePortfolioAs, None, None))
             elif action.startswith("save"):
-                action_list.append(Action(ActionType.SavePortfolio, None, None))
+                action_list.append(self.parse_single_optional_operand(action, ActionType.SavePortfolio))
             elif action.startswith("clear"):
                 action_list.append(Action(ActionType.ClearPortfolio, None, None))
             elif action.startswith("help"):
                 action_list.append(Action(ActionType.Help, None, None))
+            elif action.startswith("exclusions"):
+                action_list.append(self.parse_on_off(action, ActionType.UseExclusions))
+            elif action.startswith("exclude"):
+                action_list.append(self.parse_single_optional_operand(action, ActionType.AddExclusion))
+            elif action.startswith("include"):
+                action_list.append(self.parse_single_optional_operand(action, ActionType.RemoveExclusion))
+            elif action.startswith("maxyear"):
+                action_list.append(self.parse_max_year(action))
+            elif action.startswith("protected"):
+                action_list.append(self.parse_on_off(action, ActionType.SetCallProtected))
+            elif action.startswith("ladder"):
+                self.parse_ladder(action)
+                action_list.append(Action(ActionType.BuildLadder, action, None))
+            elif action.startswith("batch"):
+                action_list.append(Action(ActionType.BatchPortfolios, None, None))
+            elif action.startswith("best"):
+                action_list.append(Action(ActionType.BestPortfolios, None, None))
             else:
                 raise InputSyntaxError(f"Unknown action: {action}")
                 # self.show_error(actions, action)
@@ -235,70 +386,118 @@ class PortfolioBuilderEngine:
 
     def save_report(self, title=None, detail=True) -> None:
         theTitle = title if title is not None else self.portfolio.title
-        output_file_path = tkinter.filedialog.asksaveasfilename(filetypes=[("PDF files", "*.pdf")])
-        if len(output_file_path) > 0:
+        if self.interactive:
+            output_file_path = tkinter.filedialog.asksaveasfilename(filetypes=[("PDF files", "*.pdf")])
+            if len(output_file_path) == 0: return
             if not output_file_path.endswith("pdf"): output_file_path += ".pdf"
             output_file_path = output_file_path.replace("/", "\\")
-            doc = PDFDocument(output_file_path)
-            # reporter = PortfolioReporter(lf.portfolio)
-            self.portfolio.make_analysis_report(doc, theTitle, detail)
-            doc.output_document()
-            self.launch_report(output_file_path)
+        else:
+            if not theTitle:
+                print("Error: a report needs a title, sdb:<title> or sdd:<title>, when there are no dialogs")
+                return
+            output_file_path = self.named_file_path(theTitle, ".pdf")
+        doc = PDFDocument(output_file_path)
+        # reporter = PortfolioReporter(lf.portfolio)
+        self.portfolio.make_analysis_report(doc, theTitle, detail)
+        doc.output_document()
+        self.launch_report(output_file_path)
+
+    def named_file_path(self, name: str, extension: str) -> str:
+        """ the file for a named save or report, in the report_file_directory """
+        name = name.strip().replace(" ", "_").replace(os.sep, "_")
+        return os.path.join(self.report_file_directory, name if name.endswith(extension) else name + extension)
 
     def print_help(self) -> None:
         # read the instructions.txt file and print it to the console
         with open(self.instructions_file_path, "r") as instructions_file:
             print(instructions_file.read())
 
-    @staticmethod
-    def launch_report(report_file_path) -> None:
+    def launch_report(self, report_file_path) -> None:
         # launch the pdf file for the report in the browser
         # os.system(f"open {report_file_path}")
         """ in macOS launch the pdf file for the report in the Chrome browser """
+        if not self.interactive:
+            print(f"Report written to {report_file_path}")
+            return
         os.system(f"open -a /Applications/Google\ Chrome.app {report_file_path}")
 
 
-    def open_portfolio(self) -> None:
-        # prompt user for file to load using file dialog
-        # file name will end with .pflo
-        # read the file and process the actions
-        input_file_path = tkinter.filedialog.askopenfilename(filetypes=[("Serialized Portfolio", "*.pflo")])
+    def open_portfolio(self, input_file_path: str | None = None) -> None:
+        # prompt user for file to load using file dialog, unless given the file
+        # the portfolio opened replaces the current one, whatever the file's format
+        # a .pfjson or .pfbin file holds the portfolio saved, bonds and all
+        # a .pflo file holds actions, which are read and processed into a new portfolio
+        if input_file_path is None:
+            if not self.interactive:
+                print("Error: open needs a file, open:<file_path>, when there are no dialogs")
+                return
+            input_file_path = tkinter.filedialog.askopenfilename(filetypes=self.PORTFOLIO_FILE_TYPES)
         if len(input_file_path) == 0: return
-        with open(input_file_path, "r") as input_file:
-            actions = input_file.read()
-            actions = actions.strip()
-            print(f"open_portfolio: input => {actions}")
-            self.process_actions(actions)
+        if PortfolioFile.has_snapshots(input_file_path):
+            try:
+                self.portfolio = PortfolioFile.read(input_file_path)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"Error: cannot open portfolio {input_file_path}: {e}")
+                return
+            print(f"open_portfolio: {self.portfolio.length} bonds from {input_file_path}")
+            return
+        try:
+            with open(input_file_path, "r") as input_file:
+                actions = input_file.read()
+        except OSError as e:
+            print(f"Error: cannot open portfolio {input_file_path}: {e}")
+            return
+        actions = actions.strip()
+        print(f"open_portfolio: input => {actions}")
+        self.new_portfolio()
+        self.process_actions(actions)
+        self.portfolio.file_path = input_file_path
+        self.portfolio.portfolio_changed = False
 
     def save_portfolio_as(self) -> None:
         # prompt user for file name to save using file dialog
         # file name will end with .txt
         # write the portfolio to the text file
-        file_path = tkinter.filedialog.asksaveasfilename(filetypes=[("Portfolio files", "*.pflo")])
+        file_path = tkinter.filedialog.asksaveasfilename(filetypes=self.PORTFOLIO_FILE_TYPES)
         if file_path is None: return
         self.portfolio.file_path = file_path
         self.save_portfolio()
 
-    def save_portfolio(self) -> None:
+    def save_portfolio(self, name: str | None = None) -> None:
         """
             write the serialized portfolio to the portfolio.file_path. If the file_path is None,
-            prompt the user for a file name using file dialog
+            prompt the user for a file name using file dialog. The file's extension says
+            how it is written, see PortfolioFile, and with none it is a .pflo file of actions
+                :param name: save as this name in the report_file_directory instead
         """
-
-        line = f"title:{self.portfolio.title};"
-        for item in self.portfolio.portfolio_items:
-            line += f"+{item.cusip}:{item.quantity};"
-
+        if name: self.portfolio.file_path = self.named_file_path(name, self.portfolio_file_extension(name))
+        elif self.portfolio.file_path is None and not self.interactive:
+            if not self.portfolio.title:
+                print("Error: save needs a name, save:<name>, when there are no dialogs")
+                return
+            self.portfolio.file_path = self.named_file_path(self.portfolio.title, PortfolioFile.ACTIONS_EXTENSION)
         if self.portfolio.file_path is None:
-            output_file_path = tkinter.filedialog.asksaveasfilename(filetypes=[("Portfolio files", "*.pflo")])
+            output_file_path = tkinter.filedialog.asksaveasfilename(filetypes=self.PORTFOLIO_FILE_TYPES)
             if len(output_file_path) == 0: return
 
-            if not output_file_path.endswith("pflo"): output_file_path += ".pflo"
+            output_file_path += "" if output_file_path.endswith(PortfolioFile.EXTENSIONS) else PortfolioFile.ACTIONS_EXTENSION
             self.portfolio.file_path = output_file_path
 
+        if PortfolioFile.has_snapshots(self.portfolio.file_path):
+            PortfolioFile.write(self.portfolio, self.portfolio.file_path)
+            return
+        line = f"title:{self.portfolio.title};"
+        for item in self.portfolio.portfolio_items:
+            line += f"+{item.cusip}:{item.quantity};"
         with open(self.portfolio.file_path, "w") as output_file:
             output_file.write(line + "\n")
 
+    @staticmethod
+    def portfolio_file_extension(name: str) -> str:
+        """ the portfolio file extension name ends with, else .pflo - a snapshot file only when asked for """
+        return next((extension for extension in PortfolioFile.EXTENSIONS if name.endswith(extension)),
+                    PortfolioFile.ACTIONS_EXTENSION)
+
     def new_portfolio(self, title=None) -> None:
         self.portfolio = Portfolio()
         theTitle = title
@@ -331,12 +530,29 @@ class PortfolioBuilderEngine:
         print(f"In line {actions}")
 
     def query_bond(self, cusip: str, echo=False) -> Bond | None:
-        for aBond in self.source_bond_group:
-            if aBond.cusip == cusip:
-                if echo: print(f"{aBond.description}   {aBond.coupon}  {aBond.maturity_date} ")
-                return aBond
-        print(f"Bond {cusip} not found")
-        return None
+        aBond = self.source_bond_group.find_bond(cusip)
+        if aBond is None:
+            print(f"Bond {cusip} not found")
+            return None
+        if echo: print(f"{aBond.description}   {aBond.coupon}  {aBond.maturity_date} ")
+        return aBond
+
+    def find_bonds(self, query: str) -> None:
+        """ print the bonds of the universe, and the portfolio items, whose descriptions match every word of the query """
+        group = self.source_bond_group
+        start = time.perf_counter()
+        rows, in_group = group.search_descriptions(query)
+        elapsed = time.perf_counter() - start
+        print(f"\n{len(rows)} bonds match [{query}]  ({elapsed * 1000:.3f} ms)")
+        for row, screened in zip(rows[:K.NUMBER_FOUND_BONDS_TO_PRINT], in_group):
+            bond = group.universe.bond(row)
+            print(f"{bond.cusip:<11}{bond.description:<62.60}{bond.coupon:>8.3f}  {bond.maturity_date}  {bond.sp_rating:<5}"
+                  f"{bond.ask:>9.3f}{bond.available:>7}{'' if screened else '   screened out'}")
+        if len(rows) > K.NUMBER_FOUND_BONDS_TO_PRINT: print(f"... and {len(rows) - K.NUMBER_FOUND_BONDS_TO_PRINT} more")
+        items = self.portfolio.search_descriptions(query)
+        if items:
+            positions = {id(item): position for position, item in enumerate(self.portfolio.portfolio_items, 1)}
+            print("In the portfolio: " + ", ".join(f"{positions[id(item)]}:{item.cusip}" for item in items))
 
     def add_bond(self, cusip: str, num: int) -> None:
         aBond = self.query_bond(cusip, echo=False)
@@ -368,28 +584,164 @@ class PortfolioBuilderEngine:
         self.portfolio.remove_item(theItem)
         self.portfolio.portfolio_changed = True
 
+    def what_if(self, trades: list[tuple[str, str, int | None]]) -> None:
+        """ show what the trades would change, each on its own, without changing the portfolio """
+        cusips, quantities = [], []
+        for operation, reference, num in trades:
+            cusip = self.parse_add_bond_reference(reference, num or 0) if operation != "-" \
+                else self.parse_existing_bond_reference(reference)
+            if cusip is None:
+                print(f" What If Error: {reference} does not describe a bond{' in the portfolio' if operation == '-' else ''}")
+                return
+            item = self.portfolio.find_portfolio_item_by_cusip(cusip)
+            held = item.quantity if item is not None else 0
+            match operation:
+                case "+": quantity = held + num
+                case "=": quantity = num
+                case _: quantity = 0 if num is None else held - num
+            if quantity < 0:
+                print(f" What If Error: cannot decrease bond {cusip} by {num}")
+                return
+            cusips.append(cusip)
+            quantities.append(quantity)
+        try:
+            deltas = WhatIf(self.portfolio, self.source_bond_group).evaluate(cusips, quantities)
+        except KeyError as e:
+            print(f" What If Error: {e}")
+            return
+        deltas.print_deltas()
+
+    def build_ladder(self, kind: str, objective: str, targets: dict[int, float]) -> None:
+        """ add a maturity ladder meeting the yearly targets to the portfolio, from bonds not already in it """
+        group = self.source_bond_group
+        rows = group.rows
+        rows = rows[~np.isin(group.universe["cusip"][rows], [item.cusip for item in self.portfolio.portfolio_items])]
+        try:
+            ladder = LadderBuilder(group.universe, rows).build(targets, kind, objective)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        ladder.print_report()
+        for year, gap in ladder.gaps().items(): print(f"Gap: {year} is ${gap:,.2f} short of its target")
+        for row, quantity in ladder.solution: self.add_bond(group.universe["cusip"][row], quantity)
+
     def execute_action_list(self, actions: list[Action]) -> None:
-        for action in actions:
-            # print(f"action: {action.action_type} action.cusip {action.cusip} ")
-            if action.action_type == ActionType.AddBond: self.add_bond(action.cusip, action.quantity)
-            elif action.action_type == ActionType.IncreaseBond: self.increase_bond(action.cusip, action.quantity)
-            elif action.action_type == ActionType.DeleteBond: self.delete_bond(action.cusip)
-            elif action.action_type == ActionType.DecreaseBond: self.decrease_bond(action.cusip, action.quantity)
-            elif action.action_type == ActionType.Quit: quit(0)
-            elif action.action_type == ActionType.PrintBriefAnalysis: self.print_report(detail=False, title=action.cusip)
-            elif action.action_type == ActionType.PrintDetailedAnalysis: self.print_report(detail=True, title=action.cusip)
-            elif action.action_type == ActionType.SaveBriefAnalysis: self.save_report(title=action.cusip, detail=False)
-            elif action.action_type == ActionType.SaveDetailedAnalysis: self.save_report(title=action.cusip, detail=True)
-            elif action.action_type == ActionType.QueryBond: self.query_bond(action.cusip, echo=True)
-            elif action.action_type == ActionType.OpenPortfolio: self.open_portfolio()
-            elif action.action_type == ActionType.NewPortfolio: self.new_portfolio(title=action.cusip)
-            elif action.action_type == ActionType.SavePortfolio: self.save_portfolio()
-            elif action.action_type == ActionType.SavePortfolioAs: self.save_portfolio_as()
-            elif action.action_type == ActionType.ClearPortfolio: self.portfolio.clear_portfolio()
-            elif action.action_type == ActionType.SetTitle: self.portfolio.title = action.cusip
-            elif action.action_type == ActionType.Help: self.print_help()
-            else:
-                print(f"Error: {action.action_type} is not a valid action type")
+        for step in ActionPlan(actions).steps:
+            if isinstance(step, BondChanges): self.apply_bond_changes(step)
+            else: self.execute_action(step)
+
+    def apply_bond_changes(self, changes: BondChanges) -> None:
+        """
+            apply a run of adds, increases, decreases and deletes as one batch. Each bond's
+            actions are played in order against its quantity, as running them one at a time
+            would, then only the net change is made to the portfolio: repeated adds of a bond
+            make one item, and the portfolio's totals are made once at the end
+        """
+        added: list[tuple[int, Bond, int]] = []         # (position in the run, bond, quantity) of new items
+        with self.portfolio.deferred_totals():
+            for cusip, actions in changes.by_bond.items():
+                item = self.portfolio.find_portfolio_item_by_cusip(cusip)
+                present, quantity = item is not None, item.quantity if item is not None else 0
+                is_new, removed, bond, position = False, False, None, 0
+                for action_position, action in actions:
+                    match action.action_type:
+                        case ActionType.AddBond | ActionType.IncreaseBond:
+                            if not present:
+                                if action.action_type == ActionType.IncreaseBond: continue
+                                bond = bond or self.query_bond(cusip, echo=False)
+                                if bond is None: continue
+                                if not K.ANALYSING_EXISTING_PORTFOLIO and bond.available < action.quantity:
+                                    print(f"Error:  {bond.cusip} {bond.description} only {bond.available} bonds available")
+                                    continue
+                                present, is_new, quantity, position = True, True, 0, action_position
+                            quantity += action.quantity
+                        case ActionType.DecreaseBond:
+                            if not present: continue
+                            if quantity < action.quantity:
+                                print(f"Error: cannot decrease bond {cusip} by {action.quantity}")
+                                continue
+                            quantity -= action.quantity
+                        case ActionType.DeleteBond:
+                            if not present: continue
+                            present, is_new = False, False
+                            removed = removed or item is not None
+                    self.portfolio.portfolio_changed = True
+
+                if removed: self.portfolio.remove_item(item)
+                elif item is not None and item.quantity != quantity: item.quantity = quantity
+                if present and is_new: added.append((position, bond, quantity))
+
+            for _, bond, quantity in sorted(added, key=lambda new_item: new_item[0]):
+                self.portfolio.add_bond(bond, quantity)
+
+    def execute_action(self, action: Action) -> None:
+        # print(f"action: {action.action_type} action.cusip {action.cusip} ")
+        if action.action_type == ActionType.AddBond: self.add_bond(action.cusip, action.quantity)
+        elif action.action_type == ActionType.IncreaseBond: self.increase_bond(action.cusip, action.quantity)
+        elif action.action_type == ActionType.DeleteBond: self.delete_bond(action.cusip)
+        elif action.action_type == ActionType.DecreaseBond: self.decrease_bond(action.cusip, action.quantity)
+        elif action.action_type == ActionType.Quit: quit(0)
+        elif action.action_type == ActionType.PrintBriefAnalysis: self.print_report(detail=False, title=action.cusip)
+        elif action.action_type == ActionType.PrintDetailedAnalysis: self.print_report(detail=True, title=action.cusip)
+        elif action.action_type == ActionType.SaveBriefAnalysis: self.save_report(title=action.cusip, detail=False)
+        elif action.action_type == ActionType.SaveDetailedAnalysis: self.save_report(title=action.cusip, detail=True)
+        elif action.action_type == ActionType.QueryBond: self.query_bond(action.cusip, echo=True)
+        elif action.action_type == ActionType.OpenPortfolio: self.open_portfolio(action.cusip)
+        elif action.action_type == ActionType.NewPortfolio: self.new_portfolio(title=action.cusip)
+        elif action.action_type == ActionType.SavePortfolio: self.save_portfolio(action.cusip)
+        elif action.action_type == ActionType.SavePortfolioAs: self.save_portfolio_as()
+        elif action.action_type == ActionType.ClearPortfolio: self.portfolio.clear_portfolio()
+        elif action.action_type == ActionType.SetTitle: self.portfolio.title = action.cusip
+        elif action.action_type == ActionType.Help: self.print_help()
+        elif action.action_type == ActionType.AddExclusion: self.add_exclusion(action.cusip)
+        elif action.action_type == ActionType.RemoveExclusion: self.remove_exclusion(action.cusip)
+        elif action.action_type == ActionType.UseExclusions: self.change_screen(use_exclusions=bool(action.quantity))
+        elif action.action_type == ActionType.SetMaxYear: self.change_screen(max_year=action.quantity)
+        elif action.action_type == ActionType.SetCallProtected: self.change_screen(call_protected=bool(action.quantity))
+        elif action.action_type == ActionType.BatchPortfolios: self.generate_batch_portfolios()
+        elif action.action_type == ActionType.BestPortfolios: self.make_portfolio_creation_file()
+        elif action.action_type == ActionType.FindBonds: self.find_bonds(action.cusip)
+        elif action.action_type == ActionType.WhatIf: self.what_if(self.parse_what_if(action.cusip))
+        elif action.action_type == ActionType.BuildLadder: self.build_ladder(*self.parse_ladder(action.cusip))
+        else:
+            print(f"Error: {action.action_type} is not a valid action type")
+
+    # region  ----------------------- Bond Screen --------------------------------#
+
+    def rescreen(self) -> None:
+        """ re-filter and re-rank the loaded bonds after a screen change - the csv file is not read again """
+        start = time.perf_counter()
+        self.source_bond_group.apply_screen()
+        elapsed = (time.perf_counter() - start) * 1000
+        screen = self.source_bond_group.screen
+        print(f"{self.source_bond_group.length()} bonds pass the screen  (maxyear {screen.max_year}"
+              f"  protected {'on' if screen.call_protected else 'off'}"
+              f"  exclusions {'on' if screen.use_exclusions else 'off'} {len(screen.exclusions)})"
+              f"  re-ranked in {elapsed:.1f} ms")
+
+    def change_screen(self, max_year: int | None = None, call_protected: bool | None = None,
+                      use_exclusions: bool | None = None) -> None:
+        screen = self.source_bond_group.screen
+        if max_year is not None: screen.max_year = max_year
+        if call_protected is not None: screen.call_protected = call_protected
+        if use_exclusions is not None: screen.use_exclusions = use_exclusions
+        self.rescreen()
+
+    def add_exclusion(self, exclusion: str | None) -> None:
+        if not exclusion:
+            print(f"Exclusions: {self.source_bond_group.screen.exclusions}")
+            return
+        count = self.source_bond_group.screen.add_exclusion(exclusion)
+        print(f"[{exclusion}] excludes {count} bonds")
+        self.rescreen()
+
+    def remove_exclusion(self, exclusion: str | None) -> None:
+        if not self.source_bond_group.screen.remove_exclusion(exclusion or ""):
+            print(f"Error: [{exclusion}] is not an exclusion")
+            return
+        self.rescreen()
+
+    # endregion --------------------------------- Bond Screen -----------------------------------------#
 
     # endregion --------------------------------- Action Execution -----------------------------------------#
 
@@ -450,83 +802,62 @@ class PortfolioBuilderEngine:
             count += 1
             if count > K.NUMBER_RANKED_BONDS_TO_PRINT: break
 
-    def make_portfolio_creation_file(self, composite: list, income: list, profit: list) -> None:
+    def make_portfolio_creation_file(self) -> None:
+        """ write commands.txt, the actions building the optimized portfolios - on request, as optimizing takes a while """
         lines = []
-        self.make_portfolio(lines, "composite", composite)
-        self.make_portfolio(lines, "income", income)
-        self.make_portfolio(lines, "profit", profit)
+        self.make_portfolio(lines, "composite", K.COMPOSITE_PROFILE)
+        self.make_portfolio(lines, "income", "income")
+        self.make_portfolio(lines, "profit", "profit")
 
         with open(self.commands_file_path, 'w') as f:
             f.write('\n'.join(lines))
+        print(f"Portfolio creation commands written to {self.commands_file_path}")
 
     # endregion ----------------  Ranking Implementation -----------------------#
 
     # region ----------------- make maximized portfolios -------------------#
-    def make_portfolio(self, lines: list, heading: str, selected_list: list) -> None:
-        lines.append(heading + '\n')
-        bond_index = 0
-        line, bond_index = self.make_portfolio_line(selected_list, bond_index)
-        line += f"save:Best_{heading.capitalize()}"
-        lines.append(line + '\n')
-        line, bond_index = self.make_portfolio_line(selected_list, bond_index+1)
-        lines.append(line + '\n')
-
-    def make_portfolio_line(self, theBondList: list, starting_bond_index: int) -> tuple[str, int]:
-        line = ''
-        invested = 0.0
-        bond_index = starting_bond_index - 1
-        while bond_index < len(theBondList):
-            bond_index += 1
-            bond = theBondList[bond_index]
-            result, invested, line = self.try_to_add_bond_to_portfolio(bond, line, invested)
-            match result:
-                case "skipped":
-                    continue
-
-                case "added":
-                    continue
-
-                case "complete":
-                    return line, bond_index
-
-                case "over_budget":
-                    return line, bond_index
-
-    @staticmethod
-    def try_to_add_bond_to_portfolio(bond: Bond, line: str, total_invested: float) -> Tuple[str, float, str]:
-        # print(f"incoming total_invested: {total_invested}")
-        # print(f"incoming line: {line}")
-        quantity = min(bond.available, K.ORDER_QUANTITY)
-        if quantity < K.PORTFOLIO_MIN_QUANTITY: return "skipped", total_invested, line
-
-        line += f"+{bond.cusip}:{quantity};"
-        total_invested += bond.ask * quantity * 10
-        # print(f"this purchase={bond.ask * quantity * 10}")
-        # print(f"new total_invested: {total_invested}")
-        if total_invested > K.PORTFOLIO_TOTAL_COST:
-            # spent more than the limit
-            if total_invested - K.PORTFOLIO_TOTAL_COST > 20000.00:
-                # print(f"$$$$$$$$$$$$$$line on return: {line}")
-                return "over_budget", total_invested, line
-            else:
-                # print(f"$$$$$$$$$$$$$$line on return: {line}")
-                return "complete", total_invested, line
-        # haven't reached the target yet
-        if K.PORTFOLIO_TOTAL_COST - total_invested < 20000.00: return "complete", total_invested, line
-        return "added", total_invested, line
+    def make_portfolio(self, lines: list, heading: str, objective: str) -> None:
+        """
+            two optimized portfolios for an objective, the second from the bonds the first doesn't use
+                :param objective: income | profit | a scoring profile name, see PortfolioOptimizer
+        """
+        lines.append(f"# {heading}\n")
+        rows = self.source_bond_group.rows
+        line, solution = self.make_portfolio_line(rows, objective, heading)
+        name = f"Best_{heading.capitalize()}"
+        lines.append(f"new:{name};{line}save:{name};sdd:{name}\n")
+        used = np.array([row for row, _ in solution], dtype=np.intp)
+        line, _ = self.make_portfolio_line(rows[~np.isin(rows, used)], objective, f"{heading} alternative")
+        name = f"{heading.capitalize()}_Alternative"
+        lines.append(f"new:{name};{line}save:{name};sdd:{name}\n")
+
+    def make_portfolio_line(self, rows: np.ndarray, objective: str, heading: str) -> tuple[str, list[tuple[int, int]]]:
+        optimizer = PortfolioOptimizer(self.source_bond_group.universe, rows, objective)
+        solution = optimizer.solve()
+        summary = optimizer.summary(solution)
+        print(f"Optimized {heading} portfolio: {summary['bonds']} bonds costing {F.format_dollars(summary['cost'])}, "
+              f"yearly income {F.format_dollars(summary['yearly_income'])}, profit {F.format_dollars(summary['profit'])}"
+              f"{' (time budget reached)' if optimizer.timed_out else ''}")
+        return optimizer.action_line(solution), solution
+
+    def generate_batch_portfolios(self) -> None:
+        """ optimize every K.BATCH_OBJECTIVES portfolio at every K.BATCH_BUDGETS cost for every K.BATCH_MAX_YEARS cap """
+        output_directory = os.path.join(self.report_file_directory, f"batch_{datetime.datetime.now().strftime('%H_%M_%S')}")
+        generator = BatchPortfolioGenerator(self.source_bond_group, output_directory)
+        generator.generate(generator.candidates(K.BATCH_OBJECTIVES, K.BATCH_BUDGETS, K.BATCH_MAX_YEARS))
 
     def do_bond_rankings(self) -> None:
         today = datetime.datetime.now().strftime("%Y_%m_%d")
         output_file_path = os.path.join(self.report_file_directory, f"SelectedBonds_{today}.pdf")
-        self.source_bond_group.make_ranking_lists()
+        if not self.source_bond_group.best_composite: self.source_bond_group.make_ranking_lists()
         doc = PDFDocument(output_file_path)
         self.print_bonds(self.source_bond_group.best_composite, doc, "Bonds with Best Combined Rank")
         self.print_bonds(self.source_bond_group.best_income, doc, "Bonds with Best Yearly Income")
         self.print_bonds(self.source_bond_group.best_profit, doc, "Bonds with Best Profit")
+        self.print_bonds(self.source_bond_group.frontier(), doc,
+                         f"Bonds Not Beaten on {', '.join(axis.replace('_', ' ') for axis in K.SKYLINE_AXES)}")
         doc.output_document()
         # os.system(f"open {output_file_path}")
         self.launch_report(output_file_path)
 
-        self.make_portfolio_creation_file(self.source_bond_group.best_composite, self.source_bond_group.best_income, self.source_bond_group.best_profit)
-
     # endregion ---------------------------------------------------------------------------#
@@ -0,0 +1,53 @@
+import importlib
+import os
+import pytest
+
+"""
+    open:<file_path> of a file that isn't there reports the error and leaves the
+    portfolio as it was, at the prompt and in a command file run by batch_runner.
+    The engine takes its files from the working directory, so it is made in a
+    directory holding the bundled bonds.csv and exclusions.txt.
+"""
+
+DATA_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir, "portfolio_builder", "data")
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    if not os.path.exists(os.path.join(DATA_DIRECTORY, "bonds.csv")): pytest.skip("no bundled bonds.csv")
+    working_directory = tmp_path_factory.mktemp("portfolio_builder")
+    for name in ("bonds.csv", "exclusions.txt"):
+        os.symlink(os.path.abspath(os.path.join(DATA_DIRECTORY, name)), working_directory / name)
+    cwd = os.getcwd()
+    os.chdir(working_directory)
+    try:
+        engine_module = importlib.import_module("portfolio_builder.portfolio_builder_engine")
+        yield engine_module.PortfolioBuilderEngine(interactive=False)
+    finally:
+        os.chdir(cwd)
+
+
+def holdings(engine) -> list[tuple[str, int]]:
+    return [(item.cusip, item.quantity) for item in engine.portfolio.portfolio_items]
+
+
+@pytest.mark.parametrize("missing", ["missing.pflo", "missing.pfjson", "missing.pfbin"])
+def test_open_missing_file_keeps_portfolio(engine, missing: str) -> None:
+    engine.process_actions("new:Kept;+>i:20;+>p:30")
+    portfolio, held = engine.portfolio, holdings(engine)
+    assert held
+
+    engine.process_actions(f"open:{missing}")
+    assert engine.portfolio is portfolio
+    assert engine.portfolio.title == "Kept"
+    assert holdings(engine) == held
+
+
+def test_runner_continues_past_missing_file(engine, tmp_path) -> None:
+    from portfolio_builder.batch_runner import run_command_file
+
+    command_file_path = tmp_path / "commands.txt"
+    command_file_path.write_text("new:Runner;+>i:20\nopen:missing.pflo\n+>p:30\n")
+    assert run_command_file(engine, str(command_file_path)) == (3, 0)
+    assert engine.portfolio.title == "Runner"
+    assert sum(quantity for _, quantity in holdings(engine)) == 50
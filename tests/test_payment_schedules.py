@@ -0,0 +1,93 @@
+import os
+import numpy as np
+import pytest
+import financial_utilities.constants as K
+from financial_utilities.bond_loader import BondCsvLoader
+from financial_utilities.payment_schedules import make_cash_flow_events, make_payment_schedules, mismatched_rows
+from financial_utilities.portfolio_item import PortfolioItem
+
+"""
+    make_payment_schedules and make_cash_flow_events against the per bond
+    PaymentSource.make_cash_flows, bond by bond, for maturities in every month of
+    the first and second half of the year, in the purchase year, on either side of
+    the purchase day and past the end of the schedule array.
+"""
+
+BONDS_CSV = os.path.join(os.path.dirname(__file__), os.pardir, "portfolio_builder", "data", "bonds.csv")
+
+# purchases in the first year of the schedules, the year a bond bought today starts in
+PURCHASE_DATES = [f"01/01/{K.BEGINNING_YEAR}", f"03/15/{K.BEGINNING_YEAR}", f"06/30/{K.BEGINNING_YEAR}",
+                  f"07/01/{K.BEGINNING_YEAR}", f"09/15/{K.BEGINNING_YEAR}", f"12/31/{K.BEGINNING_YEAR}"]
+
+
+def maturities() -> list[tuple[float, str]]:
+    """ (coupon, maturity date) of bonds maturing on days around the 15th of every month of the years tested """
+    years = [K.BEGINNING_YEAR, K.BEGINNING_YEAR + 1, K.BEGINNING_YEAR + 7, K.BEGINNING_YEAR + K.YEARS,
+             K.BEGINNING_YEAR + K.YEARS + 1]
+    return [(coupon, f"{month:02d}/{day:02d}/{year}")
+            for year in years for month in range(1, 13) for day in (1, 14, 15, 16, 28)
+            for coupon in (0.0, 4.125)]
+
+
+def reference_cash_flows(coupon: float, maturity_date: str, purchase_date: str):
+    return PortfolioItem(["TESTCUSIP", "TEST BOND", maturity_date, coupon, 100.0, "AA", 10], 10,
+                         purchase_date).make_cash_flows()
+
+
+def batched_arguments(bonds: list[tuple[float, str]], purchase_date: str) -> tuple:
+    month, day, year = np.array([[int(part) for part in maturity_date.split("/")] for _, maturity_date in bonds]).T
+    purchase_month, purchase_day_of_month, _ = (int(part) for part in purchase_date.split("/"))
+    return np.array([coupon for coupon, _ in bonds]), year, month, day, purchase_month, purchase_day_of_month
+
+
+@pytest.mark.parametrize("purchase_date", PURCHASE_DATES)
+def test_schedules_match_payment_source(purchase_date: str) -> None:
+    bonds = maturities()
+    schedules = make_payment_schedules(*batched_arguments(bonds, purchase_date))
+    for row, (coupon, maturity_date) in enumerate(bonds):
+        reference = reference_cash_flows(coupon, maturity_date, purchase_date)
+        assert np.array_equal(schedules[row], reference.dense()), f"{maturity_date} bought {purchase_date}"
+        assert schedules[row].sum() == reference.sum(), f"{maturity_date} bought {purchase_date}"
+
+
+@pytest.mark.parametrize("purchase_date", PURCHASE_DATES)
+def test_events_match_payment_source(purchase_date: str) -> None:
+    bonds = maturities()
+    events, years, months, amounts = make_cash_flow_events(*batched_arguments(bonds, purchase_date))
+    starts = np.searchsorted(events, np.arange(len(bonds) + 1))
+    for row, (coupon, maturity_date) in enumerate(bonds):
+        reference = reference_cash_flows(coupon, maturity_date, purchase_date)
+        start, end = starts[row], starts[row + 1]
+        assert np.array_equal(years[start:end], reference.years), f"{maturity_date} bought {purchase_date}"
+        assert np.array_equal(months[start:end], reference.months), f"{maturity_date} bought {purchase_date}"
+        assert np.array_equal(amounts[start:end], reference.amounts), f"{maturity_date} bought {purchase_date}"
+
+
+def test_purchase_in_coupon_month() -> None:
+    """ a first coupon in the purchase month is paid when the coupon day is on or after the purchase day """
+    purchase_date = f"03/15/{K.BEGINNING_YEAR}"
+    bonds = [(5.0, f"03/14/{K.BEGINNING_YEAR + 3}"), (5.0, f"03/15/{K.BEGINNING_YEAR + 3}"),
+             (5.0, f"09/16/{K.BEGINNING_YEAR + 3}")]
+    schedules = make_payment_schedules(*batched_arguments(bonds, purchase_date))
+    assert schedules[:, 0, 3].tolist() == [0.0, 2.5, 2.5]
+    for row, (coupon, maturity_date) in enumerate(bonds):
+        assert np.array_equal(schedules[row], reference_cash_flows(coupon, maturity_date, purchase_date).dense())
+
+
+def test_maturity_in_purchase_year() -> None:
+    """ a bond maturing in the first year pays both coupons of the first year that are not before the purchase """
+    purchase_date = f"02/01/{K.BEGINNING_YEAR}"
+    bonds = [(6.0, f"05/15/{K.BEGINNING_YEAR}"), (6.0, f"11/15/{K.BEGINNING_YEAR}")]
+    schedules = make_payment_schedules(*batched_arguments(bonds, purchase_date))
+    assert schedules[0, 0, 5] == schedules[0, 0, 11] == 3.0
+    assert schedules[0, 1:].sum() == 0.0
+    for row, (coupon, maturity_date) in enumerate(bonds):
+        assert np.array_equal(schedules[row], reference_cash_flows(coupon, maturity_date, purchase_date).dense())
+
+
+@pytest.mark.skipif(not os.path.exists(BONDS_CSV), reason="no bundled bonds.csv")
+@pytest.mark.parametrize("purchase_date", [f"01/02/{K.BEGINNING_YEAR}", f"08/20/{K.BEGINNING_YEAR}"])
+def test_universe_matches_payment_source(purchase_date: str) -> None:
+    universe = BondCsvLoader(BONDS_CSV, purchase_date).load()
+    assert len(universe) > 0
+    assert mismatched_rows(universe) == []